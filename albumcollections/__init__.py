@@ -11,6 +11,7 @@ from flask_caching import Cache
 
 from albumcollections.spotify import spotipy_cache_handler
 from albumcollections.config import DevConfig, ProdConfig
+from albumcollections import profiling
 
 
 # Create db
@@ -19,6 +20,9 @@ db = SQLAlchemy()
 # Create cache
 cache = Cache()
 
+# Create spotipy cache handler for the client credentials token, which is shared by every worker
+client_credentials_cache_handler = spotipy_cache_handler.AppCacheHandler(cache, 'spotify_client_credentials_token')
+
 # Create flask session spotipy cache handler
 spotipy_cache_handler = spotipy_cache_handler.FlaskSessionCacheHandler(session)
 
@@ -65,10 +69,19 @@ def create_app(test_config=None):
     from albumcollections.pwa import bp as pwa_bp
     app.register_blueprint(pwa_bp)
 
+    from albumcollections.jobs import bp as jobs_bp
+    app.register_blueprint(jobs_bp)
+
+    from albumcollections.metrics import bp as metrics_bp
+    app.register_blueprint(metrics_bp)
+
     if app.config["TESTING"]:
         from albumcollections.test import bp as test_bp
         app.register_blueprint(test_bp)
 
+    # Profile requests, if enabled
+    profiling.init_app(app)
+
     # Create bootstrap flask app
     Bootstrap5(app)
 
@@ -1,5 +1,6 @@
 from flask import render_template, request, url_for, jsonify, current_app, redirect
 import json
+from typing import Callable
 
 # Importing like this is necessary for unittest framework to patch
 import albumcollections.spotify.spotify_interface as spotify_iface
@@ -7,7 +8,7 @@ import albumcollections.spotify.spotify_user_interface as spotify_user_iface
 
 from albumcollections.user import is_user_logged_in
 from albumcollections.errors.exceptions import albumcollectionsError
-from albumcollections import collection_playlists
+from albumcollections import collection_playlists, jobs
 
 from . import bp
 
@@ -20,7 +21,7 @@ def index(playlist_id):
     # Get a spotify interface to use based on whether user is logged in
     try:
         if is_user_logged_in():
-            sp_interface = spotify_user_iface.SpotifyUserInterface()
+            sp_interface = spotify_user_iface.get_user_interface()
             sp_user_id = sp_interface.user_id
         else:
             sp_interface = spotify_iface.SpotifyInterface()
@@ -63,23 +64,28 @@ def index(playlist_id):
 
 @bp.route('/collection/shuffle_collection/<string:playlist_id>', methods=['GET', 'POST'])
 def shuffle_collection(playlist_id):
-    """Shuffle the underlying playlist"""
+    """Shuffle the underlying playlist
 
-    try:
-        # Get spotify user
-        spotify_user = spotify_user_iface.SpotifyUserInterface()
-
-        # Get the collection
-        collection = spotify_user.get_collection(playlist_id)
-
-        # Shuffle the collection
-        if len(collection.albums) > 1:
-            spotify_user.shuffle_collection(collection)
+    Shuffling rewrites the whole playlist, so it's done as a background job and
+    the user is sent to a page that shows its progress.
+    """
+    collection_location = url_for('collection.index', playlist_id=playlist_id)
 
+    try:
+        spotify_user = spotify_user_iface.get_user_interface()
+        job_id = jobs.submit(
+            spotify_user.user_id, "shuffling the collection", _shuffle, spotify_user.detached(), playlist_id
+        )
     except Exception as e:
         current_app.logger.error(f"Failed to shuffle collection {playlist_id}: {e}")
+        return redirect(collection_location)
 
-    return redirect(url_for('collection.index', playlist_id=collection.id))
+    return redirect(url_for(
+        'main.load_redirect',
+        redirect_location=collection_location,
+        load_message="Mixing it up..",
+        job_id=job_id
+    ))
 
 
 @bp.route('/collection/add_album', methods=['POST'])
@@ -98,7 +104,7 @@ def add_album():
 
         # Try adding the requested album
         try:
-            spotify_user_iface.SpotifyUserInterface().add_album_to_collection(dest_collection_id, album_id)
+            spotify_user_iface.get_user_interface().add_album_to_collection(dest_collection_id, album_id)
         except Exception as e:
             current_app.logger.error(f"Failed to add album {album_id} to collection {dest_collection_id}: {e}")
             response_dict["success"] = False
@@ -118,11 +124,14 @@ def remove_album():
         album_id = request.form["album_id"]
 
         # Initialize response dict
-        response_dict = {"success": True, "exception": None}
+        response_dict = {"success": True, "exception": None, "snapshot_id": None, "snapshot_changed": False}
 
         # Try removing the requested album
         try:
-            spotify_user_iface.SpotifyUserInterface().remove_album_from_playlist(playlist_id, album_id)
+            response_dict["snapshot_id"], response_dict["snapshot_changed"] = \
+                spotify_user_iface.get_user_interface().remove_album_from_playlist(
+                    playlist_id, album_id, request.form.get("snapshot_id")
+                )
         except Exception as e:
             current_app.logger.error(f"Failed to remove album {album_id} from playlist {playlist_id}: {e}")
             response_dict["success"] = False
@@ -144,13 +153,36 @@ def reorder_collection():
         next_album_id = data['next_album_id']
 
         # Initialize response dict
-        response_dict = {"success": True, "exception": None}
+        response_dict = {"success": True, "exception": None, "snapshot_id": None, "snapshot_changed": False}
 
         try:
-            spotify_user_iface.SpotifyUserInterface().reorder_collection(playlist_id, moved_album_id, next_album_id)
+            response_dict["snapshot_id"], response_dict["snapshot_changed"] = \
+                spotify_user_iface.get_user_interface().reorder_collection(
+                    playlist_id,
+                    moved_album_id,
+                    next_album_id,
+                    range_start=data.get('range_start'),
+                    insert_before=data.get('insert_before'),
+                    range_length=data.get('range_length'),
+                    snapshot_id=data.get('snapshot_id')
+                )
         except Exception as e:
             current_app.logger.error(f"Failed to reorder collection {playlist_id}: {e}")
             response_dict["success"] = False
             response_dict["exception"] = str(e)
 
         return jsonify(response_dict)
+
+
+"""PRIVATE HELPER FUNCTIONS"""
+
+
+def _shuffle(
+    spotify_user: spotify_user_iface.SpotifyUserInterface,
+    playlist_id: str,
+    progress: Callable[[int, int], None] = None
+):
+    collection = spotify_user.get_collection(playlist_id)
+
+    if len(collection.albums) > 1:
+        spotify_user.shuffle_collection(collection, progress=progress)
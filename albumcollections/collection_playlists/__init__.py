@@ -1,6 +1,6 @@
 # Interface for user's collections and underlying spotify playlists
 
-from typing import List, Tuple
+from typing import Callable, List, Tuple
 
 from flask import current_app, flash
 
@@ -10,7 +10,7 @@ import albumcollections.spotify.spotify_user_interface as spotify_user_iface
 from albumcollections.spotify.item.spotify_playlist import SpotifyPlaylist
 from albumcollections.models import Collection
 from albumcollections.user import get_user_id
-from albumcollections import db
+from albumcollections import db, jobs
 
 
 """PUBLIC FUNCTIONS"""
@@ -18,6 +18,9 @@ from albumcollections import db
 
 def load(spotify_user: spotify_user_iface.SpotifyUserInterface) -> Tuple[List[SpotifyPlaylist], List[SpotifyPlaylist]]:
     """Load the user's playlists - both those saved as collections in the app and overall playlists.
+
+    Stored collections whose playlists the user no longer has are removed in the
+    background, so that the page doesn't wait on them.
     """
 
     # Get the user's playlists, and any errors that were encountered while
@@ -38,28 +41,45 @@ def load(spotify_user: spotify_user_iface.SpotifyUserInterface) -> Tuple[List[Sp
     user_playlist_dict = {user_playlist.id: user_playlist for user_playlist in user_playlists}
 
     # Get the user's playlists that have been stored as collections
+    user_id = get_user_id()
     user_collection_playlists = []
-    for collection in Collection.query.filter_by(user_id=get_user_id()):
-        if collection.playlist_id in user_playlist_dict:
-            user_collection_playlists.append(user_playlist_dict[collection.playlist_id])
+    stale_collection_ids = []
+    for collection_id, in db.session.query(Collection.playlist_id).filter_by(user_id=user_id).order_by(Collection.id):
+        if collection_id in user_playlist_dict:
+            user_collection_playlists.append(user_playlist_dict[collection_id])
         else:
-            # If the stored collection is not present in the user's collections
-            # then remove it
-            db.session.delete(collection)
-            db.session.commit()
+            stale_collection_ids.append(collection_id)
+
+    # If stored collections are not present in the user's playlists then remove
+    # them - unless some playlists failed to load, in which case they may still be there
+    if stale_collection_ids and not playlist_retreival_errors:
+        try:
+            jobs.submit(
+                spotify_user.user_id, "removing old collections", _delete_collections, user_id, stale_collection_ids
+            )
+        except Exception as e:
+            current_app.logger.error(f'Failed to start removing old collections for {spotify_user.display_name}: {e}')
 
     return user_collection_playlists, user_playlists
 
 
 def add(
     spotify_user: spotify_user_iface.SpotifyUserInterface,
-    new_collection_id: str
+    new_collection_id: str,
+    user_id: int = None
 ):
-    """Add new collection id to their Collections in the database"""
-    if Collection.query.filter_by(playlist_id=new_collection_id, user_id=get_user_id()).first():
+    """Add new collection id to their Collections in the database
+
+    `user_id` is the user's database id, which is looked up for the logged in user
+    if it's not given (a background job can't look it up, since it has no session)
+    """
+    if user_id is None:
+        user_id = get_user_id()
+
+    if Collection.query.filter_by(playlist_id=new_collection_id, user_id=user_id).first():
         raise Exception(f"'{new_collection_id}' already imported as a collection")
     else:
-        db.session.add(Collection(playlist_id=new_collection_id, user_id=get_user_id()))
+        db.session.add(Collection(playlist_id=new_collection_id, user_id=user_id))
         db.session.commit()
         current_app.logger.info(
             f'User {spotify_user.display_name} added collection: {new_collection_id}'
@@ -71,14 +91,30 @@ def remove(
     collection_ids: List[str]
 ):
     """Remove collection ids from user's Collections in the database"""
+    user_id = get_user_id()
+
+    stored_collection_ids = {
+        collection_id for collection_id, in db.session.query(Collection.playlist_id).filter(
+            Collection.user_id == user_id, Collection.playlist_id.in_(collection_ids)
+        )
+    }
     for chosen_collection_id in collection_ids:
-        collection = Collection.query.filter_by(playlist_id=chosen_collection_id, user_id=get_user_id()).first()
-        if collection is None:
+        if chosen_collection_id not in stored_collection_ids:
             raise Exception(f"'{chosen_collection_id}' not found")
-        else:
-            db.session.delete(collection)
-            db.session.commit()
-            current_app.logger.info(
-                f'User {spotify_user.display_name}'
-                f' removed collection: {chosen_collection_id}'
-            )
+
+    _delete_collections(user_id, collection_ids)
+    current_app.logger.info(
+        f'User {spotify_user.display_name}'
+        f' removed collections: {", ".join(collection_ids)}'
+    )
+
+
+"""PRIVATE FUNCTIONS"""
+
+
+def _delete_collections(user_id: int, collection_ids: List[str], progress: Callable[[int, int], None] = None):
+    """Delete the user's stored collections with the given ids, all at once"""
+    Collection.query.filter(
+        Collection.user_id == user_id, Collection.playlist_id.in_(collection_ids)
+    ).delete(synchronize_session=False)
+    db.session.commit()
@@ -9,6 +9,33 @@ class Config(object):
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Where spotify's web api and accounts service are, if not at spotify (ex: a local
+    # stand-in for load testing, see `benchmarks/fake_spotify.py`)
+    SPOTIFY_API_URL = os.environ.get('SPOTIFY_API_URL')
+    SPOTIFY_ACCOUNTS_URL = os.environ.get('SPOTIFY_ACCOUNTS_URL')
+
+    # Limits on requests to spotify, shared by every worker (see
+    # `albumcollections.spotify.rate_limiter`). One collection load reads up to 8 pages
+    # at a time, which makes around 50 requests a second at spotify's usual latency,
+    # so a lower limit slows down loading large collections
+    SPOTIFY_REQUESTS_PER_WINDOW = int(os.environ.get('SPOTIFY_REQUESTS_PER_WINDOW') or 50)
+    SPOTIFY_REQUEST_WINDOW_SECONDS = float(os.environ.get('SPOTIFY_REQUEST_WINDOW_SECONDS') or 1)
+    # Share of each window that bulk requests (ex: filling in missing tracks) can use
+    SPOTIFY_BULK_WINDOW_SHARE = float(os.environ.get('SPOTIFY_BULK_WINDOW_SHARE') or 0.5)
+    # Longest that a request waits for spotify to stop rate limiting before failing, in seconds
+    SPOTIFY_MAX_RATE_LIMIT_WAIT = float(os.environ.get('SPOTIFY_MAX_RATE_LIMIT_WAIT') or 10)
+
+    # Bearer token that scrapers of `/metrics` have to send, if set
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Request profiling (see `albumcollections.profiling`). It's off unless there's
+    # a share of requests to profile, or a token that requests can ask for it with
+    PROFILE_RATE = float(os.environ.get('PROFILE_RATE') or 0)
+    PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or './.profiles/'
+    PROFILE_MAX_CAPTURES = 200
+    PROFILE_INDEX_SIZE = 50
+
 
 class DevConfig(Config):
     """This class is used to configure the flask app using
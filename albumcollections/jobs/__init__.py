@@ -0,0 +1,129 @@
+"""This module runs long operations (like copying a playlist) in the background,
+so that they don't hold up the request that starts them.
+
+Jobs run on a small pool of threads in the worker process that started them.
+Their state is kept in the app cache, so that any worker can report on it.
+
+A job runs in an app context, not in the request that started it (which is over
+by the time the job is), so it can't use the session or `g`. Anything it needs
+from the request, like the user's id or their token, is passed in its args.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+from typing import Callable, Dict, Optional
+import uuid
+
+from flask import Blueprint, Flask, current_app
+
+from albumcollections import cache
+
+bp = Blueprint('jobs', __name__)
+
+
+"""CONSTANTS"""
+
+
+# Max number of jobs that a worker process runs at the same time
+MAX_RUNNING_JOBS = 2
+
+# Number of seconds that a job's state is kept for
+JOB_STATE_TIMEOUT = 3600
+
+
+class JobStatus:
+    queued = 'queued'
+    running = 'running'
+    done = 'done'
+    failed = 'failed'
+
+
+"""PUBLIC FUNCTIONS"""
+
+
+def submit(owner_id: str, description: str, func: Callable, *args, **kwargs) -> str:
+    """Run `func(*args, **kwargs, progress=...)` in the background, in an app
+    context, returning the id of the job.
+
+    `progress(done, total)` can be called by `func` to report how far along it is.
+    """
+    job_id = uuid.uuid4().hex
+    _set_state(job_id, {
+        'owner_id': owner_id,
+        'description': description,
+        'status': JobStatus.queued,
+        'done': 0,
+        'total': None,
+        'error': None,
+    })
+
+    _get_executor().submit(_run, current_app._get_current_object(), job_id, description, func, args, kwargs)
+
+    return job_id
+
+
+def get_state(job_id: str) -> Optional[Dict]:
+    """Get the state of the job, or None if there's no such job (or it's expired)"""
+    return cache.get(_state_key(job_id))
+
+
+"""PRIVATE FUNCTIONS"""
+
+
+def _run(app: Flask, job_id: str, description: str, func: Callable, args, kwargs):
+    def progress(done: int, total: int = None):
+        _update_state(job_id, done=done, total=total)
+
+    with app.app_context():
+        _update_state(job_id, status=JobStatus.running)
+        try:
+            func(*args, **kwargs, progress=progress)
+        except Exception as e:
+            current_app.logger.error(f"Job {job_id} ({description}) failed: {e}")
+            _update_state(job_id, status=JobStatus.failed, error=str(e))
+        else:
+            _update_state(job_id, status=JobStatus.done)
+
+
+def _update_state(job_id: str, **values):
+    state = get_state(job_id)
+    if state is not None:
+        state.update(values)
+        _set_state(job_id, state)
+
+
+def _set_state(job_id: str, state: Dict):
+    cache.set(_state_key(job_id), state, timeout=JOB_STATE_TIMEOUT)
+
+
+def _state_key(job_id: str) -> str:
+    return f"job_{job_id}"
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the worker process's pool of threads for running jobs"""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_RUNNING_JOBS, thread_name_prefix="job")
+
+        return _executor
+
+
+def _forget_executor():
+    """Forget the pool in a forked child process, since its threads don't exist there"""
+    global _executor, _executor_lock
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_executor)
+
+
+from albumcollections.jobs import handlers
@@ -0,0 +1,36 @@
+from flask import jsonify
+
+# Importing like this is necessary for unittest framework to patch
+import albumcollections.spotify.spotify_user_interface as spotify_user_iface
+
+from albumcollections.user import is_user_logged_in
+from albumcollections import jobs
+
+from . import bp
+
+
+"""ROUTE HANDLERS"""
+
+
+@bp.route('/job/<string:job_id>', methods=['GET'])
+def status(job_id):
+    """Report the status and progress of one of the user's jobs
+
+    A failed job's error is included as the exception, for the page that's
+    waiting on the job to show.
+    """
+    job_state = jobs.get_state(job_id)
+
+    if job_state is None or not is_user_logged_in() or \
+            job_state['owner_id'] != spotify_user_iface.get_user_interface().user_id:
+        return jsonify({"exception": f"No job {job_id}"}), 404
+
+    response = {
+        "status": job_state['status'],
+        "done": job_state['done'],
+        "total": job_state['total'],
+    }
+    if job_state['status'] == jobs.JobStatus.failed:
+        response["exception"] = f"Failed to finish {job_state['description']}: {job_state['error']}"
+
+    return jsonify(response)
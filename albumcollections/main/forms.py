@@ -1,4 +1,4 @@
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 
 from flask import url_for, flash, current_app
 from flask_wtf import FlaskForm
@@ -9,9 +9,11 @@ from wtforms.fields.choices import SelectMultipleField
 import albumcollections.spotify.spotify_user_interface as spotify_user_iface
 
 
+from albumcollections.spotify import rate_limiter
 from albumcollections.spotify.item.spotify_playlist import SpotifyPlaylist
 from albumcollections.errors.exceptions import albumcollectionsError
-from albumcollections import collection_playlists
+from albumcollections.user import get_user_id
+from albumcollections import collection_playlists, jobs
 
 
 """EXCEPTIONS"""
@@ -51,25 +53,25 @@ def process(
     spotify_user: spotify_user_iface.SpotifyUserInterface,
     user_playlists: List[SpotifyPlaylist],
     user_collection_playlists: List[SpotifyPlaylist]
-) -> Tuple[bool, AddCollectionForm, RemoveCollectionsForm]:
+) -> Tuple[Optional[str], AddCollectionForm, RemoveCollectionsForm]:
     """rocess the add/remove collection forms
 
     Return a tuple of:
-    - Whether the user's collections were changed during processing of forms
+    - Where to redirect to if the user's collections were changed (or are being
+      changed in the background) during processing of forms, otherwise None
     - The add_collection_form
     - The remove_collection_form
     """
-    collections_changed = False
+    redirect_location = None
     add_collection_form = AddCollectionForm()
     remove_collections_form = RemoveCollectionsForm()
 
     # Process the `add_collection_form`
     add_collection_form.playlist.choices.extend(_get_available_playlists(user_playlists, user_collection_playlists))
-    if _add_collection(
+    redirect_location = _add_collection(
         spotify_user,
         add_collection_form
-    ):
-        collections_changed = True
+    )
 
     # Process the `remove_collections_form`
     remove_collections_form.collections.choices.extend(
@@ -79,9 +81,9 @@ def process(
         spotify_user,
         remove_collections_form,
     ):
-        collections_changed = True
+        redirect_location = url_for('main.index')
 
-    return collections_changed, add_collection_form, remove_collections_form
+    return redirect_location, add_collection_form, remove_collections_form
 
 
 """PRIVATE HELPER FUNCTIONS"""
@@ -132,51 +134,95 @@ def _remove_collections(
 def _add_collection(
     spotify_user: spotify_user_iface.SpotifyUserInterface,
     add_collection_form: AddCollectionForm,
-) -> bool:
+) -> Optional[str]:
     """Handle `AddCollectionForm` submission
 
     - Initialize collection based on chosen playlist (depending on options in form selected)
     - Add resulting collection to db upon successful form submission.
     - Log and flash error upon failed form submission.
 
-    Returns a boolean value representing whether collections were added to the database.
+    Copying a playlist or filling in its missing tracks can take a long time for
+    big playlists, so these are done as a background job, and the user is sent
+    to a page that shows its progress.
+
+    Returns where to redirect to if a collection was (or is being) added, otherwise None.
     """
     if add_collection_form.submit_new_collection.data and add_collection_form.validate():
-        try:
-            # Initialize the collection based on form options selected
-            new_collection_id = _init_collection(
-                spotify_user,
-                add_collection_form.playlist.data,
-                add_collection_form.create_copy.data,
-                add_collection_form.fill_missing_tracks.data
+        init_args = (
+            add_collection_form.playlist.data,
+            add_collection_form.create_copy.data,
+            add_collection_form.fill_missing_tracks.data
+        )
+
+        if add_collection_form.create_copy.data or add_collection_form.fill_missing_tracks.data:
+            try:
+                job_id = jobs.submit(
+                    spotify_user.user_id, "adding the collection", _init_and_add_collection,
+                    spotify_user.detached(), get_user_id(), *init_args
+                )
+            except Exception as e:
+                raise albumcollectionsError(
+                    f"Failed to start adding collection: {e}", url_for('main.index')
+                )
+            return url_for(
+                'main.load_redirect',
+                redirect_location=url_for('main.index'),
+                load_message="Putting your new collection together...",
+                job_id=job_id
             )
 
-            # Add the new collection's id to the db
-            collection_playlists.add(spotify_user, new_collection_id)
+        try:
+            _init_and_add_collection(spotify_user, get_user_id(), *init_args)
         except Exception as e:
             raise albumcollectionsError(
                 f"Failed to add collection: {e}", url_for('main.index')
             )
-        return True
+        return url_for('main.index')
     elif add_collection_form.errors:
         current_app.logger.error(
             f'User {spotify_user.display_name} add collections validate failure: {add_collection_form.errors}'
         )
         flash("Failed to add collections", "danger")
 
-    return False
+    return None
 
 
+def _init_and_add_collection(
+    spotify_user: spotify_user_iface.SpotifyUserInterface,
+    user_id: int,
+    source_playlist_id: str,
+    create_copy: bool,
+    fill_missing_tracks: bool,
+    progress: Callable[[int, int], None] = None
+):
+    # Initialize the collection based on form options selected
+    new_collection_id = _init_collection(
+        spotify_user,
+        source_playlist_id,
+        create_copy,
+        fill_missing_tracks,
+        progress=progress
+    )
+
+    # Add the new collection's id to the db
+    collection_playlists.add(spotify_user, new_collection_id, user_id)
+
+
+@rate_limiter.bulk()
 def _init_collection(
     spotify_user: spotify_user_iface.SpotifyUserInterface,
     source_playlist_id: str,
     create_copy: bool,
-    fill_missing_tracks: bool
+    fill_missing_tracks: bool,
+    progress: Callable[[int, int], None] = None
 ) -> str:
     """Initialize the collection that will be stored.
 
     - Create a new playlist if the option was specified
     - Fill in missing album tracks if the option was specified
+
+    Requests to spotify are made as bulk requests, so that they don't hold up
+    other users' interactive requests. `progress` is called as tracks are added.
     """
     # If copy was specified, create a copy of the playlist and record the new playlist
     # id as the new collection id
@@ -192,12 +238,14 @@ def _init_collection(
     if fill_missing_tracks:
         spotify_user.fill_collection_missing_tracks(
             spotify_user.get_collection(source_playlist_id),
-            new_collection_id
+            new_collection_id,
+            progress=progress
         )
     elif create_copy:
         spotify_user.add_items_to_playlist(
             new_collection_id,
-            [track.uri for track in spotify_user.get_playlist_tracks(source_playlist_id)]
+            [track.uri for track in spotify_user.get_playlist_tracks(source_playlist_id)],
+            progress=progress
         )
 
     return new_collection_id
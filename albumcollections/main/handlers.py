@@ -1,4 +1,4 @@
-from flask import redirect, render_template, url_for, flash, request, current_app
+from flask import redirect, render_template, flash, request, current_app
 
 # Importing like this is necessary for unittest framework to patch
 import albumcollections.spotify.spotify_user_interface as spotify_user_iface
@@ -30,7 +30,7 @@ def index():
     if is_user_logged_in():
         # Get the spotify user that is logged in
         try:
-            spotify_user = spotify_user_iface.SpotifyUserInterface()
+            spotify_user = spotify_user_iface.get_user_interface()
         except Exception as e:
             current_app.logger.critical(f"Failed to create spotify user interface: {e}")
             spotify_user_iface.unauth_user()
@@ -46,11 +46,11 @@ def index():
             spotify_user_iface.unauth_user()
             flash("Failed to load collections", "danger")
 
-        # Process the collection forms, reloading if collections changed
-        collection_changed, add_collection_form, remove_collections_form = forms.process(
+        # Process the collection forms, redirecting if collections changed
+        redirect_location, add_collection_form, remove_collections_form = forms.process(
             spotify_user, user_playlists, user_collection_playlists)
-        if collection_changed:
-            return redirect(url_for('main.index'))
+        if redirect_location is not None:
+            return redirect(redirect_location)
 
     return render_template(
         'main/index.html',
@@ -70,5 +70,6 @@ def load_redirect():
     return render_template(
         'main/load-redirect.html',
         redirect_location=request.args.get("redirect_location"),
-        load_message=request.args.get("load_message")
+        load_message=request.args.get("load_message"),
+        job_id=request.args.get("job_id")
     )
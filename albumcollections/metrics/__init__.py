@@ -0,0 +1,219 @@
+"""This module keeps counters and histograms of what the app is doing (how long
+requests take, how many calls are made to spotify, how often collections are
+found in the cache...), and serves them on `/metrics` in the prometheus text
+format.
+
+Metrics are kept in the memory of each worker process and count from when it
+started, so a scrape reports on the worker that served it. Recording a value
+is a lock and a dictionary update, so metrics can be recorded on hot paths.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from flask import Blueprint, g, request
+
+bp = Blueprint('metrics', __name__)
+
+
+"""CONSTANTS"""
+
+
+# Upper bounds of the buckets of histograms of durations, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Upper bounds of the buckets of histograms of collection sizes
+SIZE_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+"""METRIC CLASSES"""
+
+
+class Counter:
+    """A count of events, by the values of its labels"""
+
+    type = 'counter'
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+
+        self._values = {}
+        self._lock = threading.Lock()
+
+        _registry.append(self)
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def get(self, *label_values) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def reset(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            values = list(self._values.items())
+
+        for label_values, value in values:
+            yield self.name, dict(zip(self.label_names, label_values)), value
+
+
+class Histogram:
+    """A distribution of observed values in cumulative buckets, by the values of its labels"""
+
+    type = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS
+    ):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+
+        # Label values to [count per bucket (the last one unbounded)..., sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+        _registry.append(self)
+
+    def observe(self, value: float, *label_values):
+        bucket = bisect_left(self.buckets, value)
+
+        with self._lock:
+            counts = self._values.get(label_values)
+            if counts is None:
+                counts = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            counts[bucket] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, *label_values):
+        """Observe how long the block takes, in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def get_count(self, *label_values) -> int:
+        with self._lock:
+            return sum(self._values.get(label_values, [0, 0])[:-1])
+
+    def reset(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            values = [(label_values, list(counts)) for label_values, counts in self._values.items()]
+
+        for label_values, counts in values:
+            labels = dict(zip(self.label_names, label_values))
+
+            cumulative_count = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative_count += count
+                yield f"{self.name}_bucket", dict(labels, le=_format_value(bound)), cumulative_count
+
+            yield f"{self.name}_count", labels, cumulative_count
+            yield f"{self.name}_sum", labels, counts[-1]
+
+
+"""METRICS"""
+
+
+_registry: List = []
+
+REQUEST_DURATION = Histogram(
+    'albumcollections_request_duration_seconds',
+    "Time taken to handle requests, by route",
+    ('endpoint', 'method', 'status')
+)
+
+
+"""PUBLIC FUNCTIONS"""
+
+
+def render() -> str:
+    """Get every metric in the prometheus text format"""
+    lines = []
+
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+
+        for name, labels, value in metric.samples():
+            if labels:
+                label_text = ",".join(f'{label}="{_escape(label_value)}"' for label, label_value in labels.items())
+                lines.append(f"{name}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Start every metric over from zero"""
+    for metric in _registry:
+        metric.reset()
+
+
+"""REQUEST HOOKS"""
+
+
+@bp.before_app_request
+def start_request_timer():
+    g.metrics_request_start = time.perf_counter()
+
+
+@bp.after_app_request
+def record_request_duration(response):
+    start = g.pop('metrics_request_start', None)
+    if start is not None:
+        REQUEST_DURATION.observe(
+            time.perf_counter() - start,
+            request.endpoint or 'unmatched',
+            request.method,
+            str(response.status_code)
+        )
+
+    return response
+
+
+"""PRIVATE FUNCTIONS"""
+
+
+def _escape(label_value) -> str:
+    return str(label_value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    elif float(value).is_integer():
+        return str(int(value))
+    else:
+        return repr(float(value))
+
+
+# A forked worker starts counting from zero, rather than from what its parent had counted
+os.register_at_fork(after_in_child=reset)
+
+
+from albumcollections.metrics import handlers
@@ -0,0 +1,26 @@
+import hmac
+
+from flask import current_app, make_response, request
+
+from albumcollections import metrics
+
+from . import bp
+
+
+"""ROUTE HANDLERS"""
+
+
+@bp.route('/metrics', methods=['GET'])
+def metrics_text():
+    """Serve this worker's metrics in the prometheus text format
+
+    If a `METRICS_TOKEN` is configured, the scraper has to send it as a bearer token.
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return make_response("Not found\n", 404)
+
+    response = make_response(metrics.render())
+    response.headers['Content-Type'] = metrics.CONTENT_TYPE
+
+    return response
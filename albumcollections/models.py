@@ -1,8 +1,11 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
 from albumcollections import db
 
 MAX_SPOTIFY_PLAYLIST_ID_LENGTH = 50
 MAX_SPOTIFY_SNAPSHOT_ID_LENGTH = 100
 MAX_SPOTIFY_USER_ID_LENGTH = 50
+MAX_SPOTIFY_ALBUM_ID_LENGTH = 50
 
 
 class AcUser(db.Model):
@@ -24,3 +27,41 @@ class Collection(db.Model):
 
     def __repr__(self):
         return '<Collection %r>' % self.id
+
+
+class CollectionLayout(db.Model):
+    """Albums parsed from a snapshot of a collection playlist, kept for when they
+    aren't in the app cache
+    """
+    playlist_id = db.Column(db.String(MAX_SPOTIFY_PLAYLIST_ID_LENGTH), primary_key=True)
+    snapshot_id = db.Column(db.String(MAX_SPOTIFY_SNAPSHOT_ID_LENGTH), primary_key=True)
+    albums = db.Column(db.LargeBinary, nullable=False)  # Encoded by `collection_cache`
+
+    def __repr__(self):
+        return '<CollectionLayout %r %r>' % (self.playlist_id, self.snapshot_id)
+
+
+class CatalogAlbum(db.Model):
+    """Album track listing, shared by all users"""
+    album_id = db.Column(db.String(MAX_SPOTIFY_ALBUM_ID_LENGTH), primary_key=True)
+    track_ids = db.Column(db.JSON, nullable=False)
+    total_tracks = db.Column(db.Integer, nullable=False)
+    name = db.Column(db.Text, nullable=False)
+    artists = db.Column(db.JSON, nullable=False)  # List of [artist id, artist name]
+    img_url = db.Column(db.Text)
+    album_type = db.Column(db.String(20))
+    release_date = db.Column(db.String(10))
+
+    def __repr__(self):
+        return '<CatalogAlbum %r>' % self.album_id
+
+
+def insert(model):
+    """Make an insert into the model's table that can skip or update rows that already
+    exist (with `on_conflict_do_nothing` or `on_conflict_do_update`). The app's
+    databases are postgresql in production and sqlite otherwise, which both support it
+    """
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql.insert(model)
+    else:
+        return sqlite.insert(model)
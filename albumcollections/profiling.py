@@ -0,0 +1,195 @@
+"""Opt-in profiling of requests, to see where the time of a slow request goes
+(requests to spotify, decoding cached albums, building items, rendering...).
+
+A share of requests (`PROFILE_RATE`), and any request that carries the
+`PROFILE_TOKEN` in its `X-Profile-Token` header, are run under cProfile. Each
+capture is written to `PROFILE_DIR` as a pstats file (open it with
+`python -m pstats` or snakeviz), named after when the request was made, how
+long it took and its method and path. Only the newest `PROFILE_MAX_CAPTURES`
+are kept, and `index.txt` in the same directory lists the slowest of them.
+
+Requests to spotify are made on other threads, which aren't profiled. Their
+time shows up as time spent waiting on them in the request's thread.
+
+Nothing is installed unless a rate or token is configured, so profiling costs
+nothing when it's off.
+"""
+
+import cProfile
+import hmac
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional
+from urllib.parse import quote, unquote
+
+'''CONSTANTS'''
+
+
+PROFILE_HEADER = 'X-Profile-Token'
+
+CAPTURE_SUFFIX = '.prof'
+
+INDEX_FILE_NAME = 'index.txt'
+
+# Max length of the quoted path in a capture's file name
+MAX_PATH_LENGTH = 120
+
+
+class Capture(NamedTuple):
+    file_name: str
+    started_at: float
+    milliseconds: int
+    method: str
+    path: str
+
+    @classmethod
+    def from_file_name(cls, file_name: str) -> Optional['Capture']:
+        """Parse a capture's file name, or return None if it's not a capture"""
+        if not file_name.endswith(CAPTURE_SUFFIX):
+            return None
+
+        try:
+            started_at, _, milliseconds, method, path = file_name[:-len(CAPTURE_SUFFIX)].split('_', 4)
+            if not milliseconds.endswith('ms'):
+                return None
+            return cls(file_name, int(started_at) / 1000, int(milliseconds[:-2]), method, unquote(path))
+        except ValueError:
+            return None
+
+
+'''PUBLIC FUNCTIONS'''
+
+
+def init_app(app):
+    """Profile the app's requests if `PROFILE_RATE` or `PROFILE_TOKEN` is configured"""
+    rate = app.config.get('PROFILE_RATE') or 0
+    token = app.config.get('PROFILE_TOKEN')
+
+    if rate or token:
+        app.wsgi_app = ProfilingMiddleware(
+            app.wsgi_app,
+            app.config.get('PROFILE_DIR') or './.profiles/',
+            rate=rate,
+            token=token,
+            max_captures=app.config.get('PROFILE_MAX_CAPTURES', 200),
+            index_size=app.config.get('PROFILE_INDEX_SIZE', 50),
+            log_error=app.logger.error
+        )
+        app.logger.info(f"Profiling requests (rate {rate}, token {'set' if token else 'not set'})")
+
+
+def get_captures(directory: str) -> List[Capture]:
+    """Get the captures in the directory, slowest first"""
+    try:
+        file_names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+
+    captures = (Capture.from_file_name(file_name) for file_name in file_names)
+    return sorted((capture for capture in captures if capture is not None), key=lambda c: -c.milliseconds)
+
+
+class ProfilingMiddleware:
+    """Wsgi middleware that profiles chosen requests and writes out their captures"""
+
+    def __init__(
+        self,
+        wsgi_app,
+        directory: str,
+        rate: float = 0,
+        token: str = None,
+        max_captures: int = 200,
+        index_size: int = 50,
+        log_error: Callable[[str], None] = None
+    ):
+        self.wsgi_app = wsgi_app
+        self.directory = directory
+        self.rate = rate
+        self.token = token
+        self.max_captures = max_captures
+        self.index_size = index_size
+        self.log_error = log_error or logging.getLogger(__name__).error
+
+        self._write_lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if not self._should_profile(environ):
+            return self.wsgi_app(environ, start_response)
+
+        started_at = time.time()
+        start = time.perf_counter()
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            # Read the whole response while profiling, in case it's generated lazily
+            app_iter = self.wsgi_app(environ, start_response)
+            try:
+                response = list(app_iter)
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+        finally:
+            profile.disable()
+            seconds = time.perf_counter() - start
+
+            try:
+                self._write_capture(profile, environ, started_at, seconds)
+            except OSError as e:
+                self.log_error(f"Failed to write profile of {environ.get('PATH_INFO')}: {e}")
+
+        return response
+
+    def _should_profile(self, environ) -> bool:
+        header_token = environ.get('HTTP_' + PROFILE_HEADER.upper().replace('-', '_'))
+        if self.token and header_token is not None and hmac.compare_digest(header_token, self.token):
+            return True
+
+        return self.rate > 0 and random.random() < self.rate
+
+    def _write_capture(self, profile: cProfile.Profile, environ, started_at: float, seconds: float):
+        path = quote(environ.get('PATH_INFO', '/'), safe='')[:MAX_PATH_LENGTH]
+        file_name = (
+            f"{int(started_at * 1000)}_{os.getpid()}_{round(seconds * 1000)}ms_"
+            f"{environ.get('REQUEST_METHOD', 'GET')}_{path}{CAPTURE_SUFFIX}"
+        )
+
+        with self._write_lock:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.dump_stats(os.path.join(self.directory, file_name))
+
+            # Drop the oldest captures, then list the slowest of those that are left
+            captures = get_captures(self.directory)
+            for capture in sorted(captures, key=lambda c: c.started_at)[:-self.max_captures]:
+                _remove(os.path.join(self.directory, capture.file_name))
+                captures.remove(capture)
+
+            self._write_index(captures[:self.index_size])
+
+    def _write_index(self, captures: List[Capture]):
+        lines = [f"{'ms':>8}  {'started at':<19}  {'method':<6}  {'path':<60}  file"]
+        for capture in captures:
+            started_at = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(capture.started_at))
+            lines.append(f"{capture.milliseconds:>8}  {started_at:<19}  {capture.method:<6}  "
+                         f"{capture.path:<60}  {capture.file_name}")
+
+        # Replace the index in one go, since other workers may be reading or writing it
+        index_path = os.path.join(self.directory, INDEX_FILE_NAME)
+        temp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}"
+        with open(temp_path, 'w') as index_file:
+            index_file.write("\n".join(lines) + "\n")
+        os.replace(temp_path, index_path)
+
+
+'''PRIVATE FUNCTIONS'''
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        # Another worker removed it first
+        pass
@@ -0,0 +1,150 @@
+"""Catalog of album track listings, shared by all users.
+
+An album's track listing practically never changes, so once an album has
+been looked up on spotify it's kept for good in the `CatalogAlbum` table,
+which is written in a session of its own (so that adding albums never commits
+or rolls back anything else that the request has pending).
+Each worker keeps the albums it used most recently in memory in front of
+the table, bounded by the total number of track ids held.
+"""
+
+from collections import OrderedDict
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from albumcollections.models import CatalogAlbum, insert
+from albumcollections import db
+
+'''CONSTANTS'''
+
+
+# Max number of track ids held in memory by one worker
+MAX_MEMORY_TRACKS = 200000
+
+
+'''CATALOG ENTRY'''
+
+
+class CatalogEntry(NamedTuple):
+    album_id: str
+    track_ids: Tuple[str, ...]
+    total_tracks: int
+    name: str
+    artists: Tuple[Tuple[str, str], ...]  # (artist id, artist name) pairs
+    img_url: Optional[str]
+    album_type: Optional[str]
+    release_date: Optional[str]
+
+
+'''IN-MEMORY CACHE'''
+
+
+_memory = OrderedDict()
+_memory_tracks = 0
+_memory_lock = threading.Lock()
+
+
+def clear_memory():
+    """Forget all albums held in memory by this worker"""
+    global _memory_tracks
+
+    with _memory_lock:
+        _memory.clear()
+        _memory_tracks = 0
+
+
+'''PUBLIC FUNCTIONS'''
+
+
+def get(album_ids: Iterable[str]) -> Dict[str, CatalogEntry]:
+    """Get the catalog entries for the given albums, as a dictionary of album id
+    to entry. Albums that aren't in the catalog are left out.
+    """
+    album_ids = list(album_ids)
+    entries = {}
+
+    with _memory_lock:
+        for album_id in album_ids:
+            entry = _memory.get(album_id)
+            if entry is not None:
+                _memory.move_to_end(album_id)
+                entries[album_id] = entry
+
+    missing_album_ids = [album_id for album_id in album_ids if album_id not in entries]
+    if missing_album_ids:
+        stored_entries = [
+            _entry_from_row(row)
+            for row in CatalogAlbum.query.filter(CatalogAlbum.album_id.in_(missing_album_ids))
+        ]
+        _remember(stored_entries)
+        entries.update((entry.album_id, entry) for entry in stored_entries)
+
+    return entries
+
+
+def add(entries: List[CatalogEntry]):
+    """Add albums that were looked up on spotify to the catalog. Albums that are
+    already in it (ex: added by another worker at the same time) are left as they are.
+    """
+    _remember(entries)
+    if not entries:
+        return
+
+    values = {entry.album_id: _values_from_entry(entry) for entry in entries}
+
+    try:
+        with Session(db.engine) as session, session.begin():
+            session.execute(
+                insert(CatalogAlbum).values(list(values.values())).on_conflict_do_nothing(index_elements=['album_id'])
+            )
+    except SQLAlchemyError as e:
+        current_app.logger.warning(f"Failed to store albums in catalog: {e}")
+
+
+'''PRIVATE FUNCTIONS'''
+
+
+def _remember(entries: List[CatalogEntry]):
+    """Hold entries in memory, evicting the least recently used ones if needed"""
+    global _memory_tracks
+
+    with _memory_lock:
+        for entry in entries:
+            if entry.album_id not in _memory:
+                _memory_tracks += len(entry.track_ids)
+            _memory[entry.album_id] = entry
+            _memory.move_to_end(entry.album_id)
+
+        while _memory_tracks > MAX_MEMORY_TRACKS and _memory:
+            _, evicted_entry = _memory.popitem(last=False)
+            _memory_tracks -= len(evicted_entry.track_ids)
+
+
+def _entry_from_row(row: CatalogAlbum) -> CatalogEntry:
+    return CatalogEntry(
+        album_id=row.album_id,
+        track_ids=tuple(row.track_ids),
+        total_tracks=row.total_tracks,
+        name=row.name,
+        artists=tuple(tuple(artist) for artist in row.artists),
+        img_url=row.img_url,
+        album_type=row.album_type,
+        release_date=row.release_date
+    )
+
+
+def _values_from_entry(entry: CatalogEntry) -> Dict:
+    return {
+        'album_id': entry.album_id,
+        'track_ids': list(entry.track_ids),
+        'total_tracks': entry.total_tracks,
+        'name': entry.name,
+        'artists': [list(artist) for artist in entry.artists],
+        'img_url': entry.img_url,
+        'album_type': entry.album_type,
+        'release_date': entry.release_date,
+    }
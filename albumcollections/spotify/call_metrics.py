@@ -0,0 +1,91 @@
+"""Metrics of the calls that the spotify interfaces make to the web api.
+
+Each wrapper method (and each method that changes a playlist) is measured as
+a call. The http requests that a call makes, including retries, are counted
+under the innermost call that's in progress, which carries over to requests
+made concurrently (see `SpotifyInterface._iter_concurrent`).
+"""
+
+import contextvars
+from functools import wraps
+from typing import Callable
+
+import requests
+from spotipy.exceptions import SpotifyException
+from urllib3.util.retry import Retry
+
+from albumcollections import metrics
+
+'''METRICS'''
+
+
+CALLS = metrics.Counter(
+    'albumcollections_spotify_calls_total',
+    "Calls to the spotify api, by interface method and outcome (ok or the error's http status)",
+    ('method', 'outcome')
+)
+
+CALL_DURATION = metrics.Histogram(
+    'albumcollections_spotify_call_duration_seconds',
+    "Time taken by calls to the spotify api, including retries and waiting for a turn",
+    ('method',)
+)
+
+REQUESTS = metrics.Counter(
+    'albumcollections_spotify_requests_total',
+    "Http requests made to the spotify api, by interface method and response status",
+    ('method', 'status')
+)
+
+RETRIES = metrics.Counter(
+    'albumcollections_spotify_retries_total',
+    "Http requests to the spotify api that were retried, by interface method and reason",
+    ('method', 'reason')
+)
+
+# Method that's named when a request is made outside of any measured call
+OTHER_METHOD = 'other'
+
+_method = contextvars.ContextVar('spotify_call_method', default=OTHER_METHOD)
+
+
+'''PUBLIC FUNCTIONS'''
+
+
+def measured(func: Callable) -> Callable:
+    """Measure calls of a spotify interface method, named after the method"""
+    method = func.__name__.lstrip('_')
+
+    @wraps(func)
+    def measured_func(*args, **kwargs):
+        token = _method.set(method)
+        outcome = 'ok'
+        try:
+            with CALL_DURATION.time(method):
+                return func(*args, **kwargs)
+        except SpotifyException as e:
+            outcome = str(e.http_status)
+            raise
+        except Exception:
+            outcome = 'error'
+            raise
+        finally:
+            CALLS.inc(method, outcome)
+            _method.reset(token)
+
+    return measured_func
+
+
+def record_response(response: requests.Response):
+    """Count an http response from spotify, and the retries of server errors that it took"""
+    method = _method.get()
+    REQUESTS.inc(method, str(response.status_code))
+
+    retries = getattr(response.raw, 'retries', None)
+    if isinstance(retries, Retry) and retries.history:
+        RETRIES.inc(method, 'server_error', amount=len(retries.history))
+
+
+def record_rate_limited():
+    """Count a request that's retried since spotify rate limited it"""
+    RETRIES.inc(_method.get(), 'rate_limited')
@@ -1,4 +1,6 @@
-from typing import List
+import copy
+import hashlib
+from typing import Dict, List, Optional, Tuple
 
 from .item.spotify_music import SpotifyAlbum
 
@@ -13,93 +15,312 @@ def get(playlist_tracks_iter) -> List[SpotifyAlbum]:
     as python version is 3.7+ because dictionaries retain insertion
     order
     """
-    album_entries = {}
-    track_index = 0
+    parser = CollectionAlbumsParser()
 
-    try:
-        # Get the first track in playlist
-        playlist_track = next(playlist_tracks_iter)
+    for playlist_track in playlist_tracks_iter:
+        parser.feed(playlist_track)
+
+    return parser.albums
+
+
+def hash_page(playlist_items: List[dict]) -> str:
+    """Hash the parts of a page of playlist items (as returned by the api) that
+    album detection depends on
+    """
+    page_hash = hashlib.blake2b(digest_size=16)
+    for playlist_item in playlist_items:
+        track = playlist_item["track"]
+        page_hash.update(repr((
+            track["type"],
+            track["id"],
+            track["album"]["id"],
+            track["album"].get("total_tracks"),
+            track["disc_number"],
+            track["track_number"]
+        )).encode())
+
+    return page_hash.hexdigest()
+
+
+'''LAYOUT EDITS'''
+# These apply an edit that was made to a playlist to the albums that were parsed from
+# it, so that the playlist doesn't have to be parsed again. Each returns the playlist
+# index of the first track that the edit changed. If it can't be sure that the edited
+# albums are what parsing the edited playlist would result in, the albums are left as
+# they were and None is returned.
+
+
+def move_tracks(
+    albums: List[SpotifyAlbum],
+    range_start: int,
+    insert_before: int,
+    range_length: int,
+    total_tracks: int
+) -> Optional[int]:
+    """Apply a move of the tracks in [range_start, range_start + range_length) to
+    before the track at insert_before (as in the api's reorder items endpoint)
+    """
+    if _find_removable_album(albums, range_start, range_length, total_tracks) is None or \
+            not _is_insertable(albums, insert_before, total_tracks):
+        return None
+
+    for album in albums:
+        index = album.playlist_index
+
+        if range_start <= index < range_start + range_length:
+            # Moved forward or backward, depending on where it was inserted
+            if insert_before > range_start:
+                index += insert_before - range_start - range_length
+            else:
+                index -= range_start - insert_before
+        elif range_start < index < insert_before:
+            index -= range_length
+        elif insert_before <= index < range_start:
+            index += range_length
+
+        album.playlist_index = index
+
+    albums.sort(key=lambda album: album.playlist_index)
+
+    return min(range_start, insert_before)
+
+
+def remove_album(albums: List[SpotifyAlbum], album_id: str, total_tracks: int) -> Optional[int]:
+    """Apply the removal of all of an album's tracks from the playlist"""
+    album = next((album for album in albums if album.id == album_id), None)
+    if album is None:
+        return None
+
+    range_start = album.playlist_index
+    range_length = len(album.track_ids)
+    if _find_removable_album(albums, range_start, range_length, total_tracks) is not album:
+        return None
+
+    albums.remove(album)
+    for other_album in albums:
+        if other_album.playlist_index > range_start:
+            other_album.playlist_index -= range_length
+
+    return range_start
+
+
+def _find_removable_album(
+    albums: List[SpotifyAlbum],
+    range_start: int,
+    range_length: int,
+    total_tracks: int
+) -> Optional[SpotifyAlbum]:
+    """Find the complete album whose tracks are exactly the given range, if taking
+    them out of the playlist wouldn't change how any other album is parsed
+    """
+    album = next((album for album in albums if album.playlist_index == range_start), None)
+    if album is None or not album.complete or len(album.track_ids) != range_length:
+        return None
+
+    # Taking the range out joins up the tracks on either side of it. If a run of an
+    # incomplete album ends right before the range, the track after the range could
+    # be its next track, unless the track after the range starts another album
+    range_end = range_start + range_length
+    run_ends_at_range = any(
+        not other_album.complete and len(other_album.track_ids) > 0 and
+        other_album.playlist_index + len(other_album.track_ids) == range_start
+        for other_album in albums
+    )
+    if run_ends_at_range and range_end != total_tracks and \
+            not any(other_album.playlist_index == range_end for other_album in albums):
+        return None
+
+    return album
+
+
+def _is_insertable(albums: List[SpotifyAlbum], insert_before: int, total_tracks: int) -> bool:
+    """Whether a complete album can be inserted before the given index without changing
+    how any other album is parsed
+    """
+    # The track being inserted before must be the first track found from an album,
+    # which can't be in the middle of a run of another album
+    return insert_before == total_tracks or \
+        any(album.playlist_index == insert_before for album in albums)
+
+
+class CollectionAlbumsParser():
+    """Album detection (see `get`) that takes in one playlist track at a time,
+    so that a parse can be checkpointed between pages and resumed later.
+    """
+
+    def __init__(self):
+        self.album_entries: Dict[str, SpotifyAlbum] = {}
+        self.track_index = 0
+
+        # Track index at which each album was first found to be incomplete
+        self.invalidated_at: Dict[str, int] = {}
+
+        # The album whose tracks are currently being walked through, and the
+        # disc and track numbers of the last of its tracks that was seen
+        self._album = None
+        self._last_disc_num = None
+        self._last_track_num = None
+
+    @property
+    def albums(self) -> List[SpotifyAlbum]:
+        return list(self.album_entries.values())
+
+    def feed(self, playlist_track):
+        """Act on the next track in the playlist"""
+        # Walk through subsequent tracks with the same album id, using disc and track
+        # numbers to confirm that the full album is present in the correct order
+        if self._album is not None and self._album.id == playlist_track.album.id and \
+                self._is_next_track(playlist_track):
+            self._add_track(playlist_track)
+        else:
+            self._album = None
 
-        # Act on the current playlist track in the iterator
-        while True:
             # This track isn't a track (ex: maybe it's a podcast episode)
             # Just skip over it
             if playlist_track.type != "track":
-                playlist_track, track_index = _iter_index(playlist_tracks_iter, track_index)
+                pass
             # The current playlist track's album has been seen before. This means that
             # the track is either a duplicate, or separated from the first track in
             # the album by tracks from other albums. In any case, it means that the
             # complete album isn't present in the playlist
-            elif playlist_track.album.id in album_entries:
-                album_entries[playlist_track.album.id].complete = False
-                playlist_track, track_index = _iter_index(playlist_tracks_iter, track_index)
+            elif playlist_track.album.id in self.album_entries:
+                self._invalidate(playlist_track.album.id)
             # The current playlist track's album hasn't been seen before.
-            # Make an entry for the album and iterate through the subsequent
-            # playlist tracks
+            # Make an entry for the album and start walking through its tracks
             else:
                 # Record the album of this first-encountered track
                 album = playlist_track.album
 
                 # Make an entry for this album
-                album_entries[album.id] = album
+                self.album_entries[album.id] = album
 
                 # Set the album's playlist index
-                album.playlist_index = track_index
-
-                # Walk through subsequent tracks with the same album id, using disc and track
-                # numbers to confirm that the full album is present in the correct order
-                last_disc_num = None
-                last_track_num = None
-                while album.id == playlist_track.album.id:
-                    # To start out, the disc number and track number should both be equal to 1
-                    if last_disc_num is None and last_track_num is None and \
-                            playlist_track.disc_number == 1 and \
-                            playlist_track.track_number == 1:
-                        pass
-                    # If this disc number is equal to last disc number then the track number
-                    # should have been incremented by one
-                    elif last_disc_num is not None and last_track_num is not None and \
-                            last_disc_num == playlist_track.disc_number and \
-                            playlist_track.track_number == (last_track_num + 1):
-                        pass
-                    # If this disc number is one greater than the last disc number, then the
-                    # track number should be equal to 1
-                    elif last_disc_num is not None and last_track_num is not None and \
-                            playlist_track.disc_number == (last_disc_num + 1) and \
-                            playlist_track.track_number == 1:
-                        pass
-                    # Otherwise the current track must be out of order
-                    else:
-                        break
-
-                    # Set last equal to current
-                    last_disc_num = playlist_track.disc_number
-                    last_track_num = playlist_track.track_number
-
-                    # Add this track id to the album
-                    album.track_ids.append(playlist_track.id)
-
-                    # If all tracks were seen, then mark the album as
-                    # complete, move to the next track and break out of the loop
-                    if len(album.track_ids) == album.total_tracks:
-                        album.complete = True
-                        playlist_track, track_index = _iter_index(playlist_tracks_iter, track_index)
-                        break
-                    # Otherwise the album isn't complete yet so stay in the loop
-                    # and iterate to the next track in the playlist
-                    else:
-                        playlist_track, track_index = _iter_index(playlist_tracks_iter, track_index)
-    # If a stop iteration is received, that means the playlist's tracks have been
-    # exhausted - pencils down.
-    except StopIteration:
-        pass
-
-    # Return albums from valid entries
-    return list(album_entries.values())
-
-
-'''PRIVATE FUNCTIONS'''
-
-
-def _iter_index(iter, index):
-    return next(iter), index + 1
+                album.playlist_index = self.track_index
+
+                self._album = album
+                self._last_disc_num = None
+                self._last_track_num = None
+
+                if self._is_next_track(playlist_track):
+                    self._add_track(playlist_track)
+                # The album doesn't start with its first track
+                else:
+                    self._album = None
+                    self._invalidate(album.id)
+
+        self.track_index += 1
+
+    def get_run(self) -> Optional[Tuple[int, int]]:
+        """Get the disc and track number of the last track seen from the album currently
+        being walked through, or None if not walking through an album.
+        """
+        if self._album is None:
+            return None
+        else:
+            return self._last_disc_num, self._last_track_num
+
+    '''PRIVATE FUNCTIONS'''
+
+    def _is_next_track(self, playlist_track) -> bool:
+        # To start out, the disc number and track number should both be equal to 1
+        if self._last_disc_num is None and self._last_track_num is None:
+            return playlist_track.disc_number == 1 and playlist_track.track_number == 1
+        # If this disc number is equal to last disc number then the track number
+        # should have been incremented by one
+        elif self._last_disc_num == playlist_track.disc_number:
+            return playlist_track.track_number == (self._last_track_num + 1)
+        # If this disc number is one greater than the last disc number, then the
+        # track number should be equal to 1
+        else:
+            return playlist_track.disc_number == (self._last_disc_num + 1) and playlist_track.track_number == 1
+
+    def _add_track(self, playlist_track):
+        # Set last equal to current
+        self._last_disc_num = playlist_track.disc_number
+        self._last_track_num = playlist_track.track_number
+
+        # Add this track id to the album
+        self._album.track_ids.append(playlist_track.id)
+
+        # If all tracks were seen, then mark the album as complete and stop walking through it
+        if len(self._album.track_ids) == self._album.total_tracks:
+            self._album.complete = True
+            self._album = None
+
+    def _invalidate(self, album_id):
+        self.album_entries[album_id].complete = False
+        self.invalidated_at.setdefault(album_id, self.track_index)
+
+
+class CollectionCheckpoints():
+    """Record of a parse of a playlist, one page at a time.
+
+    For every page of playlist items, this holds a hash of the page and the
+    parser's walk state after the page. Together with the albums that resulted
+    from the parse, this is enough to rebuild the parser as it was at any page
+    boundary. So when a playlist changes, only the pages from the first one that
+    changed onward have to be parsed again.
+    """
+
+    def __init__(self, snapshot_id: str, page_size: int):
+        self.snapshot_id = snapshot_id
+        self.page_size = page_size
+        self.page_hashes: List[str] = []
+        self.runs: List[Optional[Tuple[int, int]]] = []
+        self.invalidated_at: Dict[str, int] = {}
+
+    def add_page(self, page_hash: str, run: Optional[Tuple[int, int]]):
+        """Record a page and the parser's walk state (`CollectionAlbumsParser.get_run`) after it"""
+        self.page_hashes.append(page_hash)
+        self.runs.append(run)
+
+    def truncate(self, track_index: int):
+        """Forget the pages that aren't entirely before the given track index"""
+        num_pages = min(track_index // self.page_size, len(self.page_hashes))
+        del self.page_hashes[num_pages:]
+        del self.runs[num_pages:]
+        self.invalidated_at = {
+            album_id: index for album_id, index in self.invalidated_at.items()
+            if index < num_pages * self.page_size
+        }
+
+    def restore(self, albums: List[SpotifyAlbum], num_pages: int) -> CollectionAlbumsParser:
+        """Rebuild the parser as it was after the first `num_pages` pages, from the albums that
+        resulted from the full parse. The given albums are not modified.
+
+        This relies on every album's tracks being recorded from a single contiguous run of
+        the playlist that starts at the album's playlist index.
+        """
+        parser = CollectionAlbumsParser()
+        if num_pages == 0:
+            return parser
+
+        boundary = num_pages * self.page_size
+
+        for album in albums:
+            # Albums are in the order they were found in
+            if album.playlist_index >= boundary:
+                break
+
+            restored_album = copy.copy(album)
+            restored_album.track_ids = album.track_ids[:boundary - album.playlist_index]
+            restored_album.complete = \
+                len(restored_album.track_ids) > 0 and \
+                len(restored_album.track_ids) == album.total_tracks and \
+                self.invalidated_at.get(album.id, boundary) >= boundary
+
+            parser.album_entries[album.id] = restored_album
+
+        parser.track_index = boundary
+        parser.invalidated_at = {
+            album_id: track_index for album_id, track_index in self.invalidated_at.items()
+            if track_index < boundary
+        }
+
+        # Pick back up walking through the last album found if it was still going
+        run = self.runs[num_pages - 1]
+        if run is not None:
+            parser._album = list(parser.album_entries.values())[-1]
+            parser._last_disc_num, parser._last_track_num = run
+
+        return parser
@@ -0,0 +1,357 @@
+"""Cache of the albums parsed from collection playlists.
+
+The albums of a collection are cached along with the snapshot id of the
+playlist they were parsed from, and the checkpoints of the parse (see
+`collection_albums.CollectionCheckpoints`).
+
+Albums are cached and stored in the compact encoding of `collection_encoding`.
+They're also stored in the `CollectionLayout` table, so that they
+outlive the app cache. On a cache miss they're read from the table (and put
+back in the cache) before the playlist is parsed again. The table is read and
+written in a session of its own, so that caching albums never commits or rolls
+back anything else that the request has pending.
+
+Encoded albums that are too big for a single cache item are split across
+several items, listed by a small manifest that's cached in their place.
+
+In front of both, each worker keeps the albums it used most recently in
+memory, bounded by an estimate of the bytes they take up. Since albums are
+held by snapshot, they're never out of date.
+"""
+
+from collections import OrderedDict
+import copy
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+import zlib
+
+from flask import current_app
+from sqlalchemy import delete
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from albumcollections.models import CollectionLayout, insert
+from albumcollections import cache, db, metrics
+from albumcollections.spotify import collection_encoding
+from albumcollections.spotify.collection_albums import CollectionCheckpoints
+from albumcollections.spotify.item.spotify_music import SpotifyAlbum
+
+
+'''CONSTANTS'''
+
+
+# Max number of bytes of albums held in memory by one worker
+MAX_MEMORY_BYTES = 64 * 1024 * 1024
+
+# Estimated bytes taken up in memory by an album, not counting its track ids
+ALBUM_MEMORY_BYTES = 1200
+
+# Estimated bytes taken up in memory by one of an album's track ids
+TRACK_ID_MEMORY_BYTES = 90
+
+# Max number of bytes of encoded albums cached in one item. Memcached rejects items
+# of over 1MB, which includes the key and some overhead
+CACHE_CHUNK_BYTES = 900 * 1024
+
+
+'''METRICS'''
+
+
+LOOKUPS = metrics.Counter(
+    'albumcollections_collection_cache_lookups_total',
+    "Lookups of collection albums, by where they were looked for (memory, cache or database) and result",
+    ('layer', 'result')
+)
+
+SET_FAILURES = metrics.Counter(
+    'albumcollections_collection_cache_set_failures_total',
+    "Collection albums that couldn't be cached or stored, by where (cache or database)",
+    ('layer',)
+)
+
+
+'''IN-MEMORY CACHE'''
+
+
+_memory = OrderedDict()
+_memory_bytes = 0
+_memory_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+_memory_lock = threading.Lock()
+
+
+def clear_memory():
+    """Forget all albums held in memory by this worker, and reset its counters"""
+    global _memory_bytes
+
+    with _memory_lock:
+        _memory.clear()
+        _memory_bytes = 0
+        _memory_stats.update(hits=0, misses=0, evictions=0)
+
+
+def get_memory_stats() -> Dict[str, int]:
+    """Get this worker's counts of in-memory hits, misses and evictions, and the
+    number of collections and estimated bytes it holds
+    """
+    with _memory_lock:
+        return dict(_memory_stats, collections=len(_memory), bytes=_memory_bytes)
+
+
+'''PUBLIC FUNCTIONS'''
+
+
+def get_albums(playlist_id: str, snapshot_id: str) -> Optional[List[SpotifyAlbum]]:
+    """Get the albums cached for the given snapshot of the playlist, if there are any
+
+    The list is the caller's own, but the albums in it may be shared with other
+    callers and shouldn't be changed.
+    """
+    if snapshot_id is None:
+        return None
+
+    albums = _recall(playlist_id, snapshot_id)
+    if albums is not None:
+        return albums
+
+    if cache.get(_snapshot_key(playlist_id)) == snapshot_id:
+        albums = _decode_albums(playlist_id, _get_cached_data(playlist_id))
+    LOOKUPS.inc('cache', 'miss' if albums is None else 'hit')
+
+    if albums is None:
+        data = _get_stored_albums(playlist_id, snapshot_id)
+        albums = _decode_albums(playlist_id, data)
+        LOOKUPS.inc('database', 'miss' if albums is None else 'hit')
+        if albums is not None:
+            _cache_albums(playlist_id, snapshot_id, data)
+
+    if albums is not None:
+        _remember(playlist_id, snapshot_id, albums)
+
+    return albums
+
+
+def set_albums(playlist_id: str, snapshot_id: str, albums: List[SpotifyAlbum]):
+    """Cache the albums parsed from the given snapshot of the playlist"""
+    _remember(playlist_id, snapshot_id, albums)
+
+    data = collection_encoding.encode(albums)
+    _cache_albums(playlist_id, snapshot_id, data)
+    _store_albums(playlist_id, snapshot_id, data)
+
+
+def set_checkpoints(playlist_id: str, checkpoints: CollectionCheckpoints):
+    """Cache the checkpoints of the parse that produced the playlist's cached albums"""
+    cache.set(_checkpoints_key(playlist_id), checkpoints)
+
+
+def get_previous(
+    playlist_id: str,
+    snapshot_id: str
+) -> Tuple[Optional[List[SpotifyAlbum]], Optional[CollectionCheckpoints]]:
+    """Get the albums and parse checkpoints cached for a different snapshot of the
+    playlist, or (None, None) if there aren't any.
+
+    Albums cached for an old snapshot are left in place until they're overwritten,
+    so that they can be used to resume parsing the playlist.
+    """
+    checkpoints = cache.get(_checkpoints_key(playlist_id))
+
+    if checkpoints is not None and checkpoints.snapshot_id != snapshot_id and \
+            checkpoints.snapshot_id == cache.get(_snapshot_key(playlist_id)):
+        albums = _decode_albums(playlist_id, _get_cached_data(playlist_id))
+        if albums is not None:
+            return albums, checkpoints
+
+    return None, None
+
+
+def update(
+    playlist_id: str,
+    snapshot_id: str,
+    new_snapshot_id: str,
+    edit: Callable[[List[SpotifyAlbum]], Optional[int]]
+) -> bool:
+    """Apply an edit that was made to the playlist to its cached albums, so that
+    the playlist doesn't have to be parsed again.
+
+    `edit` is given the albums cached for `snapshot_id` (the snapshot the edit
+    was made to). It should edit them and return the playlist index of the first
+    track that changed, or return None if it can't. The edited albums are cached
+    for `new_snapshot_id`, along with the checkpoints that the edit left valid.
+
+    Returns whether the cached albums were updated.
+    """
+    albums = get_albums(playlist_id, snapshot_id)
+    if albums is None:
+        return False
+
+    # Edit copies, since the albums may be held in memory for the old snapshot
+    albums = [copy.copy(album) for album in albums]
+
+    first_changed_index = edit(albums)
+    if first_changed_index is None:
+        return False
+
+    set_albums(playlist_id, new_snapshot_id, albums)
+
+    checkpoints = cache.get(_checkpoints_key(playlist_id))
+    if checkpoints is not None and checkpoints.snapshot_id == snapshot_id:
+        checkpoints.truncate(first_changed_index)
+        checkpoints.snapshot_id = new_snapshot_id
+        set_checkpoints(playlist_id, checkpoints)
+
+    return True
+
+
+'''PRIVATE FUNCTIONS'''
+
+
+def _recall(playlist_id: str, snapshot_id: str) -> Optional[List[SpotifyAlbum]]:
+    """Get the albums held in memory for the snapshot of the playlist"""
+    with _memory_lock:
+        albums = _memory.get((playlist_id, snapshot_id))
+        if albums is None:
+            _memory_stats['misses'] += 1
+        else:
+            _memory.move_to_end((playlist_id, snapshot_id))
+            _memory_stats['hits'] += 1
+
+    if albums is None:
+        LOOKUPS.inc('memory', 'miss')
+        return None
+
+    LOOKUPS.inc('memory', 'hit')
+
+    return albums.copy()
+
+
+def _remember(playlist_id: str, snapshot_id: str, albums: List[SpotifyAlbum]):
+    """Hold albums in memory, evicting the least recently used ones if needed"""
+    global _memory_bytes
+
+    key = (playlist_id, snapshot_id)
+    albums = albums.copy()
+
+    with _memory_lock:
+        if key in _memory:
+            _memory_bytes -= _estimate_bytes(_memory[key])
+        _memory[key] = albums
+        _memory.move_to_end(key)
+        _memory_bytes += _estimate_bytes(albums)
+
+        while _memory_bytes > MAX_MEMORY_BYTES and _memory:
+            _, evicted_albums = _memory.popitem(last=False)
+            _memory_bytes -= _estimate_bytes(evicted_albums)
+            _memory_stats['evictions'] += 1
+
+
+def _estimate_bytes(albums: List[SpotifyAlbum]) -> int:
+    return ALBUM_MEMORY_BYTES * len(albums) + TRACK_ID_MEMORY_BYTES * collection_encoding.count_track_ids(albums)
+
+
+def _cache_albums(playlist_id: str, snapshot_id: str, data: bytes):
+    if len(data) <= CACHE_CHUNK_BYTES:
+        cached = cache.set(_albums_key(playlist_id), data)
+    else:
+        # Chunk keys are named after the data's checksum, so that chunks of different
+        # versions of the albums can't be mixed up
+        checksum = zlib.crc32(data)
+        chunks = {
+            _chunk_key(playlist_id, checksum, chunk_num): data[chunk_start:chunk_start + CACHE_CHUNK_BYTES]
+            for chunk_num, chunk_start in enumerate(range(0, len(data), CACHE_CHUNK_BYTES))
+        }
+        current_app.logger.info(
+            f"Albums of collection {playlist_id} are {len(data)} bytes, caching them in {len(chunks)} chunks"
+        )
+
+        chunks_cached = len(cache.set_many(chunks)) == len(chunks)
+        manifest = {'checksum': checksum, 'num_chunks': len(chunks)}
+        cached = cache.set(_albums_key(playlist_id), manifest) and chunks_cached
+
+    if not cached:
+        SET_FAILURES.inc('cache')
+
+    cache.set(_snapshot_key(playlist_id), snapshot_id)
+
+
+def _get_cached_data(playlist_id: str) -> Optional[bytes]:
+    """Get the playlist's cached encoded albums, putting them back together if they
+    were cached in chunks. Returns None if any of the chunks are missing.
+    """
+    value = cache.get(_albums_key(playlist_id))
+
+    if isinstance(value, dict):
+        chunks = cache.get_many(*(
+            _chunk_key(playlist_id, value['checksum'], chunk_num) for chunk_num in range(value['num_chunks'])
+        ))
+        if any(chunk is None for chunk in chunks):
+            return None
+
+        data = b''.join(chunks)
+        return data if zlib.crc32(data) == value['checksum'] else None
+
+    return value
+
+
+def _get_stored_albums(playlist_id: str, snapshot_id: str) -> Optional[bytes]:
+    """Get the encoded albums stored in the table for the given snapshot of the playlist"""
+    try:
+        with Session(db.engine) as session:
+            layout = session.get(CollectionLayout, (playlist_id, snapshot_id))
+            if layout is not None:
+                return layout.albums
+    except SQLAlchemyError as e:
+        current_app.logger.warning(f"Failed to get stored albums of collection {playlist_id}: {e}")
+
+    return None
+
+
+def _store_albums(playlist_id: str, snapshot_id: str, data: bytes):
+    """Store the encoded albums in the table, replacing those stored for other snapshots
+    of the playlist
+    """
+    try:
+        with Session(db.engine) as session, session.begin():
+            session.execute(delete(CollectionLayout).where(
+                CollectionLayout.playlist_id == playlist_id,
+                CollectionLayout.snapshot_id != snapshot_id
+            ))
+            session.execute(
+                insert(CollectionLayout)
+                .values(playlist_id=playlist_id, snapshot_id=snapshot_id, albums=data)
+                .on_conflict_do_update(index_elements=['playlist_id', 'snapshot_id'], set_={'albums': data})
+            )
+    except SQLAlchemyError as e:
+        # Most likely another worker stored the same playlist at the same time
+        SET_FAILURES.inc('database')
+        current_app.logger.warning(f"Failed to store albums of collection {playlist_id}: {e}")
+
+
+def _decode_albums(playlist_id: str, data: Optional[bytes]) -> Optional[List[SpotifyAlbum]]:
+    """Decode cached or stored albums, or return None if they can't be decoded"""
+    if data is None:
+        return None
+
+    try:
+        return collection_encoding.decode(data)
+    except Exception as e:
+        # Most likely the albums were encoded by an older version of the app. They'll
+        # be parsed from the playlist again.
+        current_app.logger.warning(f"Failed to decode cached albums of collection {playlist_id}: {e}")
+        return None
+
+
+def _albums_key(playlist_id: str) -> str:
+    return f"collection_albums_{playlist_id}"
+
+
+def _chunk_key(playlist_id: str, checksum: int, chunk_num: int) -> str:
+    return f"collection_albums_{playlist_id}_{checksum}_{chunk_num}"
+
+
+def _snapshot_key(playlist_id: str) -> str:
+    return f"collection_{playlist_id}_snapshot"
+
+
+def _checkpoints_key(playlist_id: str) -> str:
+    return f"collection_{playlist_id}_checkpoints"
@@ -0,0 +1,390 @@
+"""Compact encoding of the albums parsed from a collection playlist, for caching.
+
+Instead of pickling every album object, the albums are stored as parallel
+columns of numbers (one entry per album), with their strings (ids, names,
+image urls, ...) kept once in a shared string table and referred to by index.
+Artists credited on several albums are stored once, track ids are stored
+together in one block, and links and uris are left out whenever they're the
+usual ones for the item's id. The result is compressed with zlib.
+
+Decoding only unpacks the columns. Album objects are built from them the first
+time they're accessed, so a request that only touches a few albums doesn't pay
+for building all of them.
+"""
+
+from array import array
+from collections.abc import MutableSequence
+from itertools import accumulate
+import struct
+import sys
+from typing import Dict, List, Optional
+import zlib
+
+from albumcollections.spotify.item.spotify_artist import SpotifyArtist
+from albumcollections.spotify.item.spotify_music import AlbumType, SpotifyAlbum
+
+'''CONSTANTS'''
+
+
+# Version of the encoding, bumped whenever it changes so that albums encoded by
+# an older version of the app are treated as missing instead of misread
+ENCODING_VERSION = 1
+
+# Version, then the number of albums, artists, album artist references, strings
+# and track ids, and the byte lengths of the string table and track id block
+HEADER = struct.Struct('<BIIIIIII')
+
+# Column type of string table indices and numbers (4 byte signed ints)
+INT_TYPECODE = 'i'
+
+# Index standing in for a missing string or number
+NONE_INDEX = -1
+
+_ALBUM_TYPES = {album_type.value: album_type for album_type in AlbumType}
+
+# Index standing in for a link or uri that is the usual one for the item's id
+DERIVED_INDEX = -2
+
+# Separates strings in the string table and the track id block
+SEPARATOR = '\0'
+
+# zlib compression level. Higher levels take several times longer without making
+# encoded albums noticeably smaller
+COMPRESSION_LEVEL = 1
+
+
+'''PUBLIC FUNCTIONS'''
+
+
+def encode(albums: List[SpotifyAlbum]) -> bytes:
+    """Encode the albums into compressed bytes"""
+    strings = _StringTable()
+
+    ids, names, links, uris, img_urls, release_dates = (array(INT_TYPECODE) for _ in range(6))
+    total_tracks, playlist_indices, artist_counts, track_counts = (array(INT_TYPECODE) for _ in range(4))
+    album_types = bytearray()
+    complete_bits = bytearray((len(albums) + 7) // 8)
+
+    artist_indices: Dict[tuple, int] = {}
+    artist_ids, artist_names, artist_links, artist_uris = (array(INT_TYPECODE) for _ in range(4))
+    album_artists = array(INT_TYPECODE)
+
+    track_ids = []
+
+    for album_num, album in enumerate(albums):
+        ids.append(strings.index(album.id))
+        names.append(strings.index(album.name))
+        links.append(strings.link_index(album.link, 'album', album.id))
+        uris.append(strings.uri_index(album.uri, 'album', album.id))
+        img_urls.append(strings.index(album.img_url))
+        release_dates.append(strings.index(album.release_date))
+
+        total_tracks.append(album.total_tracks)
+        playlist_indices.append(NONE_INDEX if album.playlist_index is None else album.playlist_index)
+        artist_counts.append(len(album.artists))
+        track_counts.append(len(album.track_ids))
+        album_types.append(album.album_type.value)
+        if album.complete:
+            complete_bits[album_num // 8] |= 1 << (album_num % 8)
+
+        for artist in album.artists:
+            artist_key = (artist.id, artist.name, artist.link, artist.uri)
+            artist_index = artist_indices.get(artist_key)
+            if artist_index is None:
+                artist_index = artist_indices[artist_key] = len(artist_indices)
+                artist_ids.append(strings.index(artist.id))
+                artist_names.append(strings.index(artist.name))
+                artist_links.append(strings.link_index(artist.link, 'artist', artist.id))
+                artist_uris.append(strings.uri_index(artist.uri, 'artist', artist.id))
+            album_artists.append(artist_index)
+
+        track_ids.extend(album.track_ids)
+
+    string_bytes = strings.pack()
+    track_id_bytes = _pack_strings(['' if track_id is None else track_id for track_id in track_ids])
+
+    parts = [
+        HEADER.pack(
+            ENCODING_VERSION, len(albums), len(artist_indices), len(album_artists), len(strings), len(track_ids),
+            len(string_bytes), len(track_id_bytes)
+        ),
+        string_bytes,
+        track_id_bytes,
+        *map(_column_bytes, (
+            ids, names, links, uris, img_urls, release_dates,
+            total_tracks, playlist_indices, artist_counts, track_counts
+        )),
+        bytes(album_types),
+        bytes(complete_bits),
+        *map(_column_bytes, (artist_ids, artist_names, artist_links, artist_uris, album_artists)),
+    ]
+
+    return zlib.compress(b''.join(parts), COMPRESSION_LEVEL)
+
+
+def decode(data: bytes) -> 'LazyAlbums':
+    """Decode albums encoded by `encode`. Raises an exception if the data wasn't
+    encoded by the current version of the encoding.
+    """
+    return LazyAlbums(_Columns(zlib.decompress(data)))
+
+
+def count_track_ids(albums: List[SpotifyAlbum]) -> int:
+    """Count the track ids of the albums, without building any that are still encoded"""
+    if isinstance(albums, LazyAlbums):
+        return albums.count_track_ids()
+    else:
+        return sum(len(album.track_ids) for album in albums)
+
+
+class LazyAlbums(MutableSequence):
+    """List of decoded albums, whose album objects are only built once they're
+    accessed.
+
+    Albums built from the same encoded data are shared by every copy of the
+    list, so they shouldn't be changed (see `collection_cache.get_albums`).
+    Changing the list itself builds all of its albums first.
+    """
+
+    def __init__(self, columns: '_Columns', albums: Optional[List[SpotifyAlbum]] = None):
+        self._columns = columns
+        # The built albums in order, once the list has been changed
+        self._albums = albums
+
+    def __len__(self):
+        return len(self._albums) if self._albums is not None else self._columns.num_albums
+
+    def __getitem__(self, index):
+        if self._albums is not None:
+            return self._albums[index]
+        elif isinstance(index, slice):
+            return [self._columns.album(album_num) for album_num in range(*index.indices(len(self)))]
+        else:
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("album index out of range")
+            return self._columns.album(index)
+
+    def __iter__(self):
+        if self._albums is not None:
+            return iter(self._albums)
+        else:
+            return map(self._columns.album, range(self._columns.num_albums))
+
+    def __setitem__(self, index, album):
+        self._build_all()[index] = album
+
+    def __delitem__(self, index):
+        del self._build_all()[index]
+
+    def insert(self, index, album):
+        self._build_all().insert(index, album)
+
+    def copy(self) -> 'LazyAlbums':
+        return LazyAlbums(self._columns, None if self._albums is None else list(self._albums))
+
+    def count_track_ids(self) -> int:
+        if self._albums is not None:
+            return sum(len(album.track_ids) for album in self._albums)
+        else:
+            return len(self._columns.track_ids)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return f"LazyAlbums({len(self)} albums)"
+
+    def __reduce__(self):
+        # Pickle as a plain list of albums
+        return (list, (list(self),))
+
+    def _build_all(self) -> List[SpotifyAlbum]:
+        if self._albums is None:
+            self._albums = list(self)
+
+        return self._albums
+
+
+'''PRIVATE CLASSES'''
+
+
+class _StringTable():
+    """Strings being encoded, each kept once"""
+
+    def __init__(self):
+        self._indices: Dict[str, int] = {}
+
+    def index(self, string: Optional[str]) -> int:
+        if string is None:
+            return NONE_INDEX
+
+        index = self._indices.get(string)
+        if index is None:
+            index = self._indices[string] = len(self._indices)
+
+        return index
+
+    def link_index(self, link: Optional[str], item_type: str, item_id: Optional[str]) -> int:
+        if item_id is not None and link == _link(item_type, item_id):
+            return DERIVED_INDEX
+
+        return self.index(link)
+
+    def uri_index(self, uri: Optional[str], item_type: str, item_id: Optional[str]) -> int:
+        if item_id is not None and uri == _uri(item_type, item_id):
+            return DERIVED_INDEX
+
+        return self.index(uri)
+
+    def __len__(self):
+        return len(self._indices)
+
+    def pack(self) -> bytes:
+        return _pack_strings(list(self._indices))
+
+
+class _Columns():
+    """The unpacked columns of encoded albums, building album objects from them
+    as they're asked for
+    """
+
+    def __init__(self, data: bytes):
+        (
+            version, num_albums, num_artists, num_album_artists, num_strings, num_track_ids,
+            string_bytes_length, track_id_bytes_length
+        ) = HEADER.unpack_from(data)
+        if version != ENCODING_VERSION:
+            raise Exception(f"Unsupported collection encoding version {version}")
+
+        self.num_albums = num_albums
+        self._data = data
+        self._offset = HEADER.size
+
+        # With None on the end, so that a missing string's index (-1) refers to it
+        self.strings = _unpack_strings(self._read_bytes(string_bytes_length), num_strings) + [None]
+        self.track_ids = [
+            track_id or None for track_id in _unpack_strings(self._read_bytes(track_id_bytes_length), num_track_ids)
+        ]
+
+        (
+            self.ids, self.names, self.links, self.uris, self.img_urls, self.release_dates,
+            self.total_tracks, self.playlist_indices, self.artist_counts, self.track_counts
+        ) = (self._read_column(num_albums) for _ in range(10))
+        self.album_types = self._read_bytes(num_albums)
+        self.complete_bits = self._read_bytes((num_albums + 7) // 8)
+
+        self.artist_ids, self.artist_names, self.artist_links, self.artist_uris = \
+            (self._read_column(num_artists) for _ in range(4))
+        self.album_artists = self._read_column(num_album_artists)
+
+        if self._offset != len(data):
+            raise Exception("Collection encoding has unexpected length")
+
+        # Where each album's artists and track ids start
+        self.artist_starts = array(INT_TYPECODE, accumulate(self.artist_counts, initial=0))
+        self.track_starts = array(INT_TYPECODE, accumulate(self.track_counts, initial=0))
+        if self.track_starts[-1] != len(self.track_ids):
+            raise Exception("Collection encoding has unexpected number of track ids")
+
+        self._albums: Dict[int, SpotifyAlbum] = {}
+        self._artists: Dict[int, SpotifyArtist] = {}
+
+    def album(self, album_num: int) -> SpotifyAlbum:
+        album = self._albums.get(album_num)
+        if album is not None:
+            return album
+
+        strings = self.strings
+
+        album = SpotifyAlbum.__new__(SpotifyAlbum)
+        album.id = album_id = strings[self.ids[album_num]]
+        album.name = strings[self.names[album_num]]
+        album.link = self._derivable_string(self.links[album_num], _link, 'album', album_id)
+        album.uri = self._derivable_string(self.uris[album_num], _uri, 'album', album_id)
+        album.img_url = strings[self.img_urls[album_num]]
+        album.release_date = strings[self.release_dates[album_num]]
+        album.album_type = _ALBUM_TYPES[self.album_types[album_num]]
+        album.total_tracks = self.total_tracks[album_num]
+        playlist_index = self.playlist_indices[album_num]
+        album.playlist_index = None if playlist_index == NONE_INDEX else playlist_index
+        album.complete = bool(self.complete_bits[album_num // 8] & (1 << (album_num % 8)))
+        album.artists = [
+            self._artist(artist_index)
+            for artist_index in self.album_artists[self.artist_starts[album_num]:self.artist_starts[album_num + 1]]
+        ]
+        album.track_ids = self.track_ids[self.track_starts[album_num]:self.track_starts[album_num + 1]]
+
+        # `setdefault` so that albums built at the same time by different requests end up the same object
+        return self._albums.setdefault(album_num, album)
+
+    def _artist(self, artist_index: int) -> SpotifyArtist:
+        artist = self._artists.get(artist_index)
+        if artist is None:
+            artist = SpotifyArtist.__new__(SpotifyArtist)
+            artist.id = artist_id = self.strings[self.artist_ids[artist_index]]
+            artist.name = self.strings[self.artist_names[artist_index]]
+            artist.link = self._derivable_string(self.artist_links[artist_index], _link, 'artist', artist_id)
+            artist.uri = self._derivable_string(self.artist_uris[artist_index], _uri, 'artist', artist_id)
+            artist.img_url = None
+            artist = self._artists.setdefault(artist_index, artist)
+
+        return artist
+
+    def _derivable_string(self, index: int, derive, item_type: str, item_id: str) -> Optional[str]:
+        return derive(item_type, item_id) if index == DERIVED_INDEX else self.strings[index]
+
+    def _read_column(self, length: int) -> array:
+        column = array(INT_TYPECODE)
+        column.frombytes(self._read_bytes(length * column.itemsize))
+        if sys.byteorder == 'big':
+            column.byteswap()
+
+        return column
+
+    def _read_bytes(self, length: int) -> bytes:
+        data = self._data[self._offset:self._offset + length]
+        if len(data) != length:
+            raise Exception("Collection encoding is truncated")
+        self._offset += length
+
+        return data
+
+
+'''PRIVATE FUNCTIONS'''
+
+
+def _link(item_type: str, item_id: str) -> str:
+    return f"https://open.spotify.com/{item_type}/{item_id}"
+
+
+def _uri(item_type: str, item_id: str) -> str:
+    return f"spotify:{item_type}:{item_id}"
+
+
+def _pack_strings(strings: List[str]) -> bytes:
+    packed = SEPARATOR.join(strings)
+
+    # Spotify strings never contain the separator, but make sure that one can't shift the table
+    if packed.count(SEPARATOR) != max(len(strings) - 1, 0):
+        packed = SEPARATOR.join(string.replace(SEPARATOR, '') for string in strings)
+
+    return packed.encode()
+
+
+def _unpack_strings(data: bytes, num_strings: int) -> List[str]:
+    strings = data.decode().split(SEPARATOR) if num_strings else []
+    if len(strings) != num_strings:
+        raise Exception("Collection encoding has unexpected number of strings")
+
+    return strings
+
+
+def _column_bytes(column: array) -> bytes:
+    """Get the bytes of a column, little endian"""
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+
+    return column.tobytes()
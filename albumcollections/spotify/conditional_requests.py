@@ -0,0 +1,127 @@
+"""Conditional requests for spotify api objects that rarely change between reads.
+
+Spotify sends an ETag with each playlist object. The last body and ETag of each
+playlist url (with its query) are kept in the app cache, and the next request
+for the url sends the ETag in `If-None-Match`. When the playlist hasn't changed,
+spotify answers 304 Not Modified without a body, and the stored body is passed
+on to spotipy as if spotify had sent it again.
+
+A 304 is only sent to a token that may read the playlist, so stored bodies are
+shared by every user.
+"""
+
+import hashlib
+import re
+from typing import Callable, NamedTuple, Optional
+from urllib.parse import urlencode, urlsplit
+
+from flask import current_app
+import requests
+
+from albumcollections import cache, metrics
+
+'''CONSTANTS'''
+
+
+# Paths of the objects that are revalidated (a playlist, but not its pages of items)
+CONDITIONAL_PATH_PATTERN = re.compile(r'.*/playlists/[^/]+/?')
+
+# Seconds that a stored body is kept for since it was last sent by spotify
+STORED_RESPONSE_TIMEOUT = 24 * 60 * 60
+
+STORED_RESPONSE_KEY_PREFIX = 'spotify_etag_'
+
+DEFAULT_CONTENT_TYPE = 'application/json; charset=utf-8'
+
+
+class StoredResponse(NamedTuple):
+    etag: str
+    content: bytes
+    content_type: str
+
+
+'''METRICS'''
+
+
+CONDITIONAL_REQUESTS = metrics.Counter(
+    'albumcollections_spotify_conditional_requests_total',
+    "Conditional requests to the spotify api, by result (not_modified when the stored body was reused)",
+    ('result',)
+)
+
+
+'''PUBLIC FUNCTIONS'''
+
+
+def request(send: Callable[..., requests.Response], method: str, url: str, **kwargs) -> requests.Response:
+    """Make a request with `send`, revalidating the stored body of the url if it's one
+    that's revalidated, and storing the new body that spotify sends
+    """
+    if method.upper() != 'GET' or not CONDITIONAL_PATH_PATTERN.fullmatch(urlsplit(url).path):
+        return send(method, url, **kwargs)
+
+    key = _key(url, kwargs.get('params'))
+    stored = _cache_call(cache.get, key)
+    if not isinstance(stored, StoredResponse):
+        stored = None
+
+    if stored is not None:
+        kwargs['headers'] = dict(kwargs.get('headers') or {}, **{'If-None-Match': stored.etag})
+
+    response = send(method, url, **kwargs)
+
+    if response.status_code == 304 and stored is not None:
+        CONDITIONAL_REQUESTS.inc('not_modified')
+        _reuse(response, stored)
+        # Keep it for as long again, since spotify has just confirmed it
+        _cache_call(cache.set, key, stored, timeout=STORED_RESPONSE_TIMEOUT)
+    elif response.status_code == 200:
+        if stored is not None:
+            CONDITIONAL_REQUESTS.inc('modified')
+
+        etag = response.headers.get('ETag')
+        if etag:
+            content_type = response.headers.get('Content-Type', DEFAULT_CONTENT_TYPE)
+            _cache_call(cache.set, key, StoredResponse(etag, response.content, content_type),
+                        timeout=STORED_RESPONSE_TIMEOUT)
+
+    return response
+
+
+'''PRIVATE FUNCTIONS'''
+
+
+def _key(url: str, params: Optional[dict]) -> str:
+    """Get the cache key of a url and its query params. Urls with long field lists are
+    longer than memcached allows keys to be, so the key is a hash of the url
+    """
+    if params:
+        # Requests leaves out params that are None
+        query = urlencode(sorted((name, value) for name, value in params.items() if value is not None))
+        url = f"{url}?{query}"
+
+    return STORED_RESPONSE_KEY_PREFIX + hashlib.sha256(url.encode()).hexdigest()
+
+
+def _reuse(response: requests.Response, stored: StoredResponse):
+    """Turn a 304 response into the 200 response whose body was stored"""
+    response.status_code = 200
+    response.reason = 'OK'
+    response._content = stored.content
+    response.headers['Content-Type'] = stored.content_type
+    response.headers['Content-Length'] = str(len(stored.content))
+
+
+def _cache_call(func, *args, **kwargs):
+    """Call a cache function, treating errors as a miss so that a cache outage
+    only costs full responses
+    """
+    try:
+        return func(*args, **kwargs)
+    except Exception as e:
+        try:
+            current_app.logger.warning(f"Spotify conditional request cache error: {e}")
+        except RuntimeError:
+            # Outside of an app context
+            pass
+        return None
@@ -4,6 +4,8 @@ from .spotify_item import SpotifyItem
 class SpotifyArtist(SpotifyItem):
     """Class to hold selected information about a spotify artist"""
 
+    __slots__ = ()
+
     def __init__(self, spotify_artist):
         # Initialize base class
         super().__init__(spotify_artist)
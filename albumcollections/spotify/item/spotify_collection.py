@@ -1,5 +1,6 @@
-from typing import List
-from albumcollections import cache
+from typing import List, Optional, Tuple
+from albumcollections.spotify import collection_cache
+from albumcollections.spotify.collection_albums import CollectionCheckpoints
 from albumcollections.spotify.item.spotify_music import SpotifyAlbum
 
 from .spotify_item import SpotifyItem
@@ -13,6 +14,8 @@ class SpotifyCollection(SpotifyItem):
     TODO: Make this class inherit from SpotifyPlaylist...pretty sure it exclusively adds to it
     """
 
+    __slots__ = ('__albums', 'owner_id', 'total_tracks', 'snapshot_id')
+
     IMG_DIMEN = 300
 
     def __init__(self, spotify_playlist):
@@ -43,23 +46,21 @@ class SpotifyCollection(SpotifyItem):
         """
         # Try to load albums from cache if albums haven't been set
         if self.__albums is None:
-            cached_snapshot_id = cache.get(f"collection_{self.id}_snapshot")
-
-            # Remove stale cache info if snapshot id for the collection has changed
-            if cached_snapshot_id is not None and self.snapshot_id is not None and \
-                    cached_snapshot_id != self.snapshot_id:
-                cache.delete(f"collection_{self.id}_snapshot")
-                cache.delete(f"collection_albums_{self.id}")
-                self.__albums = None
-            # Load the albums from the cache if the snapshot for the collection has not changed
-            elif cached_snapshot_id is not None and self.snapshot_id is not None and \
-                    cached_snapshot_id == self.snapshot_id:
-                self.__albums = cache.get(f"collection_albums_{self.id}")
+            self.__albums = collection_cache.get_albums(self.id, self.snapshot_id)
 
         return self.__albums
 
     @albums.setter
     def albums(self, albums: List[SpotifyAlbum]):
         self.__albums = albums
-        cache.set(f"collection_albums_{self.id}", albums)
-        cache.set(f"collection_{self.id}_snapshot", self.snapshot_id)
+        collection_cache.set_albums(self.id, self.snapshot_id, albums)
+
+    def set_checkpoints(self, checkpoints: CollectionCheckpoints):
+        """Cache the checkpoints of the parse that produced the albums"""
+        collection_cache.set_checkpoints(self.id, checkpoints)
+
+    def get_previous_layout(self) -> Tuple[Optional[List[SpotifyAlbum]], Optional[CollectionCheckpoints]]:
+        """Get the albums and parse checkpoints cached for a different snapshot of the
+        collection, or (None, None) if there aren't any.
+        """
+        return collection_cache.get_previous(self.id, self.snapshot_id)
@@ -1,8 +1,16 @@
+from functools import lru_cache
+
+
 class SpotifyItem():
     """Base class for a Spotify object. Holds selected information
     about a spotify item retrieved through api call.
+
+    Items use `__slots__` since large collections create a lot of them. They
+    pickle as a plain tuple of slot values to keep cached values small.
     """
 
+    __slots__ = ('name', 'link', 'id', 'uri', 'img_url')
+
     def __init__(self, spotify_item):
         # Name of the spotify music object
         self.name = spotify_item["name"]
@@ -30,8 +38,38 @@ class SpotifyItem():
     def __hash__(self):
         return hash(self.id)
 
+    def __getstate__(self):
+        return tuple(getattr(self, slot, None) for slot in _slot_names(type(self)))
+
+    def __setstate__(self, state):
+        # Items pickled before they had `__slots__` carry a dictionary of attributes
+        if isinstance(state, dict):
+            attributes = state.items()
+        else:
+            attributes = zip(_slot_names(type(self)), state)
+
+        for name, value in attributes:
+            setattr(self, name, value)
+
     def _set_image_url(self, images):
         for img in images:
             if img["height"] == self.IMG_DIMEN and img["width"] == self.IMG_DIMEN:
                 self.img_url = img["url"]
                 break
+
+
+"""HELPER FUNCTIONS"""
+
+
+@lru_cache(maxsize=None)
+def _slot_names(item_class):
+    """Get the attribute names of all slots of an item class, base classes first"""
+    names = []
+    for cls in reversed(item_class.__mro__):
+        for slot in cls.__dict__.get('__slots__', ()):
+            # Private slot names are mangled like any other private attribute
+            if slot.startswith('__') and not slot.endswith('__'):
+                slot = f"_{cls.__name__.lstrip('_')}{slot}"
+            names.append(slot)
+
+    return tuple(names)
@@ -0,0 +1,42 @@
+from typing import Dict
+
+from .spotify_artist import SpotifyArtist
+from .spotify_music import SpotifyAlbum
+
+
+class SpotifyItemInterner():
+    """Hands out one shared item object per spotify id.
+
+    Every track of an album carries a full copy of the album, so without this a
+    12 track album is built 12 times while loading a playlist, with 11 of the
+    copies thrown away again. An interner should only live as long as one load
+    of a collection, since `collection_albums.get` fills in per-collection
+    state on the albums.
+
+    Items without an id (ex: local files) are never shared.
+    """
+
+    def __init__(self):
+        self._albums: Dict[str, SpotifyAlbum] = {}
+        self._artists: Dict[str, SpotifyArtist] = {}
+
+    def album(self, spotify_album) -> SpotifyAlbum:
+        """Get the shared album for the given spotify album dictionary"""
+        album = self._albums.get(spotify_album["id"])
+        if album is None:
+            album = SpotifyAlbum(spotify_album, self)
+            if album.id is not None:
+                # `setdefault` so that concurrent page loads end up with the same object
+                album = self._albums.setdefault(album.id, album)
+
+        return album
+
+    def artist(self, spotify_artist) -> SpotifyArtist:
+        """Get the shared artist for the given spotify artist dictionary"""
+        artist = self._artists.get(spotify_artist["id"])
+        if artist is None:
+            artist = SpotifyArtist(spotify_artist)
+            if artist.id is not None:
+                artist = self._artists.setdefault(artist.id, artist)
+
+        return artist
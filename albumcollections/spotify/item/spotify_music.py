@@ -13,16 +13,24 @@ class AlbumType(enum.Enum):
 
 class SpotifyMusic(SpotifyItem):
     """Base class for a spotify music (album or track).
+
+    If an `interner` is given, then credited artists are shared with every other
+    item created through it (see `SpotifyItemInterner`).
     """
 
-    def __init__(self, spotify_music):
+    __slots__ = ('artists', 'release_date')
+
+    def __init__(self, spotify_music, interner=None):
         # Initialize base class
         super().__init__(spotify_music)
 
         # List of artists credited
-        self.artists = [
-            SpotifyArtist(spotify_artist) for spotify_artist in spotify_music["artists"]
-        ]
+        if interner is not None:
+            self.artists = [interner.artist(spotify_artist) for spotify_artist in spotify_music["artists"]]
+        else:
+            self.artists = [
+                SpotifyArtist(spotify_artist) for spotify_artist in spotify_music["artists"]
+            ]
 
         self.release_date = None
 
@@ -49,11 +57,13 @@ class SpotifyMusic(SpotifyItem):
 class SpotifyAlbum(SpotifyMusic):
     """Class to hold selected information about a spotify album."""
 
+    __slots__ = ('album_type', 'total_tracks', 'track_ids', 'complete', 'playlist_index')
+
     IMG_DIMEN = 640
 
-    def __init__(self, spotify_album):
+    def __init__(self, spotify_album, interner=None):
         # Initialize base class
-        super().__init__(spotify_album)
+        super().__init__(spotify_album, interner)
 
         # Get image url with given IMG_DIMEN
         self._set_image_url(spotify_album["images"])
@@ -84,16 +94,25 @@ class SpotifyAlbum(SpotifyMusic):
 
 
 class SpotifyTrack(SpotifyMusic):
-    """Class to hold selected information about a spotify track."""
+    """Class to hold selected information about a spotify track.
+
+    If an `interner` is given, then tracks from the same album share one
+    `SpotifyAlbum` object.
+    """
+
+    __slots__ = ('album', 'disc_number', 'track_number', 'type')
 
     IMG_DIMEN = 64
 
-    def __init__(self, spotify_track):
+    def __init__(self, spotify_track, interner=None):
         # Initialize base class
-        super().__init__(spotify_track)
+        super().__init__(spotify_track, interner)
 
         # Set the album item for this track
-        self.album = SpotifyAlbum(spotify_track["album"])
+        if interner is not None:
+            self.album = interner.album(spotify_track["album"])
+        else:
+            self.album = SpotifyAlbum(spotify_track["album"])
 
         # Get image url with given IMG_DIMEN
         self._set_image_url(spotify_track["album"]["images"])
@@ -4,6 +4,8 @@ from .spotify_item import SpotifyItem
 class SpotifyPlaylist(SpotifyItem):
     """Class to hold selected information about a spotify artist"""
 
+    __slots__ = ('owner_id', 'owner')
+
     IMG_DIMEN = 300
     MAX_NAME_LENGTH = 100
     MAX_DESCRIPTION_LENGTH = 300
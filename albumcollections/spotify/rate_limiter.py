@@ -0,0 +1,269 @@
+"""Scheduling of requests to the spotify web api, shared by every worker.
+
+Requests are counted in fixed windows in the app cache (memcached in
+production), so that all workers together stay under
+`SPOTIFY_REQUESTS_PER_WINDOW` (see the app config). Bulk requests (made by
+long operations such as filling in missing tracks) can only use
+`SPOTIFY_BULK_WINDOW_SHARE` of each window, which leaves the rest for
+interactive requests such as reordering or adding albums.
+
+The limit also caps how fast one collection loads: its pages are read
+`MAX_CONCURRENT_REQUESTS` at a time (see `SpotifyInterface._iter_concurrent`),
+which only helps while the window has room for them.
+
+When spotify responds that we're being rate limited, the time it says to
+retry after is stored in the cache as well, and every worker holds off until
+then instead of retrying on its own. A request that would have to hold off
+for longer than `SPOTIFY_MAX_RATE_LIMIT_WAIT` fails instead, so that web
+requests don't hang.
+"""
+
+from contextlib import contextmanager
+import contextvars
+import enum
+import math
+import os
+import threading
+import time
+from typing import Optional
+
+from flask import current_app
+import requests
+import spotipy
+from spotipy.exceptions import SpotifyException
+from urllib3.util.retry import Retry
+
+from albumcollections import cache
+from albumcollections.spotify import call_metrics, conditional_requests
+
+'''CONSTANTS'''
+
+
+# Defaults of the limits in the app config, for when there's no app context
+DEFAULT_WINDOW_SECONDS = 1
+DEFAULT_REQUESTS_PER_WINDOW = 50
+DEFAULT_BULK_WINDOW_SHARE = 0.5
+DEFAULT_MAX_RATE_LIMIT_WAIT = 10
+
+# Number of times a rate limited request is tried again before giving up
+MAX_RATE_LIMITED_RETRIES = 3
+
+# Seconds to hold off for when spotify doesn't say how long to
+DEFAULT_RETRY_AFTER = 1
+
+# Max number of connections to spotify that a worker keeps open
+MAX_POOL_CONNECTIONS = 32
+
+PAUSE_KEY = 'spotify_requests_paused_until'
+
+
+class Priority(enum.Enum):
+    interactive = 0
+    bulk = 1
+
+
+_priority = contextvars.ContextVar('spotify_request_priority', default=Priority.interactive)
+
+
+'''PUBLIC FUNCTIONS'''
+
+
+@contextmanager
+def bulk():
+    """Make the spotify requests in the block bulk requests. This carries over to
+    requests made concurrently from within the block (see
+    `SpotifyInterface._iter_concurrent`).
+    """
+    token = _priority.set(Priority.bulk)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def wait_for_turn():
+    """Wait until a request can be made to spotify, and count it. Raises a 429
+    `SpotifyException` if spotify is rate limiting requests for longer than the
+    app is configured to wait
+    """
+    window_seconds = _setting('SPOTIFY_REQUEST_WINDOW_SECONDS', DEFAULT_WINDOW_SECONDS)
+    limit = _setting('SPOTIFY_REQUESTS_PER_WINDOW', DEFAULT_REQUESTS_PER_WINDOW)
+    if _priority.get() == Priority.bulk:
+        limit = max(1, int(limit * _setting('SPOTIFY_BULK_WINDOW_SHARE', DEFAULT_BULK_WINDOW_SHARE)))
+    max_wait = _setting('SPOTIFY_MAX_RATE_LIMIT_WAIT', DEFAULT_MAX_RATE_LIMIT_WAIT)
+
+    while True:
+        now = time.time()
+
+        paused_until = _cache_call(cache.get, PAUSE_KEY)
+        if paused_until is not None and paused_until > now:
+            if paused_until - now > max_wait:
+                raise SpotifyException(
+                    429,
+                    -1,
+                    f"Spotify is rate limiting requests for another {math.ceil(paused_until - now)}s",
+                    reason='RATE_LIMITED'
+                )
+
+            time.sleep(paused_until - now)
+            continue
+
+        window = int(now // window_seconds)
+        window_key = f'spotify_requests_{window}'
+
+        count = _count(window_key, 1, window_seconds)
+        if count is None or count <= limit:
+            return
+
+        # Don't hold on to a slot while waiting for the next window
+        _count(window_key, -1, window_seconds)
+        time.sleep((window + 1) * window_seconds - now)
+
+
+def pause(retry_after: float):
+    """Hold off every worker's requests for the given number of seconds"""
+    paused_until = time.time() + retry_after
+
+    current_paused_until = _cache_call(cache.get, PAUSE_KEY)
+    if current_paused_until is None or current_paused_until < paused_until:
+        _cache_call(cache.set, PAUSE_KEY, paused_until, timeout=math.ceil(retry_after) + 1)
+
+
+def get_session() -> 'RateLimitedSession':
+    """Get the worker process's session for requests to spotify, so that every
+    interface reuses the same pool of keep-alive connections
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = RateLimitedSession()
+
+        return _session
+
+
+class RateLimitedSession(requests.Session):
+    """A requests session for spotipy that waits for its turn before each request,
+    and retries requests that were rate limited once every worker's pause is over.
+    Playlist objects are revalidated with their ETags (see `conditional_requests`).
+
+    Server errors are retried the same way that spotipy retries them by default.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        retry = Retry(
+            total=spotipy.Spotify.max_retries,
+            connect=None,
+            read=False,
+            allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE']),
+            status=spotipy.Spotify.max_retries,
+            backoff_factor=0.3,
+            # Rate limiting is handled here instead
+            status_forcelist=[code for code in spotipy.Spotify.default_retry_codes if code != 429]
+        )
+
+        adapter = requests.adapters.HTTPAdapter(max_retries=retry, pool_maxsize=MAX_POOL_CONNECTIONS)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def request(self, method, url, **kwargs) -> requests.Response:
+        return conditional_requests.request(self._rate_limited_request, method, url, **kwargs)
+
+    def _rate_limited_request(self, method, url, **kwargs) -> requests.Response:
+        for attempt in range(MAX_RATE_LIMITED_RETRIES + 1):
+            wait_for_turn()
+
+            response = super().request(method, url, **kwargs)
+            call_metrics.record_response(response)
+            if response.status_code != 429:
+                break
+
+            retry_after = _retry_after(response)
+            _log_warning(f"Spotify rate limited {method} {url}, pausing requests for {retry_after}s")
+            pause(retry_after)
+
+            if attempt < MAX_RATE_LIMITED_RETRIES:
+                call_metrics.record_rate_limited()
+
+        return response
+
+
+'''PRIVATE FUNCTIONS'''
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _forget_session():
+    """Forget the session in a forked child process, so that it doesn't share
+    connections with its parent
+    """
+    global _session, _session_lock
+
+    _session = None
+    _session_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_session)
+
+
+def _setting(name: str, default):
+    try:
+        return current_app.config.get(name, default)
+    except RuntimeError:
+        # Outside of an app context
+        return default
+
+
+def _count(key: str, delta: int, window_seconds: float) -> Optional[int]:
+    """Add to a request count in the cache, returning the new count (or None if
+    the cache couldn't count it)
+    """
+    backend = cache.cache
+
+    try:
+        # The generic cache increment is a separate get and set, which loses counts
+        # when workers make requests at the same time. Memcached clients can do it
+        # atomically
+        if hasattr(backend, '_client_context'):
+            with backend._client_context() as client:
+                key = backend._normalize_key(key)
+                client.add(key, 0, math.ceil(window_seconds * 2))
+                if delta >= 0:
+                    return client.incr(key, delta)
+                else:
+                    return client.decr(key, -delta)
+
+        return backend.inc(key, delta)
+    except Exception as e:
+        _log_warning(f"Failed to count spotify request: {e}")
+        return None
+
+
+def _cache_call(func, *args, **kwargs):
+    """Call a cache function, treating errors as a miss so that a cache outage
+    doesn't stop requests to spotify
+    """
+    try:
+        return func(*args, **kwargs)
+    except Exception as e:
+        _log_warning(f"Spotify request scheduler cache error: {e}")
+        return None
+
+
+def _retry_after(response: requests.Response) -> float:
+    try:
+        return max(float(response.headers['Retry-After']), 0)
+    except (KeyError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+def _log_warning(message: str):
+    try:
+        current_app.logger.warning(message)
+    except RuntimeError:
+        # Outside of an app context
+        pass
@@ -6,27 +6,99 @@ for music, or getting information about music based on a
 spotify link.
 """
 
-from typing import Dict, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from functools import partial
+from itertools import islice
+import os
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
 
+from flask import copy_current_request_context, current_app, has_request_context
 import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials
 from spotipy.exceptions import SpotifyException
 
+from albumcollections import client_credentials_cache_handler, metrics
 from albumcollections.spotify.item.spotify_collection import SpotifyCollection
-from albumcollections.spotify import collection_albums
+from albumcollections.spotify import album_catalog, call_metrics, collection_albums, rate_limiter
 from albumcollections.spotify.item.spotify_playlist import SpotifyPlaylist
 
-from .item.spotify_music import SpotifyTrack
+from .item.spotify_music import SpotifyAlbum, SpotifyTrack
+from .item.spotify_item_interner import SpotifyItemInterner
+
+'''CONSTANTS'''
+
+
+# Max number of items that the api returns for one playlist tracks request
+PLAYLIST_TRACKS_LIMIT = 100
+
+# Fields of spotify objects that are read by `SpotifyItem`
+ITEM_FIELDS = "name,external_urls(spotify),id,uri"
+
+# Fields of a playlist that are read by `SpotifyPlaylist` and `SpotifyCollection`.
+# The playlist's first page of items is left out
+PLAYLIST_FIELDS = f"{ITEM_FIELDS},images(url,height,width),owner(id,display_name),snapshot_id,tracks(total)"
+
+# Fields of a page of playlist items that are read by `SpotifyTrack` (and by
+# `collection_albums.hash_page`)
+PLAYLIST_ITEMS_FIELDS = (
+    f"items(track({ITEM_FIELDS},artists({ITEM_FIELDS}),disc_number,track_number,type,"
+    f"album({ITEM_FIELDS},artists({ITEM_FIELDS}),images(url,height,width),release_date,album_type,total_tracks)))"
+)
+
+# Max number of albums that can be requested at once from the several albums endpoint
+ALBUMS_LIMIT = 20
+
+# Max number of tracks that the api returns for one album tracks request (this is also
+# the number of tracks that come with an album from the several albums endpoint)
+ALBUM_TRACKS_LIMIT = 50
+
+# Max number of requests that one call of `_iter_concurrent` has in flight at a time
+MAX_CONCURRENT_REQUESTS = 8
+
+# Max number of concurrent requests that a worker process makes to spotify
+# across all of the requests it's serving
+MAX_PROCESS_CONCURRENT_REQUESTS = 16
+
+
+'''METRICS'''
+
+
+PARSED_COLLECTION_ALBUMS = metrics.Histogram(
+    'albumcollections_parsed_collection_albums',
+    "Number of albums in collections that were parsed from their playlists",
+    buckets=metrics.SIZE_BUCKETS
+)
+
+PARSED_COLLECTION_TRACKS = metrics.Histogram(
+    'albumcollections_parsed_collection_tracks',
+    "Number of tracks in the playlists of collections that were parsed",
+    buckets=metrics.SIZE_BUCKETS
+)
+
+COLLECTION_PARSE_DURATION = metrics.Histogram(
+    'albumcollections_collection_parse_duration_seconds',
+    "Time taken to parse collections from their playlists, including requests for the playlist pages"
+)
 
 
 class SpotifyInterface:
     """Class to interface with Spotify API through an
     instance of client credentials authenticated spotipy.
+
+    Requests are scheduled by the `rate_limiter`, which is shared by every worker.
+    Every interface reuses the worker's session for requests, and the client
+    credentials token that's shared by every worker.
     """
 
     def __init__(self):
-        self.sp = spotipy.Spotify(
-            client_credentials_manager=SpotifyClientCredentials())
+        self.sp = use_configured_api(spotipy.Spotify(
+            client_credentials_manager=use_configured_accounts(
+                SpotifyClientCredentials(cache_handler=client_credentials_cache_handler)
+            ),
+            requests_session=rate_limiter.get_session()))
 
     '''PUBLIC FUNCTIONS'''
 
@@ -52,25 +124,83 @@ class SpotifyInterface:
 
     def get_album_track_ids(self, album_id) -> List[str]:
         """Get the list of track ids that comprise the given spotify album"""
-        return [spotify_track["id"] for spotify_track in self.sp.album_tracks(album_id)["items"]]
+        album_track_ids = self.get_albums_track_ids([album_id])
+
+        if album_id not in album_track_ids:
+            raise Exception(f"Failed to get tracks of album {album_id}")
+
+        return album_track_ids[album_id]
+
+    def get_albums_track_ids(self, album_ids: Iterable[str]) -> Dict[str, List[str]]:
+        """Get the list of track ids that comprise each of the given spotify albums,
+        as a dictionary of album id to track ids. Albums that can't be found are
+        left out.
+
+        Albums are looked up in the shared album catalog (see `get_catalog_entries`).
+        """
+        catalog_entries = self.get_catalog_entries(album_ids)
+
+        return {album_id: list(entry.track_ids) for album_id, entry in catalog_entries.items()}
+
+    def get_catalog_entries(self, album_ids: Iterable[str]) -> Dict[str, album_catalog.CatalogEntry]:
+        """Get the album catalog entries of the given spotify albums, as a dictionary
+        of album id to entry. Albums that can't be found are left out.
+
+        Albums are looked up in the shared album catalog first. Only the ones that
+        aren't in it yet are requested from spotify, and then added to it.
+        """
+        album_ids = list(dict.fromkeys(album_ids))
 
-    def get_playlist_tracks(self, id) -> List[SpotifyTrack]:
+        catalog_entries = album_catalog.get(album_ids)
+
+        missing_album_ids = [album_id for album_id in album_ids if album_id not in catalog_entries]
+        if missing_album_ids:
+            new_catalog_entries = self._get_catalog_entries(missing_album_ids)
+            album_catalog.add(new_catalog_entries)
+            catalog_entries.update((entry.album_id, entry) for entry in new_catalog_entries)
+
+        return catalog_entries
+
+    def get_playlist_tracks(self, id, total_tracks: int = None) -> List[SpotifyTrack]:
         """Get all tracks in the given playlist, retaining track order"""
-        tracks = []
+        return list(self.iter_playlist_tracks(id, total_tracks))
+
+    def iter_playlist_tracks(self, id, total_tracks: int = None) -> Iterator[SpotifyTrack]:
+        """Yield the tracks in the given playlist in order, one page at a time.
+
+        If the total number of tracks in the playlist is known, then the offset of
+        every page is computed up front and the pages are requested concurrently, a
+        bounded number at a time. Otherwise pages are requested one after another
+        until an empty page is returned.
+
+        Only the pages that are in flight or not yet consumed are held in memory, so
+        callers can start working on the first tracks while later pages are loading.
+
+        Tracks from the same album share one `SpotifyAlbum` object for the duration
+        of the iteration.
+        """
+        interner = SpotifyItemInterner()
+
+        if total_tracks is not None:
+            pages = self._iter_concurrent(
+                lambda offset: self._playlist_spotify_tracks(id, offset, interner=interner),
+                range(0, total_tracks, PLAYLIST_TRACKS_LIMIT)
+            )
+            for page in pages:
+                yield from page
+            return
 
         offset = 0
         while True:
             # Get next tracks in playlist.
-            next_tracks = self._playlist_spotify_tracks(id, offset)
+            next_tracks = self._playlist_spotify_tracks(id, offset, interner=interner)
 
             if len(next_tracks):
-                tracks.extend(next_tracks)
+                yield from next_tracks
                 offset += len(next_tracks)
             else:
                 break
 
-        return tracks
-
     def get_collection(self, playlist_id) -> SpotifyCollection:
         """Get `SpotifyCollection` item based on a database collection entry
 
@@ -83,30 +213,62 @@ class SpotifyInterface:
         # Load the albums in the spotify_collection if they're not already
         # available
         if spotify_collection.albums is None:
-            # Make iterator of tracks in playlist
-            playlist_tracks_iter = iter(self.get_playlist_tracks(spotify_collection.id))
             # Set the list of albums in the collection based on the playlist tracks
-            spotify_collection.albums = collection_albums.get(playlist_tracks_iter)
+            with COLLECTION_PARSE_DURATION.time():
+                albums, checkpoints = self._parse_collection_albums(spotify_collection)
+            PARSED_COLLECTION_ALBUMS.observe(len(albums))
+            PARSED_COLLECTION_TRACKS.observe(spotify_collection.total_tracks)
+
+            spotify_collection.albums = albums
+            spotify_collection.set_checkpoints(checkpoints)
 
         return spotify_collection
 
     '''SPOTIPY WRAPPER FUNCTIONS'''
 
+    @call_metrics.measured
     def _playlist(self, playlist_id: str) -> Dict:
         """Call spotipy playlist method with client credentials interface"""
-        return self.sp.playlist(playlist_id)
+        return self.sp.playlist(playlist_id, fields=PLAYLIST_FIELDS)
 
+    @call_metrics.measured
     def _playlist_tracks(self, playlist_id, track_offset: int, track_limit: int) -> Dict:
-        """Call spotipy playlist_tracks method with client credentials interface"""
-        return self.sp.playlist_tracks(playlist_id, limit=track_limit, offset=track_offset)
+        """Call spotipy playlist_items method (for tracks) with client credentials interface"""
+        return self.sp.playlist_items(
+            playlist_id,
+            fields=PLAYLIST_ITEMS_FIELDS,
+            limit=track_limit,
+            offset=track_offset,
+            additional_types=('track',)
+        )
+
+    @call_metrics.measured
+    def _albums(self, album_ids: List[str]) -> List[Dict]:
+        """Call spotipy albums method with client credentials interface"""
+        return self.sp.albums(album_ids)["albums"]
+
+    @call_metrics.measured
+    def _album_tracks(self, album_id: str, track_offset: int, track_limit: int = ALBUM_TRACKS_LIMIT) -> Dict:
+        """Call spotipy album_tracks method with client credentials interface"""
+        return self.sp.album_tracks(album_id, limit=track_limit, offset=track_offset)
 
     '''PRIVATE FUNCTIONS'''
 
+    def _playlist_items(
+        self,
+        playlist_id: str,
+        track_offset: int,
+        track_limit: int = PLAYLIST_TRACKS_LIMIT
+    ) -> List[Dict]:
+        """Get a page of playlist item dictionaries from the playlist"""
+        return self._playlist_tracks(playlist_id, track_offset, track_limit)["items"]
+
     def _playlist_spotify_tracks(
         self,
         playlist_id: str,
         track_offset: int,
-        track_limit: int = 100
+        track_limit: int = PLAYLIST_TRACKS_LIMIT,
+        interner: SpotifyItemInterner = None
     ) -> List[SpotifyTrack]:
         """Get tracks from the playlist as `SpotifyTrack` objects
 
@@ -115,6 +277,227 @@ class SpotifyInterface:
         as well as what looks like a 'user object'?)
         """
         return [
-            SpotifyTrack(track_item["track"])
-            for track_item in self._playlist_tracks(playlist_id, track_offset, track_limit)["items"]
+            SpotifyTrack(track_item["track"], interner)
+            for track_item in self._playlist_items(playlist_id, track_offset, track_limit)
         ]
+
+    def _parse_collection_albums(
+        self,
+        spotify_collection: SpotifyCollection
+    ) -> Tuple[List[SpotifyAlbum], collection_albums.CollectionCheckpoints]:
+        """Parse the collection's albums from its playlist tracks, checkpointing the parse
+        at every page.
+
+        If albums were cached for an older snapshot of the collection, then pages that are
+        unchanged since then are only hashed, and parsing resumes from the checkpoint just
+        before the first page that changed. Edits near the end of a large collection then
+        don't require building and parsing every track again.
+        """
+        previous_albums, previous_checkpoints = spotify_collection.get_previous_layout()
+        if previous_checkpoints is not None and previous_checkpoints.page_size != PLAYLIST_TRACKS_LIMIT:
+            previous_checkpoints = None
+
+        checkpoints = collection_albums.CollectionCheckpoints(spotify_collection.snapshot_id, PLAYLIST_TRACKS_LIMIT)
+        interner = SpotifyItemInterner()
+        parser = None
+
+        pages = self._iter_concurrent(
+            lambda offset: self._playlist_items(spotify_collection.id, offset),
+            range(0, spotify_collection.total_tracks, PLAYLIST_TRACKS_LIMIT)
+        )
+        for page_num, playlist_items in enumerate(pages):
+            page_hash = collection_albums.hash_page(playlist_items)
+
+            if parser is None:
+                # Skip over leading pages that haven't changed since the previous parse
+                if previous_checkpoints is not None and \
+                        previous_checkpoints.page_hashes[page_num:page_num + 1] == [page_hash]:
+                    checkpoints.add_page(page_hash, previous_checkpoints.runs[page_num])
+                    continue
+
+                parser = self._start_parse(previous_albums, previous_checkpoints, page_num)
+
+            for playlist_item in playlist_items:
+                parser.feed(SpotifyTrack(playlist_item["track"], interner))
+
+            checkpoints.add_page(page_hash, parser.get_run())
+
+        # Every page was unchanged (tracks may have been removed from the end)
+        if parser is None:
+            parser = self._start_parse(previous_albums, previous_checkpoints, len(checkpoints.page_hashes))
+
+        checkpoints.invalidated_at = parser.invalidated_at
+
+        return parser.albums, checkpoints
+
+    def _iter_concurrent(self, func: Callable, args: Iterable) -> Iterator:
+        """Call `func` with each of `args` on the worker process's shared pool of
+        request threads, yielding the results in the same order as `args`.
+
+        At most `MAX_CONCURRENT_REQUESTS` calls are in flight or waiting to be
+        consumed at a time, so results don't pile up ahead of a slow consumer. The
+        pool itself is bounded by `MAX_PROCESS_CONCURRENT_REQUESTS`, so concurrent
+        requests to the app share the same limit on calls to spotify.
+
+        Each call runs in a copy of the current request context (if there is one),
+        since the user OAuth interface reads its token from the flask session. It
+        also keeps the request priority (see `rate_limiter.bulk`).
+        `func` must not call `_iter_concurrent` itself, since it would be waiting
+        on the pool that it's running in.
+        """
+        args = iter(args)
+        first_args = list(islice(args, MAX_CONCURRENT_REQUESTS))
+
+        # Not worth handing a single call off to another thread
+        if len(first_args) <= 1:
+            yield from (func(arg) for arg in first_args)
+            return
+
+        executor = _get_request_executor()
+        futures = deque(executor.submit(_in_current_context(func), arg) for arg in first_args)
+        try:
+            while futures:
+                result = futures.popleft().result()
+
+                # Keep the window full before handing the result over
+                for arg in islice(args, 1):
+                    futures.append(executor.submit(_in_current_context(func), arg))
+
+                yield result
+                del result
+        finally:
+            # The consumer stopped early (or a call failed) - don't start anything new
+            for future in futures:
+                future.cancel()
+
+    def _get_catalog_entries(self, album_ids: List[str]) -> List[album_catalog.CatalogEntry]:
+        """Look up albums on spotify for the album catalog. Albums that can't be found
+        are left out.
+
+        Albums are requested in batches from the several albums endpoint, with the
+        batches requested concurrently. Each album comes with its first tracks, so
+        further album track pages are only requested for long albums.
+        """
+        spotify_albums = []
+        remaining_pages = []
+
+        batches = [album_ids[i:i + ALBUMS_LIMIT] for i in range(0, len(album_ids), ALBUMS_LIMIT)]
+        for batch_albums in self._iter_concurrent(self._albums, batches):
+            for spotify_album in batch_albums:
+                # Ids that don't belong to an album come back as None
+                if spotify_album is None:
+                    continue
+
+                spotify_albums.append(spotify_album)
+
+                album_tracks = spotify_album["tracks"]
+                remaining_pages.extend(
+                    (spotify_album["id"], offset)
+                    for offset in range(len(album_tracks["items"]), album_tracks["total"], ALBUM_TRACKS_LIMIT)
+                )
+
+        album_track_ids = {
+            spotify_album["id"]: [spotify_track["id"] for spotify_track in spotify_album["tracks"]["items"]]
+            for spotify_album in spotify_albums
+        }
+
+        # Get the rest of the tracks of long albums
+        pages = self._iter_concurrent(lambda page: self._album_tracks(*page), remaining_pages)
+        for (album_id, _), album_tracks in zip(remaining_pages, pages):
+            album_track_ids[album_id].extend(spotify_track["id"] for spotify_track in album_tracks["items"])
+
+        catalog_entries = []
+        for spotify_album in spotify_albums:
+            album = SpotifyAlbum(spotify_album)
+            catalog_entries.append(album_catalog.CatalogEntry(
+                album_id=album.id,
+                track_ids=tuple(album_track_ids[album.id]),
+                total_tracks=album.total_tracks,
+                name=album.name,
+                artists=tuple((artist.id, artist.name) for artist in album.artists),
+                img_url=album.img_url,
+                album_type=album.album_type.name,
+                release_date=album.release_date
+            ))
+
+        return catalog_entries
+
+    def _start_parse(
+        self,
+        previous_albums: List[SpotifyAlbum],
+        previous_checkpoints: collection_albums.CollectionCheckpoints,
+        num_pages: int
+    ) -> collection_albums.CollectionAlbumsParser:
+        """Get a parser that's ready to parse from the given page on, resuming
+        the previous parse if there was one
+        """
+        if previous_checkpoints is None:
+            return collection_albums.CollectionAlbumsParser()
+        else:
+            return previous_checkpoints.restore(previous_albums, num_pages)
+
+
+"""HELPER FUNCTIONS"""
+
+
+def use_configured_api(sp: spotipy.Spotify) -> spotipy.Spotify:
+    """Point a spotipy client at the web api in the app config, if one is configured
+    instead of spotify's (see `Config.SPOTIFY_API_URL`)
+    """
+    api_url = current_app.config.get('SPOTIFY_API_URL')
+    if api_url:
+        sp.prefix = api_url.rstrip('/') + '/'
+
+    return sp
+
+
+def use_configured_accounts(auth_manager):
+    """Point a spotipy auth manager at the accounts service in the app config, if one
+    is configured instead of spotify's (see `Config.SPOTIFY_ACCOUNTS_URL`)
+    """
+    accounts_url = current_app.config.get('SPOTIFY_ACCOUNTS_URL')
+    if accounts_url:
+        accounts_url = accounts_url.rstrip('/')
+        auth_manager.OAUTH_AUTHORIZE_URL = f"{accounts_url}/authorize"
+        auth_manager.OAUTH_TOKEN_URL = f"{accounts_url}/api/token"
+
+    return auth_manager
+
+
+_request_executor = None
+_request_executor_lock = threading.Lock()
+
+
+def _get_request_executor() -> ThreadPoolExecutor:
+    """Get the worker process's pool of threads for making requests to spotify"""
+    global _request_executor
+
+    with _request_executor_lock:
+        if _request_executor is None:
+            _request_executor = ThreadPoolExecutor(
+                max_workers=MAX_PROCESS_CONCURRENT_REQUESTS,
+                thread_name_prefix="spotify-request"
+            )
+
+        return _request_executor
+
+
+def _forget_request_executor():
+    """Forget the pool in a forked child process, since its threads don't exist there"""
+    global _request_executor, _request_executor_lock
+
+    _request_executor = None
+    _request_executor_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_request_executor)
+
+
+def _in_current_context(func: Callable) -> Callable:
+    """Wrap `func` to run in a copy of the current context variables, and of the
+    current request context if there is one
+    """
+    if has_request_context():
+        func = copy_current_request_context(func)
+
+    return partial(contextvars.copy_context().run, func)
@@ -6,12 +6,19 @@ There is a class that assumes the user has already been authenticated, which
 provides API functionality.
 """
 
-from typing import Dict, List, Tuple
+from itertools import chain
+from typing import Callable, Dict, List, Optional, Tuple
 import random
+import time
 
+from flask import current_app, g, session
 import spotipy
+from spotipy.cache_handler import CacheHandler, MemoryCacheHandler
+from spotipy.exceptions import SpotifyException
 from spotipy.oauth2 import SpotifyOAuth
+from albumcollections.spotify import call_metrics, collection_albums, collection_cache, rate_limiter
 from albumcollections.spotify.item.spotify_collection import SpotifyCollection
+from albumcollections.spotify.item.spotify_music import SpotifyAlbum
 
 # Importing like this is necessary for unittest framework to patch
 import albumcollections.spotify.spotify_interface as spotify_iface
@@ -32,11 +39,29 @@ SCOPE = [
     'user-read-playback-state'
 ]
 
+# Key of the user's cached profile info in their session
+PROFILE_SESSION_KEY = 'spotify_user_profile'
+
+# Number of seconds that cached profile info is trusted for
+PROFILE_CACHE_TIMEOUT = 300
+
+# Spotify rejects a change made against an outdated snapshot of a playlist as a bad
+# request, with a message about the snapshot id ("Invalid snapshot id")
+SNAPSHOT_CONFLICT_STATUS = 400
+SNAPSHOT_CONFLICT_MESSAGE = 'snapshot id'
+
+# Max number of items that can be added to or removed from a playlist in one api request
+PLAYLIST_ITEMS_CHUNK_SIZE = 100
+
+# Max number of playlists that the api returns for one user playlists request
+USER_PLAYLISTS_LIMIT = 50
+
 '''PUBLIC AUTH FUNCTIONS'''
 
 
 def auth_user(code):
     """Give user an access token to authenticate them"""
+    _forget_user()
     _auth_manager().get_access_token(code)
 
 
@@ -45,26 +70,79 @@ def unauth_user():
     the user, but it will force an `SpotifyUserAuthFailure` the next time
     that `_get_sp_instance` is called.
     """
+    _forget_user()
     spotipy_cache_handler.remove_cached_token()
 
 
 def is_auth():
-    """Check whether thte user is authenticated with a spotify"""
-    if _auth_manager().validate_token(spotipy_cache_handler.get_cached_token()):
-        return True
-    else:
-        return False
+    """Check whether thte user is authenticated with a spotify
+
+    The answer is remembered for the rest of the request, since this
+    is checked many times while handling one.
+    """
+    if 'sp_is_auth' not in g:
+        g.sp_is_auth = bool(_auth_manager().validate_token(spotipy_cache_handler.get_cached_token()))
+
+    return g.sp_is_auth
 
 
 def get_auth_url():
     return _auth_manager(show_dialog=True).get_authorize_url()
 
 
+'''PUBLIC USER FUNCTIONS'''
+
+
+def get_user_interface() -> 'SpotifyUserInterface':
+    """Get the `SpotifyUserInterface` for the logged in user, creating it
+    only once per request.
+    """
+    if 'sp_user_interface' not in g:
+        g.sp_user_interface = SpotifyUserInterface()
+
+    return g.sp_user_interface
+
+
+def forget_request_state():
+    """Drop anything remembered about the user for the current request"""
+    g.pop('sp_is_auth', None)
+    g.pop('sp_user_interface', None)
+
+
+def get_cached_profile() -> Optional[Dict]:
+    """Get the user's profile info cached in their session, unless it has expired"""
+    profile = session.get(PROFILE_SESSION_KEY)
+
+    if profile is not None and profile['expires_at'] > time.time():
+        return profile
+    else:
+        return None
+
+
+def update_cached_profile(**values):
+    """Add values to the user's profile info cached in their session, starting
+    over if the cached info has expired.
+    """
+    profile = get_cached_profile() or {'expires_at': time.time() + PROFILE_CACHE_TIMEOUT}
+    session[PROFILE_SESSION_KEY] = dict(profile, **values)
+
+
 '''PRIVATE AUTH FUNCTIONS'''
 
 
-def _auth_manager(show_dialog=False):
-    return SpotifyOAuth(scope=SCOPE, cache_handler=spotipy_cache_handler, show_dialog=show_dialog)
+def _auth_manager(show_dialog=False, cache_handler: CacheHandler = None):
+    """Get an auth manager that keeps the token in `cache_handler`, or in the
+    user's session by default
+    """
+    return spotify_iface.use_configured_accounts(
+        SpotifyOAuth(scope=SCOPE, cache_handler=cache_handler or spotipy_cache_handler, show_dialog=show_dialog)
+    )
+
+
+def _forget_user():
+    """Drop everything remembered about the current user"""
+    forget_request_state()
+    session.pop(PROFILE_SESSION_KEY, None)
 
 
 '''USER SPOTIFY INTERFACE CLASS'''
@@ -77,23 +155,55 @@ class SpotifyUserInterface(spotify_iface.SpotifyInterface):
     This allows operations to be done with user's data, such as viewing, modifying playlists etc.
     """
 
-    def __init__(self):
+    def __init__(self, token_info: Dict = None, profile: Dict = None):
         """Creates a spotify user interface if user is authorized. Otherwise raises
         an exception
+
+        The user's id and display name are taken from their cached profile info
+        if possible, to avoid a request to spotify.
+
+        By default the user is the one logged in to the current request's session.
+        If their token and profile info are given instead, the session isn't used
+        at all (see `detached`).
         """
         super().__init__()
 
-        auth_manager = _auth_manager()
-
-        if auth_manager.validate_token(spotipy_cache_handler.get_cached_token()):
-            self.sp_user = spotipy.Spotify(auth_manager=auth_manager)
-            self.user_id = self.sp_user.me()["id"]
-            self.display_name = self.sp_user.me()['display_name']
+        if token_info is None:
+            auth_manager = _auth_manager()
+            token_info = spotipy_cache_handler.get_cached_token()
+        else:
+            auth_manager = _auth_manager(cache_handler=MemoryCacheHandler(token_info))
+
+        if auth_manager.validate_token(token_info):
+            self.sp_user = spotify_iface.use_configured_api(spotipy.Spotify(
+                auth_manager=auth_manager,
+                requests_session=rate_limiter.get_session()
+            ))
+
+            if profile is None:
+                profile = get_cached_profile()
+            if profile is None or 'user_id' not in profile:
+                me = self.sp_user.me()
+                profile = {'user_id': me['id'], 'display_name': me['display_name']}
+                update_cached_profile(**profile)
+
+            self.user_id = profile['user_id']
+            self.display_name = profile['display_name']
         else:
             raise Exception("Cannot create Spotify user interface - user not authenticated")
 
     '''PUBLIC FUNCTIONS'''
 
+    def detached(self) -> 'SpotifyUserInterface':
+        """Get an interface for the same user with its own copy of their token, which
+        can be used outside of the current request (by a background job)
+        """
+        return SpotifyUserInterface(
+            token_info=dict(self.sp_user.auth_manager.cache_handler.get_cached_token()),
+            profile={'user_id': self.user_id, 'display_name': self.display_name}
+        )
+
+    @call_metrics.measured
     def create_playlist(self, name: str, description: str = "") -> SpotifyPlaylist:
         """Create a playlist for the user, returning the spotify playlist object"""
         # Create the playlist
@@ -111,6 +221,7 @@ class SpotifyUserInterface(spotify_iface.SpotifyInterface):
 
         return playlist
 
+    @call_metrics.measured
     def remove_playlist(self, id: str):
         self.sp_user.user_playlist_unfollow(self.user_id, id)
 
@@ -123,50 +234,101 @@ class SpotifyUserInterface(spotify_iface.SpotifyInterface):
         This function should not be able to raise an exception because it is necessary
         to have some valid (or empty) data for the application to run. It will attempt
         to load as many playlists as possible, handling exceptions for each case.
+
+        The first page says how many playlists there are, so the rest of the pages
+        are requested concurrently.
         """
         playlists = []
         errors = []
 
         try:
-            playlist_infos = self.sp_user.current_user_playlists()
+            first_playlist_infos = self._current_user_playlists(0)
+            remaining_playlist_infos = self._iter_concurrent(
+                self._current_user_playlists,
+                range(USER_PLAYLISTS_LIMIT, first_playlist_infos['total'], USER_PLAYLISTS_LIMIT)
+            )
 
-            while playlist_infos:
+            for playlist_infos in chain([first_playlist_infos], remaining_playlist_infos):
                 for playlist in playlist_infos['items']:
                     try:
                         playlists.append(SpotifyPlaylist(playlist))
                     except Exception as e:
                         errors.append(f"Failed to create SpotifyPlaylist for playlist dictionary {playlist}: {e}")
-                if playlist_infos['next']:
-                    playlist_infos = self.sp_user.next(playlist_infos)
-                else:
-                    playlist_infos = None
         except Exception as e:
             errors.append(str(e))
 
         return (playlists, errors)
 
-    def add_items_to_playlist(self, playlist_id: str, items: List[str]):
+    @call_metrics.measured
+    def add_items_to_playlist(
+        self,
+        playlist_id: str,
+        items: List[str],
+        position: int = None,
+        progress: Callable[[int, int], None] = None
+    ) -> Optional[str]:
         """ Add items in chunks to the playlist until all items have been added
 
         "items" is a list that can contain a combination of track ids and/or
         track/episode uris. Passing an episode id will result in a
         "Payload contains a non-existing ID" error from the API
+
+        If a position is given, the items are inserted together (in order) at that
+        index of the playlist. Otherwise they're added to the end of it.
+
+        If `progress` is given, it's called with the number of items added so far
+        and the total number of items after each chunk.
+
+        Returns the snapshot id of the playlist after the last chunk was added,
+        or None if there were no items
         """
-        MAX_CHUNK_SIZE = 100  # 100 is the max number of tracks that can be added at one time via spotify api request
-        while len(items):
-            if len(items) >= MAX_CHUNK_SIZE:
-                chunk_size = MAX_CHUNK_SIZE
-            else:
-                chunk_size = len(items)
+        snapshot_id = None
+
+        for chunk_start in range(0, len(items), PLAYLIST_ITEMS_CHUNK_SIZE):
+            # Insert each chunk right after the previous one to keep the items together
+            chunk_position = None if position is None else position + chunk_start
 
             # Add next chunk of tracks to playlist
-            self.sp_user.playlist_add_items(
+            snapshot_id = self.sp_user.playlist_add_items(
                 playlist_id,
-                items[:chunk_size]
-            )
+                items[chunk_start:chunk_start + PLAYLIST_ITEMS_CHUNK_SIZE],
+                chunk_position
+            )["snapshot_id"]
 
-            # Chop off used chunk
-            items = items[chunk_size:]
+            if progress is not None:
+                progress(min(chunk_start + PLAYLIST_ITEMS_CHUNK_SIZE, len(items)), len(items))
+
+        return snapshot_id
+
+    @call_metrics.measured
+    def remove_items_from_playlist(
+        self,
+        playlist_id: str,
+        items: List[str],
+        snapshot_id: str = None
+    ) -> Optional[str]:
+        """Remove all occurrences of the items from the playlist, in chunks
+
+        If a snapshot id is given, spotify rejects the removal if the playlist has
+        changed since that snapshot. Each chunk after the first is removed from the
+        snapshot that the previous chunk left.
+
+        Returns the snapshot id of the playlist after the last chunk was removed,
+        or None if there were no items
+        """
+        new_snapshot_id = None
+
+        for chunk_start in range(0, len(items), PLAYLIST_ITEMS_CHUNK_SIZE):
+            new_snapshot_id = self.sp_user.playlist_remove_all_occurrences_of_items(
+                playlist_id,
+                items[chunk_start:chunk_start + PLAYLIST_ITEMS_CHUNK_SIZE],
+                snapshot_id=snapshot_id
+            )["snapshot_id"]
+
+            if snapshot_id is not None:
+                snapshot_id = new_snapshot_id
+
+        return new_snapshot_id
 
     def add_album_to_collection(self, collection_id, album_id):
         """Add an album to the collection with the given collection id
@@ -174,12 +336,21 @@ class SpotifyUserInterface(spotify_iface.SpotifyInterface):
         Do this so that after the operation is done, there is exactly one
         complete version of the album in the collection, retaining order
         if an incomplete version was there previously.
+
+        The collection's albums are usually cached, so the playlist itself is only
+        read if they aren't. Spotify can't add items against a snapshot, so an edit
+        made by someone else at the same time can't be ruled out, and the cached
+        collection isn't edited to match. Instead the playlist is parsed again the
+        next time it's loaded, from the last page that the addition changed.
         """
         # Get the collection for the playlist
         collection = self.get_collection(collection_id)
 
         # Get list of track ids for tracks in the album
-        album_track_ids = self.get_album_track_ids(album_id)
+        catalog_entry = self.get_catalog_entries([album_id]).get(album_id)
+        if catalog_entry is None:
+            raise Exception(f"Failed to get tracks of album {album_id}")
+        album_track_ids = list(catalog_entry.track_ids)
 
         # If album is already in the collection and is complete, do nothing
         # If album is already in the collection and incomplete, then remove occurences
@@ -188,26 +359,112 @@ class SpotifyUserInterface(spotify_iface.SpotifyInterface):
         for album in collection.albums:
             if album.id == album_id:
                 if not album.complete:
-                    self.sp_user.playlist_remove_all_occurrences_of_items(collection_id, album_track_ids)
-                    # NOTE: If an album has over 100 tracks, this will return an error
-                    self.sp_user.playlist_add_items(collection_id, album_track_ids, album.playlist_index)
+                    # Every track before the album's first track is left in place, so
+                    # its playlist index is still where it belongs after the removal
+                    self.remove_items_from_playlist(collection_id, album_track_ids)
+                    self.add_items_to_playlist(collection_id, album_track_ids, album.playlist_index)
                 return
 
         # Add tracks of new album to the playllst
         self.add_items_to_playlist(collection_id, album_track_ids)
 
-    def remove_album_from_playlist(self, playlist_id, album_id):
+    def remove_album_from_playlist(self, playlist_id, album_id, snapshot_id: str = None) -> Tuple[str, bool]:
+        """Remove all tracks of the album from the playlist.
+
+        The tracks are removed from the snapshot of the playlist that was read, and
+        the album is also removed from the playlist's cached collection if nothing
+        else changed the playlist (see `_update_cached_collection`), so that the
+        playlist doesn't have to be parsed again. If spotify rejects the removal for
+        an outdated snapshot, the tracks are removed from the playlist as it is now,
+        and the cached collection is left for the playlist to be parsed again instead.
+
+        Returns the new snapshot id of the playlist, and whether the playlist had
+        changed since the given snapshot (the one the caller's indices are based on).
+        """
         # Get list of track ids for tracks in the album
         album_track_ids = self.get_album_track_ids(album_id)
 
+        # Get the snapshot of the playlist that the cached collection has to match
+        collection = SpotifyCollection(self._playlist(playlist_id))
+
         # Remove all instances of these tracks from the playlist
-        self.sp_user.playlist_remove_all_occurrences_of_items(playlist_id, album_track_ids)
+        try:
+            new_snapshot_id = self.remove_items_from_playlist(playlist_id, album_track_ids, collection.snapshot_id)
+        except SpotifyException as e:
+            if not _is_snapshot_conflict(e):
+                raise e
+
+            current_app.logger.info(f"Removal from {playlist_id} rejected for snapshot {collection.snapshot_id}: {e}")
+            return self.remove_items_from_playlist(playlist_id, album_track_ids), True
+
+        self._update_cached_collection(
+            collection,
+            new_snapshot_id,
+            collection.total_tracks - len(album_track_ids),
+            lambda albums: collection_albums.remove_album(albums, album_id, collection.total_tracks)
+        )
+
+        return new_snapshot_id, snapshot_id is not None and snapshot_id != collection.snapshot_id
 
-    def reorder_collection(self, playlist_id, moved_album_id, next_album_id):
+    @call_metrics.measured
+    def reorder_collection(
+        self,
+        playlist_id,
+        moved_album_id,
+        next_album_id,
+        range_start: int = None,
+        insert_before: int = None,
+        range_length: int = None,
+        snapshot_id: str = None
+    ) -> Tuple[str, bool]:
         """
         Move all tracks in the "moved album" to the position that the
         "next album"'s first track is currently in.
+
+        If the caller knows the playlist indices of the move and the snapshot of the
+        playlist they're based on, then the move is made directly, as long as the
+        playlist is still at that snapshot. Otherwise (or if spotify rejects the move
+        for an outdated snapshot) the indices are looked up in the current collection
+        instead.
+
+        The move is also made to the cached collection if nothing else changed the
+        playlist (see `_update_cached_collection`), so that the playlist doesn't have
+        to be parsed again.
+
+        Returns the new snapshot id of the playlist, and whether the given snapshot was
+        out of date.
         """
+        if None not in (range_start, insert_before, range_length, snapshot_id):
+            # Spotify may make a move against an outdated snapshot rather than rejecting
+            # it, which would move the wrong tracks, so check that the indices are current
+            playlist = SpotifyCollection(self._playlist(playlist_id))
+
+            if playlist.snapshot_id == snapshot_id:
+                try:
+                    new_snapshot_id = self.sp_user.playlist_reorder_items(
+                        playlist_id,
+                        range_start,
+                        insert_before,
+                        range_length=range_length,
+                        snapshot_id=snapshot_id
+                    )["snapshot_id"]
+                except SpotifyException as e:
+                    if not _is_snapshot_conflict(e):
+                        raise e
+
+                    current_app.logger.info(f"Reorder of {playlist_id} rejected for snapshot {snapshot_id}: {e}")
+                else:
+                    self._update_cached_collection(
+                        playlist,
+                        new_snapshot_id,
+                        playlist.total_tracks,
+                        lambda albums: collection_albums.move_tracks(
+                            albums, range_start, insert_before, range_length, playlist.total_tracks
+                        )
+                    )
+
+                    return new_snapshot_id, False
+
         # Get the collection for the playlist
         collection = self.get_collection(playlist_id)
 
@@ -229,22 +486,39 @@ class SpotifyUserInterface(spotify_iface.SpotifyInterface):
                 break
 
         # Execute the reorder command
-        self.sp_user.playlist_reorder_items(
+        new_snapshot_id = self.sp_user.playlist_reorder_items(
             playlist_id,
             curr_index,
             dest_index,
-            range_length=num_tracks
+            range_length=num_tracks,
+            snapshot_id=collection.snapshot_id
+        )["snapshot_id"]
+
+        self._update_cached_collection(
+            collection,
+            new_snapshot_id,
+            collection.total_tracks,
+            lambda albums: collection_albums.move_tracks(
+                albums, curr_index, dest_index, num_tracks, collection.total_tracks
+            )
         )
 
+        return new_snapshot_id, True
+
+    @rate_limiter.bulk()
+    @call_metrics.measured
     def shuffle_collection(
         self,
-        spotify_collection: SpotifyCollection
+        spotify_collection: SpotifyCollection,
+        progress: Callable[[int, int], None] = None
     ):
         """Shuffles the spotify playlist underlying the given collection
         by rearranging its albums.
 
         Assumes that there are at least two items in the playlist (with one it's pointless
         obviously but also the random.choices() function would fail)
+
+        `progress` is passed on to `add_items_to_playlist`
         """
         # Create a list of tracks that will comprise the shuffled collection
         shuffled_collection_tracks = []
@@ -258,22 +532,31 @@ class SpotifyUserInterface(spotify_iface.SpotifyInterface):
         # Replace the previous playlist with the new order
         # NOTE: This means that any non-track items in the playlist (ex: podcasts) will be removed
         self.sp_user.user_playlist_replace_tracks(self.user_id, spotify_collection.id, [])
-        self.add_items_to_playlist(spotify_collection.id, shuffled_collection_tracks)
+        self.add_items_to_playlist(spotify_collection.id, shuffled_collection_tracks, progress=progress)
 
-    def fill_collection_missing_tracks(self, source_collection: SpotifyCollection, destination_playlist_id: str):
+    @rate_limiter.bulk()
+    @call_metrics.measured
+    def fill_collection_missing_tracks(
+        self,
+        source_collection: SpotifyCollection,
+        destination_playlist_id: str,
+        progress: Callable[[int, int], None] = None
+    ):
         """Replace the destination playlist with tracks that include the full list of tracks for
         every album in the source collection. The previously incomplete album tracks are inserted
         where the first track was encountered for that album in the source collection.
 
+        `progress` is passed on to `add_items_to_playlist`
+
         TODO: This is a good candidate for trying out with unit testing first - maybe
         """
-        # Create a dictionary of album id to album for the incomplete albums in the collection
-        incomplete_albums = {album.id: album for album in source_collection.albums if not album.complete}
-
-        # Make API requests to record the full list of track ids for each
-        # of the currently incomplete albums
-        for album in incomplete_albums.values():
-            album.track_ids = self.get_album_track_ids(album.id)
+        # Make API requests to get the full list of track ids for each of the
+        # currently incomplete albums in the collection. The collection's albums
+        # themselves are left as they are, since they may be shared with other requests
+        album_track_ids = self.get_albums_track_ids(
+            [album.id for album in source_collection.albums if not album.complete]
+        )
+        filled_album_ids = set()
 
         # Build a list of items to replace the current playlist.
         # Iterate through the current playlist. When the first track from an
@@ -283,12 +566,11 @@ class SpotifyUserInterface(spotify_iface.SpotifyInterface):
         # encountered, simply add it's uri to the list to retain its presence in
         # the playlist.
         new_playlist_items = []
-        for playlist_track in self.get_playlist_tracks(source_collection.id):
-            if playlist_track.album.id in incomplete_albums:
-                incomplete_album = incomplete_albums[playlist_track.album.id]
-                if not incomplete_album.complete:
-                    new_playlist_items.extend(incomplete_album.track_ids)
-                    incomplete_album.complete = True
+        for playlist_track in self.iter_playlist_tracks(source_collection.id, source_collection.total_tracks):
+            if playlist_track.album.id in album_track_ids:
+                if playlist_track.album.id not in filled_album_ids:
+                    new_playlist_items.extend(album_track_ids[playlist_track.album.id])
+                    filled_album_ids.add(playlist_track.album.id)
                 else:
                     # Ignore subsequent tracks from this incomplete album
                     pass
@@ -299,27 +581,87 @@ class SpotifyUserInterface(spotify_iface.SpotifyInterface):
         self.sp_user.user_playlist_replace_tracks(self.user_id, destination_playlist_id, [])
 
         # Add the new list of items to the playlist
-        self.add_items_to_playlist(destination_playlist_id, new_playlist_items)
+        self.add_items_to_playlist(destination_playlist_id, new_playlist_items, progress=progress)
+
+    '''PRIVATE FUNCTIONS'''
+
+    def _update_cached_collection(
+        self,
+        collection: SpotifyCollection,
+        new_snapshot_id: str,
+        new_total_tracks: int,
+        edit: Callable[[List[SpotifyAlbum]], Optional[int]]
+    ) -> bool:
+        """Apply an edit that was just made to the collection's playlist to its cached
+        albums (see `collection_cache.update`), if nothing else changed the playlist.
+
+        `collection` is the playlist as it was read right before the edit was made to
+        its snapshot. Spotify makes a change to an outdated snapshot instead of
+        rejecting it, and returns a new snapshot either way, so the new snapshot isn't
+        enough to tell that the playlist is as the edit left it. The playlist is read
+        again, and the albums are only updated if it's still at the new snapshot, with
+        the number of tracks that the edit left. Otherwise the cached albums are left
+        for the old snapshot, and the playlist is parsed again the next time it's loaded.
+        (Only a change that keeps the number of tracks, made between `collection` being
+        read and the edit, can't be told apart this way.)
+
+        Returns whether the cached albums were updated.
+        """
+        playlist = SpotifyCollection(self._playlist(collection.id))
+
+        if playlist.snapshot_id != new_snapshot_id or playlist.total_tracks != new_total_tracks:
+            current_app.logger.info(
+                f"Playlist {collection.id} changed while editing snapshot {collection.snapshot_id},"
+                f" not updating its cached collection"
+            )
+            return False
+
+        return collection_cache.update(collection.id, collection.snapshot_id, new_snapshot_id, edit)
 
     '''SPOTIPY WRAPPER FUNCTIONS'''
 
+    @call_metrics.measured
     def _playlist(self, playlist_id: str) -> Dict:
         """Call spotipy playlist method with User OAuth interface
 
         This overrides the parent method
         """
-        return self.sp_user.playlist(playlist_id)
+        return self.sp_user.playlist(playlist_id, fields=spotify_iface.PLAYLIST_FIELDS)
 
+    @call_metrics.measured
     def _playlist_tracks(self, playlist_id, track_offset: int, track_limit: int) -> Dict:
-        """Call spotipy playlist_tracks method with User OAuth interface
+        """Call spotipy playlist_items method (for tracks) with User OAuth interface
 
         This overrides the parent method
         """
-        return self.sp_user.playlist_tracks(playlist_id, limit=track_limit, offset=track_offset)
+        return self.sp_user.playlist_items(
+            playlist_id,
+            fields=spotify_iface.PLAYLIST_ITEMS_FIELDS,
+            limit=track_limit,
+            offset=track_offset,
+            additional_types=('track',)
+        )
+
+    @call_metrics.measured
+    def _current_user_playlists(self, offset: int, limit: int = USER_PLAYLISTS_LIMIT) -> Dict:
+        """Call spotipy current_user_playlists method with User OAuth interface
+
+        NOTE: The user playlists endpoint doesn't take a fields filter
+        """
+        return self.sp_user.current_user_playlists(limit=limit, offset=offset)
 
 
 """HELPER FUNCTIONS"""
 
 
+def _is_snapshot_conflict(e: SpotifyException) -> bool:
+    """Check whether spotify rejected a change since it was made against an outdated
+    snapshot of the playlist, rather than for anything else wrong with the request
+    """
+    # Spotipy puts the url of the request before spotify's message
+    message = e.msg.split('\n', 1)[-1]
+    return e.http_status == SNAPSHOT_CONFLICT_STATUS and SNAPSHOT_CONFLICT_MESSAGE in message.lower()
+
+
 def _track_uri_from_id(id: str) -> str:
     return f"spotify:track:{id}"
@@ -1,4 +1,5 @@
 from spotipy.cache_handler import CacheHandler
+from spotipy.oauth2 import SpotifyAuthBase
 
 
 class FlaskSessionCacheHandler(CacheHandler):
@@ -15,3 +16,40 @@ class FlaskSessionCacheHandler(CacheHandler):
 
     def remove_cached_token(self):
         self.flask_session.pop('flask_session_cache_token', None)
+
+
+class AppCacheHandler(CacheHandler):
+    """Flask-Caching handler for spotipy, for a token that's shared by every worker
+
+    A copy of the token is kept in memory, so the cache is only read again once
+    the copy is about to expire (by which time another worker may have already
+    refreshed it).
+    """
+
+    def __init__(self, app_cache, key) -> None:
+        self.app_cache = app_cache
+        self.key = key
+        self.token_info = None
+
+    def get_cached_token(self):
+        token_info = self.token_info
+
+        if token_info is None or SpotifyAuthBase.is_token_expired(token_info):
+            try:
+                cached_token_info = self.app_cache.get(self.key)
+            except Exception:
+                # Outside of an app context, or the cache is down
+                cached_token_info = None
+
+            if cached_token_info is not None:
+                token_info = self.token_info = cached_token_info
+
+        return token_info
+
+    def save_token_to_cache(self, token_info):
+        self.token_info = token_info
+
+        try:
+            self.app_cache.set(self.key, token_info, timeout=token_info['expires_in'])
+        except Exception:
+            pass
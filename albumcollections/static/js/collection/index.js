@@ -2,6 +2,10 @@
 
 let playlist_id;
 
+// Whether a move of an album is waiting on spotify. Each change to the playlist is made
+// against the snapshot that the previous one returned, so only one is made at a time
+let move_in_flight = false;
+
 /* Sortable collection list */
 // NOTE: I'm leaving this here just so I remember that I tested this out with a simple
 // case. auto scroll is just really messed up. Especially with touch screen, but even destop
@@ -37,15 +41,27 @@ var sortable_collection = new Sortable(collection_list, {
         evt.item.querySelector(".album_card").classList.remove('bg-primary')       
     },
     onEnd: function (evt) {
-        // Get the album ids of the albums needed to execute the reorder
-        moved_album_id = evt.item.getAttribute('data-album_id')
-        if (evt.item.nextElementSibling) {
-            next_album_id = evt.item.nextElementSibling.getAttribute('data-album_id')
-        }
-        else {
-            next_album_id = null
+        // Nothing to do if the album was dropped back where it was
+        if (evt.oldIndex === evt.newIndex) {
+            return
         }
 
+        // Get the album ids of the albums needed to execute the reorder
+        const next_item = evt.item.nextElementSibling
+        const moved_album_id = evt.item.getAttribute('data-album_id')
+        const next_album_id = next_item ? next_item.getAttribute('data-album_id') : null
+
+        // Get the playlist indices of the move, as of the snapshot the page was rendered from
+        const range_start = parseInt(evt.item.getAttribute('data-album_index'))
+        const range_length = parseInt(evt.item.getAttribute('data-album_num_tracks'))
+        const insert_before = next_item
+            ? parseInt(next_item.getAttribute('data-album_index'))
+            : parseInt(collection_list.getAttribute('data-total_tracks'))
+
+        // Hold off other moves until spotify returns this one's snapshot
+        move_in_flight = true
+        update_sortable_disabled()
+
         // Keep album card blue until movement completed (spotify api returns)
         evt.item.querySelector(".album_card").classList.add('bg-primary')
         evt.item.querySelector(".album_card").classList.remove('bg-light')
@@ -54,11 +70,26 @@ var sortable_collection = new Sortable(collection_list, {
             data: JSON.stringify({
                 playlist_id: playlist_id,
                 moved_album_id: moved_album_id,
-                next_album_id: next_album_id
+                next_album_id: next_album_id,
+                range_start: range_start,
+                insert_before: insert_before,
+                range_length: range_length,
+                snapshot_id: collection_list.getAttribute('data-snapshot_id')
             }),
             contentType: 'application/json'
         }).done(function (response) {
             if (response["success"]) {
+                // The playlist had changed since the page was rendered, so the indices on the page
+                // are out of date. Reload to get the current collection
+                if (response["snapshot_changed"]) {
+                    location.reload()
+                    return
+                }
+
+                // Keep the page's indices in line with the playlist for the next move
+                collection_list.setAttribute('data-snapshot_id', response["snapshot_id"])
+                shift_album_indices(range_start, insert_before, range_length)
+
                 // Remove color from album card to indicate movement locked in (spotify api returned)
                 evt.item.querySelector(".album_card").classList.add('bg-light')
                 evt.item.querySelector(".album_card").classList.remove('bg-primary')        
@@ -72,6 +103,9 @@ var sortable_collection = new Sortable(collection_list, {
             }
         }).fail(function() {
             alert("Sorry, a server failure occured.")
+        }).always(function() {
+            move_in_flight = false
+            update_sortable_disabled()
         });
     }
 });
@@ -102,6 +136,50 @@ function init(play_id, play_owner_id, user_id) {
     }
 }
 
+function shift_album_indices(range_start, insert_before, range_length) {
+    /* Update album playlist indices after the tracks in [range_start, range_start + range_length)
+    were moved to before the track at insert_before */
+    document.querySelectorAll('.album_item').forEach(item => {
+        index = parseInt(item.getAttribute('data-album_index'))
+
+        if (index >= range_start && index < range_start + range_length) {
+            // Moved album
+            if (insert_before > range_start) {
+                index += insert_before - range_start - range_length
+            } else {
+                index -= range_start - insert_before
+            }
+        } else if (insert_before > range_start && index >= range_start + range_length && index < insert_before) {
+            // Album between the old and new position of a move later in the playlist
+            index -= range_length
+        } else if (insert_before < range_start && index >= insert_before && index < range_start) {
+            // Album between the new and old position of a move earlier in the playlist
+            index += range_length
+        }
+
+        item.setAttribute('data-album_index', index)
+    })
+}
+
+function update_sortable_disabled() {
+    /* Only allow albums to be dragged while reordering is active, and no move is in flight */
+    sortable_collection.option(
+        "disabled", move_in_flight || !document.getElementById('reorder-active').checked
+    )
+}
+
+function remove_album_indices(range_start, range_length) {
+    /* Update album playlist indices after the tracks in [range_start, range_start + range_length)
+    were removed */
+    document.querySelectorAll('.album_item').forEach(item => {
+        index = parseInt(item.getAttribute('data-album_index'))
+
+        if (index >= range_start + range_length) {
+            item.setAttribute('data-album_index', index - range_length)
+        }
+    })
+}
+
 /* Event Listeners */
 
 document.querySelectorAll('.album_card').forEach(item => {
@@ -200,17 +278,38 @@ document.getElementById("album_control_modal_remove").addEventListener("click",
     album_id = album_item.getAttribute("data-album_id")
     album_name = album_item.getAttribute("data-album_name")
 
-    if (confirm(`Are you sure you want to remove ${album_name} from the collection?`)) {
+    if (move_in_flight) {
+        alert("Please wait for the album move to finish.")
+    }
+    else if (confirm(`Are you sure you want to remove ${album_name} from the collection?`)) {
         $('.remove_album_load_item').show()
         $('.album_control_bar').hide()
         $.post('/collection/remove_album', {
             playlist_id: playlist_id,
-            album_id: album_id
+            album_id: album_id,
+            snapshot_id: collection_list.getAttribute('data-snapshot_id')
         }).done(function (response) {
             if (response["success"]) {
+                // The playlist had changed since the page was rendered, or the album's tracks
+                // weren't all together, so the indices on the page can't just be shifted.
+                // Reload to get the current collection
+                if (response["snapshot_changed"] || album_item.classList.contains('incomplete_album')) {
+                    location.reload()
+                    return
+                }
+
+                // Keep the page's indices in line with the playlist for the next move
+                const range_start = parseInt(album_item.getAttribute('data-album_index'))
+                const range_length = parseInt(album_item.getAttribute('data-album_num_tracks'))
+                collection_list.setAttribute('data-snapshot_id', response["snapshot_id"])
+                collection_list.setAttribute(
+                    'data-total_tracks', parseInt(collection_list.getAttribute('data-total_tracks')) - range_length
+                )
+                album_item.remove()
+                remove_album_indices(range_start, range_length)
+
                 $('.remove_album_load_item').hide()
                 $('.album_control_bar').show()
-                $(album_item).hide()
                 $('#album_control_modal').modal('hide')
             }
             else {
@@ -229,9 +328,9 @@ document.getElementById("album_control_modal_remove").addEventListener("click",
 document.getElementById('reorder-active').addEventListener("change", function() {
     // Enable sorting of the list of albums based on the 'reorder-active' checkbox
     // Apply styling dependent on whether reordering is active
-    if (this.checked) {
-        sortable_collection.option("disabled", false)
+    update_sortable_disabled()
 
+    if (this.checked) {
         var elements = document.getElementsByClassName('album_item')
         for(var i = 0; i < elements.length; i++) {
             elements[i].style.cursor = "grab";
@@ -269,8 +368,6 @@ document.getElementById('reorder-active').addEventListener("change", function()
         }
     }
     else {
-        sortable_collection.option("disabled", true)
-
         var elements = document.getElementsByClassName('album_item')
         for(var i = 0; i < elements.length; i++) {
             elements[i].style.cursor = "default";
@@ -1,4 +1,35 @@
+// Number of milliseconds between checks on a job's progress
+const JOB_POLL_INTERVAL = 1000
+
 window.onload = function() {
     redirect_url = document.getElementById("redirect_url").getAttribute("data-redirect-url")
-    window.location.replace(redirect_url)
-}
\ No newline at end of file
+    job_url = document.getElementById("redirect_url").getAttribute("data-job-url")
+
+    // Redirect once the job is over, if the page is waiting on one
+    if (job_url) {
+        poll_job(job_url, redirect_url)
+    } else {
+        window.location.replace(redirect_url)
+    }
+}
+
+function poll_job(job_url, redirect_url) {
+    $.getJSON(job_url)
+        .done(function(job) {
+            if (job.status == "failed") {
+                alert(`Sorry, something went wrong.\n\n${job["exception"]}`)
+            }
+            if (job.status == "done" || job.status == "failed") {
+                window.location.replace(redirect_url)
+                return
+            }
+
+            if (job.total) {
+                $('#job_progress').text(Math.floor(100 * job.done / job.total) + "%")
+            }
+            setTimeout(poll_job, JOB_POLL_INTERVAL, job_url, redirect_url)
+        })
+        .fail(function() {
+            window.location.replace(redirect_url)
+        })
+}
@@ -18,6 +18,14 @@ from albumcollections import db
 bp = Blueprint('user', __name__)
 
 
+"""REQUEST TEARDOWN"""
+
+
+@bp.teardown_app_request
+def forget_request_state(exception=None):
+    spotify_user_iface.forget_request_state()
+
+
 """JINJA VARIABLE INJECTION"""
 
 
@@ -43,7 +51,7 @@ def get_user() -> AcUser:
     exceptions
     """
     if is_user_logged_in():
-        return AcUser.query.filter_by(spotify_user_id=spotify_user_iface.SpotifyUserInterface().user_id).first()
+        return AcUser.query.filter_by(spotify_user_id=spotify_user_iface.get_user_interface().user_id).first()
 
     raise Exception("Failed to get user id - user not logged in to spotify")
 
@@ -51,10 +59,19 @@ def get_user() -> AcUser:
 def get_user_id() -> int:
     """Get the user's database id.
 
+    The id is cached along with the user's profile info in their session.
+
     This function must be called within a try block to catch
     exceptions
     """
-    return get_user().id
+    profile = spotify_user_iface.get_cached_profile()
+    if is_user_logged_in() and profile is not None and 'ac_user_id' in profile:
+        return profile['ac_user_id']
+
+    user_id = get_user().id
+    spotify_user_iface.update_cached_profile(ac_user_id=user_id)
+
+    return user_id
 
 
 from albumcollections.user import handlers
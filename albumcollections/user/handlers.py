@@ -47,7 +47,7 @@ def sp_auth_complete():
         try:
             spotify_user_iface.auth_user(request.args.get("code"))
 
-            spotify_user = spotify_user_iface.SpotifyUserInterface()
+            spotify_user = spotify_user_iface.get_user_interface()
 
             if AcUser.query.filter_by(spotify_user_id=spotify_user.user_id).first() is None:
                 db.session.add(AcUser(spotify_user_id=spotify_user.user_id))
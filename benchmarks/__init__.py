@@ -0,0 +1,5 @@
+"""Benchmarks for the collection loading pipeline.
+
+These are not unit tests. Run a benchmark module from the top level
+albumcollections directory, ex: `python -m benchmarks.collection_items`
+"""
@@ -0,0 +1,74 @@
+"""Measure the size of a collection's cached albums and the time to encode and
+decode them, for the pickled album list that used to be cached and for the
+compact encoding of `collection_encoding`. Decoding is measured both without
+building any albums (as when a request only touches a few of them) and with
+every album built (as when the collection page is rendered).
+"""
+
+import pickle
+import time
+
+from albumcollections.spotify import collection_albums, collection_encoding
+from albumcollections.spotify.item.spotify_item_interner import SpotifyItemInterner
+from albumcollections.spotify.item.spotify_music import SpotifyTrack
+
+from benchmarks import synthetic
+
+REPEATS = 10
+
+
+def timed(func) -> float:
+    """Return the average time in seconds of calling `func`"""
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        func()
+
+    return (time.perf_counter() - start) / REPEATS
+
+
+def measure(albums, encode, decode, build_all):
+    """Return the (encoded size in bytes, encode time, decode time, decode and build
+    time in seconds) of the given albums
+    """
+    data = encode(albums)
+
+    # Make sure that nothing is lost on the way
+    decoded_albums = build_all(decode(data))
+    assert [
+        (album.id, album.name, album.link, album.img_url, album.track_ids, album.complete, album.playlist_index)
+        for album in decoded_albums
+    ] == [
+        (album.id, album.name, album.link, album.img_url, album.track_ids, album.complete, album.playlist_index)
+        for album in albums
+    ]
+
+    return (
+        len(data),
+        timed(lambda: encode(albums)),
+        timed(lambda: decode(data)),
+        timed(lambda: build_all(decode(data))),
+    )
+
+
+def main():
+    encodings = {
+        "pickle": (lambda albums: pickle.dumps(albums, pickle.HIGHEST_PROTOCOL), pickle.loads, list),
+        "compact": (collection_encoding.encode, collection_encoding.decode, list),
+    }
+
+    print(f"{'albums':>7} {'encoding':>9} {'KiB':>8} {'encode ms':>10} {'decode ms':>10} {'build all ms':>13}")
+    for num_albums in (50, 500, 2000):
+        interner = SpotifyItemInterner()
+        tracks = [SpotifyTrack(spotify_track, interner) for spotify_track in synthetic.playlist_tracks(num_albums)]
+        albums = collection_albums.get(iter(tracks))
+
+        for name, (encode, decode, build_all) in encodings.items():
+            size, encode_time, decode_time, build_time = measure(albums, encode, decode, build_all)
+            print(
+                f"{len(albums):>7} {name:>9} {size / 1024:>8.1f} {encode_time * 1000:>10.2f}"
+                f" {decode_time * 1000:>10.2f} {build_time * 1000:>13.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
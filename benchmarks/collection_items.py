@@ -0,0 +1,47 @@
+"""Measure the memory taken by a collection's `SpotifyTrack` objects, and the
+pickled size of the album list parsed from them (which is what gets cached as
+`collection_albums_<id>`), with and without item interning.
+"""
+
+import pickle
+import time
+import tracemalloc
+
+from albumcollections.spotify import collection_albums
+from albumcollections.spotify.item.spotify_item_interner import SpotifyItemInterner
+from albumcollections.spotify.item.spotify_music import SpotifyTrack
+
+from benchmarks import synthetic
+
+
+def measure(spotify_tracks, interned: bool):
+    """Return the (number of albums, track memory in bytes, build time in seconds,
+    pickled album list size in bytes)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    interner = SpotifyItemInterner() if interned else None
+    tracks = [SpotifyTrack(spotify_track, interner) for spotify_track in spotify_tracks]
+    build_time = time.perf_counter() - start
+    track_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    albums = collection_albums.get(iter(tracks))
+
+    return len(albums), track_memory, build_time, len(pickle.dumps(albums, pickle.HIGHEST_PROTOCOL))
+
+
+def main():
+    print(f"{'albums':>7} {'tracks':>7} {'interned':>9} {'track KiB':>10} {'build ms':>9} {'pickle KiB':>11}")
+    for num_albums in (50, 500, 2000):
+        spotify_tracks = synthetic.playlist_tracks(num_albums)
+        for interned in (False, True):
+            albums, track_memory, build_time, pickled = measure(spotify_tracks, interned)
+            print(
+                f"{albums:>7} {len(spotify_tracks):>7} {str(interned):>9} {track_memory / 1024:>10.0f}"
+                f" {build_time * 1000:>9.1f} {pickled / 1024:>11.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,667 @@
+"""A local stand-in for the spotify web api and accounts service, for load testing
+the app end to end without touching spotify.
+
+It serves the endpoints that `SpotifyInterface` and `SpotifyUserInterface` use,
+with stateful playlists whose snapshot ids change with every edit, and ETags
+that it answers with 304 Not Modified when they still match. Every user
+that logs in gets their own seeded synthetic playlists (see
+`synthetic.playlist_items`). Responses can be slowed down by a latency with
+jitter, and a share of them can be replaced by server errors or rate limiting.
+
+Point the app at it with these environment variables (or the matching config
+values), plus any client id and secret:
+
+    SPOTIFY_API_URL=http://127.0.0.1:8099/v1/
+    SPOTIFY_ACCOUNTS_URL=http://127.0.0.1:8099
+    SPOTIPY_REDIRECT_URI=http://127.0.0.1:5000/sp_auth_complete
+
+Run it on its own with `python -m benchmarks.fake_spotify --port 8099`, or let
+`benchmarks.load` start it.
+"""
+
+import argparse
+from collections import Counter
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from benchmarks import synthetic
+
+# Max number of items in one page, and in one change to a playlist
+PLAYLIST_ITEMS_LIMIT = 100
+USER_PLAYLISTS_LIMIT = 50
+ALBUM_TRACKS_LIMIT = 50
+ALBUMS_LIMIT = 20
+
+TOKEN_EXPIRES_IN = 3600
+
+CLIENT_TOKEN = "client-credentials"
+
+# Statuses of injected server errors, which spotipy retries
+ERROR_STATUSES = (500, 502, 503)
+
+
+class SpotifyError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class FakeSpotify:
+    """The state of the fake service: users, their playlists and the album catalog.
+
+    Each user gets `playlists_per_user` playlists of `playlist_size` items when they
+    first log in. Everything is guarded by one lock, so that concurrent edits are
+    applied one at a time like spotify does.
+    """
+
+    def __init__(self, playlists_per_user: int = 3, playlist_size: int = 500, seed: int = 0):
+        self.playlists_per_user = playlists_per_user
+        self.playlist_size = playlist_size
+        self.seed = seed
+
+        self.lock = threading.Lock()
+        self.users = {}
+        self.playlists = {}
+        self.tracks = {}
+        self.albums = {}
+        self.tokens = {CLIENT_TOKEN: None}
+
+        # Number of requests served by endpoint
+        self.request_counts = Counter()
+
+    '''ACCOUNTS'''
+
+    def new_user(self) -> str:
+        """Create a user with their seeded playlists, returning their id"""
+        with self.lock:
+            user_num = len(self.users)
+            user_id = f"user{user_num}"
+            self.users[user_id] = {"display_name": f"User {user_num}", "playlist_ids": []}
+
+            for playlist_num in range(self.playlists_per_user):
+                namespace = f"u{user_num}p{playlist_num}"
+                items = synthetic.playlist_items(
+                    self.playlist_size, self.seed + user_num * self.playlists_per_user + playlist_num, namespace
+                )
+                self._create_playlist(user_id, f"Playlist {namespace}", [item["track"] for item in items])
+
+        return user_id
+
+    def grant_token(self, user_id: Optional[str]) -> Dict:
+        """Make a token for the user, or a client credentials token for None"""
+        access_token = CLIENT_TOKEN if user_id is None else f"token-{user_id}"
+        with self.lock:
+            self.tokens[access_token] = user_id
+
+        token_info = {"access_token": access_token, "token_type": "Bearer", "expires_in": TOKEN_EXPIRES_IN}
+        if user_id is not None:
+            token_info.update(refresh_token=f"refresh-{user_id}", scope="playlist-read-private")
+
+        return token_info
+
+    def user_for_token(self, access_token: str) -> Optional[str]:
+        with self.lock:
+            if access_token not in self.tokens:
+                raise SpotifyError(401, "Invalid access token")
+            return self.tokens[access_token]
+
+    '''API'''
+
+    def me(self, user_id: str) -> Dict:
+        user = self._user(user_id)
+        return {"id": user_id, "display_name": user["display_name"], "type": "user", "uri": f"spotify:user:{user_id}"}
+
+    def user_playlists(self, user_id: str, offset: int, limit: int) -> Dict:
+        limit = min(limit, USER_PLAYLISTS_LIMIT)
+        with self.lock:
+            playlist_ids = self._user(user_id)["playlist_ids"]
+            items = [self._playlist_object(self.playlists[id], with_items=False)
+                     for id in playlist_ids[offset:offset + limit]]
+            return _page(items, offset, limit, len(playlist_ids))
+
+    def create_playlist(self, user_id: str, name: str) -> Dict:
+        with self.lock:
+            return self._playlist_object(self._create_playlist(user_id, name, []))
+
+    def unfollow_playlist(self, user_id: str, playlist_id: str):
+        with self.lock:
+            playlist_ids = self._user(user_id)["playlist_ids"]
+            if playlist_id in playlist_ids:
+                playlist_ids.remove(playlist_id)
+
+    def playlist(self, playlist_id: str) -> Dict:
+        with self.lock:
+            return self._playlist_object(self._playlist(playlist_id))
+
+    def snapshot(self, playlist_id: str) -> Tuple[List[Dict], str]:
+        """Get a copy of the playlist's tracks, and its snapshot id"""
+        with self.lock:
+            playlist = self._playlist(playlist_id)
+            return list(playlist["tracks"]), _snapshot_id(playlist)
+
+    def playlist_items(self, playlist_id: str, offset: int, limit: int) -> Dict:
+        limit = min(limit, PLAYLIST_ITEMS_LIMIT)
+        with self.lock:
+            tracks = self._playlist(playlist_id)["tracks"]
+            items = [synthetic.playlist_item(spotify_track) for spotify_track in tracks[offset:offset + limit]]
+            return _page(items, offset, limit, len(tracks))
+
+    def add_items(self, user_id: str, playlist_id: str, uris: List[str], position: Optional[int]) -> Dict:
+        with self.lock:
+            playlist = self._owned_playlist(user_id, playlist_id)
+            new_tracks = self._tracks_for_uris(uris)
+
+            position = len(playlist["tracks"]) if position is None else position
+            playlist["tracks"][position:position] = new_tracks
+
+            return self._changed(playlist)
+
+    def replace_items(self, user_id: str, playlist_id: str, uris: List[str]) -> Dict:
+        with self.lock:
+            playlist = self._owned_playlist(user_id, playlist_id)
+            playlist["tracks"] = self._tracks_for_uris(uris)
+
+            return self._changed(playlist)
+
+    def reorder_items(
+        self,
+        user_id: str,
+        playlist_id: str,
+        range_start: int,
+        insert_before: int,
+        range_length: int,
+        snapshot_id: Optional[str]
+    ) -> Dict:
+        with self.lock:
+            playlist = self._owned_playlist(user_id, playlist_id)
+            self._check_snapshot(playlist, snapshot_id)
+
+            tracks = playlist["tracks"]
+            if range_start < 0 or range_length < 1 or range_start + range_length > len(tracks) or \
+                    not 0 <= insert_before <= len(tracks):
+                raise SpotifyError(400, "Index out of bounds")
+
+            moved = tracks[range_start:range_start + range_length]
+            if insert_before > range_start:
+                insert_before -= min(range_length, insert_before - range_start)
+            del tracks[range_start:range_start + range_length]
+            tracks[insert_before:insert_before] = moved
+
+            return self._changed(playlist)
+
+    def remove_items(self, user_id: str, playlist_id: str, uris: List[str], snapshot_id: Optional[str]) -> Dict:
+        if len(uris) > PLAYLIST_ITEMS_LIMIT:
+            raise SpotifyError(400, "Too many ids requested")
+
+        with self.lock:
+            playlist = self._owned_playlist(user_id, playlist_id)
+            self._check_snapshot(playlist, snapshot_id)
+
+            removed_uris = set(uris)
+            playlist["tracks"] = [
+                spotify_track for spotify_track in playlist["tracks"] if spotify_track["uri"] not in removed_uris
+            ]
+
+            return self._changed(playlist)
+
+    def get_albums(self, album_ids: List[str]) -> Dict:
+        if len(album_ids) > ALBUMS_LIMIT:
+            raise SpotifyError(400, "Too many ids requested")
+
+        with self.lock:
+            spotify_albums = []
+            for album_id in album_ids:
+                if album_id in self.albums:
+                    tracks = self._album_tracks(album_id)
+                    spotify_albums.append(dict(
+                        self.albums[album_id]["album"],
+                        tracks=_page([_simplified_track(t) for t in tracks[:ALBUM_TRACKS_LIMIT]],
+                                     0, ALBUM_TRACKS_LIMIT, len(tracks))
+                    ))
+                else:
+                    spotify_albums.append(None)
+
+            return {"albums": spotify_albums}
+
+    def album_tracks(self, album_id: str, offset: int, limit: int) -> Dict:
+        limit = min(limit, ALBUM_TRACKS_LIMIT)
+        with self.lock:
+            if album_id not in self.albums:
+                raise SpotifyError(404, "Non existing id")
+
+            tracks = self._album_tracks(album_id)
+            return _page([_simplified_track(t) for t in tracks[offset:offset + limit]], offset, limit, len(tracks))
+
+    '''PRIVATE FUNCTIONS (called with the lock held)'''
+
+    def _user(self, user_id: str) -> Dict:
+        if user_id not in self.users:
+            raise SpotifyError(401, "This request requires user authentication")
+        return self.users[user_id]
+
+    def _playlist(self, playlist_id: str) -> Dict:
+        if playlist_id not in self.playlists:
+            raise SpotifyError(404, "Not found.")
+        return self.playlists[playlist_id]
+
+    def _owned_playlist(self, user_id: str, playlist_id: str) -> Dict:
+        playlist = self._playlist(playlist_id)
+        if playlist["owner_id"] != user_id:
+            raise SpotifyError(403, "You cannot modify a playlist you don't own")
+        return playlist
+
+    def _create_playlist(self, user_id: str, name: str, tracks: List[Dict]) -> Dict:
+        playlist_id = f"pl{len(self.playlists)}"
+        playlist = {"id": playlist_id, "name": name, "owner_id": user_id, "tracks": [], "version": 0}
+        self.playlists[playlist_id] = playlist
+        self.users[user_id]["playlist_ids"].insert(0, playlist_id)
+
+        for spotify_track in tracks:
+            self._add_to_catalog(spotify_track)
+        playlist["tracks"] = tracks
+
+        return playlist
+
+    def _add_to_catalog(self, spotify_track: Dict):
+        spotify_track = {key: value for key, value in spotify_track.items() if key not in ("episode", "track")}
+        self.tracks[spotify_track["uri"]] = spotify_track
+
+        album_id = spotify_track["album"]["id"]
+        if spotify_track["type"] == "track" and album_id is not None:
+            album = self.albums.setdefault(album_id, {"album": spotify_track["album"], "tracks": {}})
+            album["tracks"][(spotify_track["disc_number"], spotify_track["track_number"])] = spotify_track
+
+    def _album_tracks(self, album_id: str) -> List[Dict]:
+        """Get the album's tracks in order, making up any that no playlist has"""
+        album = self.albums[album_id]
+        tracks = [album["tracks"][key] for key in sorted(album["tracks"])]
+
+        disc_number, track_number = max(album["tracks"])
+        while len(tracks) < album["album"]["total_tracks"]:
+            track_number += 1
+            spotify_track = synthetic.track(album["album"], track_number, disc_number)
+            self._add_to_catalog(spotify_track)
+            tracks.append(self.tracks[spotify_track["uri"]])
+
+        return tracks
+
+    def _tracks_for_uris(self, uris: List[str]) -> List[Dict]:
+        if len(uris) > PLAYLIST_ITEMS_LIMIT:
+            raise SpotifyError(400, "You can add a maximum of 100 tracks per request.")
+
+        try:
+            return [self.tracks[uri] for uri in uris]
+        except KeyError:
+            raise SpotifyError(400, "Payload contains a non-existing ID")
+
+    def _check_snapshot(self, playlist: Dict, snapshot_id: Optional[str]):
+        if snapshot_id is not None and snapshot_id != _snapshot_id(playlist):
+            raise SpotifyError(400, "Invalid snapshot id")
+
+    def _changed(self, playlist: Dict) -> Dict:
+        playlist["version"] += 1
+        return {"snapshot_id": _snapshot_id(playlist)}
+
+    def _playlist_object(self, playlist: Dict, with_items: bool = True) -> Dict:
+        owner = self.users[playlist["owner_id"]]
+
+        spotify_playlist = synthetic.playlist(playlist["id"], playlist["tracks"] if with_items else [])
+        spotify_playlist.update(
+            name=playlist["name"],
+            snapshot_id=_snapshot_id(playlist),
+            owner=dict(spotify_playlist["owner"], id=playlist["owner_id"], display_name=owner["display_name"])
+        )
+        spotify_playlist["tracks"]["total"] = len(playlist["tracks"])
+        if not with_items:
+            spotify_playlist["tracks"] = {"href": spotify_playlist["tracks"]["href"], "total": len(playlist["tracks"])}
+
+        return spotify_playlist
+
+
+class FakeSpotifyServer(ThreadingHTTPServer):
+    """Serves a `FakeSpotify` over http, on a thread per connection.
+
+    Every response is held back for `latency` seconds, give or take up to `jitter`.
+    A share of responses (`error_rate`) are server errors, and another share
+    (`rate_limit_rate`) tell the client to retry after `retry_after` seconds.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address=("127.0.0.1", 0),
+        spotify: FakeSpotify = None,
+        latency: float = 0,
+        jitter: float = 0,
+        error_rate: float = 0,
+        rate_limit_rate: float = 0,
+        retry_after: int = 1,
+        seed: int = 0
+    ):
+        super().__init__(address, _RequestHandler)
+
+        self.spotify = spotify or FakeSpotify(seed=seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        """Serve in a background thread"""
+        thread = threading.Thread(target=self.serve_forever, name="fake-spotify", daemon=True)
+        thread.start()
+        return thread
+
+    def app_config(self) -> Dict:
+        """Get the app config values that point the app at this server"""
+        return {"SPOTIFY_API_URL": f"{self.url}/v1/", "SPOTIFY_ACCOUNTS_URL": self.url}
+
+    def draw(self):
+        """Get the (delay in seconds, injected failure or None) for a response"""
+        with self._rng_lock:
+            delay = max(self.latency + self._rng.uniform(-self.jitter, self.jitter), 0)
+            roll = self._rng.random()
+
+            if roll < self.error_rate:
+                failure = self._rng.choice(ERROR_STATUSES)
+            elif roll < self.error_rate + self.rate_limit_rate:
+                failure = 429
+            else:
+                failure = None
+
+        return delay, failure
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # (method, path pattern, name of the handler method). Paths are matched without
+    # a trailing slash, which spotipy adds to some of them
+    ROUTES = [
+        ("GET", r"/authorize", "_authorize"),
+        ("POST", r"/api/token", "_token"),
+        ("GET", r"/v1/me", "_me"),
+        ("GET", r"/v1/me/playlists", "_user_playlists"),
+        ("POST", r"/v1/(?:me|users/[^/]+)/playlists", "_create_playlist"),
+        ("DELETE", r"/v1/playlists/(?P<playlist_id>[^/]+)/followers", "_unfollow_playlist"),
+        ("GET", r"/v1/playlists/(?P<playlist_id>[^/]+)", "_playlist"),
+        ("GET", r"/v1/playlists/(?P<playlist_id>[^/]+)/(?:items|tracks)", "_playlist_items"),
+        ("POST", r"/v1/playlists/(?P<playlist_id>[^/]+)/(?:items|tracks)", "_add_items"),
+        ("PUT", r"/v1/playlists/(?P<playlist_id>[^/]+)/(?:items|tracks)", "_change_items"),
+        ("DELETE", r"/v1/playlists/(?P<playlist_id>[^/]+)/(?:items|tracks)", "_remove_items"),
+        ("GET", r"/v1/albums", "_albums"),
+        ("GET", r"/v1/albums/(?P<album_id>[^/]+)/tracks", "_album_tracks"),
+    ]
+
+    server: FakeSpotifyServer
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self, method: str):
+        url = urlsplit(self.path)
+        self.query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        for route_method, pattern, handler_name in self.ROUTES:
+            match = re.fullmatch(pattern, url.path.rstrip("/"))
+            if route_method == method and match:
+                break
+        else:
+            return self._send_json(404, {"error": {"status": 404, "message": "Service not found"}})
+
+        self.server.spotify.request_counts[f"{method} {_route_name(pattern)}"] += 1
+
+        delay, failure = self.server.draw()
+        time.sleep(delay)
+
+        if failure == 429:
+            return self._send_json(429, {"error": {"status": 429, "message": "API rate limit exceeded"}},
+                                   {"Retry-After": str(self.server.retry_after)})
+        elif failure is not None:
+            return self._send_json(failure, {"error": {"status": failure, "message": "Injected server error"}})
+
+        try:
+            status, response = getattr(self, handler_name)(body=body, **match.groupdict())
+        except SpotifyError as e:
+            status, response = e.status, {"error": {"status": e.status, "message": str(e)}}
+
+        if status == 302:
+            self._send_empty(302, {"Location": response})
+        elif method == "GET" and status == 200:
+            self._send_json_with_etag(response)
+        else:
+            self._send_json(status, response)
+
+    def _send_json(self, status: int, response, headers: Dict = None):
+        data = json.dumps(response).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json_with_etag(self, response):
+        """Send the response with an ETag of its body, or a 304 if the client already has it"""
+        etag = f'"{hashlib.md5(json.dumps(response).encode()).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send_empty(304, {"ETag": etag})
+        else:
+            self._send_json(200, response, {"ETag": etag})
+
+    def _send_empty(self, status: int, headers: Dict):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _user_id(self) -> str:
+        user_id = self._client_user_id()
+        if user_id is None:
+            raise SpotifyError(401, "This request requires user authentication")
+        return user_id
+
+    def _client_user_id(self) -> Optional[str]:
+        authorization = self.headers.get("Authorization", "")
+        if not authorization.startswith("Bearer "):
+            raise SpotifyError(401, "No token provided")
+        return self.server.spotify.user_for_token(authorization[len("Bearer "):])
+
+    def _project(self, response: Dict) -> Dict:
+        fields = self.query.get("fields")
+        return response if fields is None else synthetic.project(response, fields)
+
+    def _paging(self, default_limit: int):
+        return int(self.query.get("offset", 0)), int(self.query.get("limit", default_limit))
+
+    '''ACCOUNTS HANDLERS'''
+
+    def _authorize(self, body):
+        """Log a new user straight in, sending them back with their id as the code"""
+        user_id = self.server.spotify.new_user()
+        params = {"code": user_id}
+        if "state" in self.query:
+            params["state"] = self.query["state"]
+        return 302, f"{self.query['redirect_uri']}?{urlencode(params)}"
+
+    def _token(self, body):
+        form = {name: values[0] for name, values in parse_qs(body.decode()).items()}
+
+        grant_type = form.get("grant_type")
+        if grant_type == "client_credentials":
+            return 200, self.server.spotify.grant_token(None)
+        elif grant_type == "authorization_code":
+            user_id = form.get("code")
+        elif grant_type == "refresh_token":
+            refresh_token = form.get("refresh_token", "")
+            user_id = refresh_token[len("refresh-"):] if refresh_token.startswith("refresh-") else refresh_token
+        else:
+            return 400, {"error": "unsupported_grant_type"}
+
+        if user_id not in self.server.spotify.users:
+            return 400, {"error": "invalid_grant"}
+        return 200, self.server.spotify.grant_token(user_id)
+
+    '''API HANDLERS'''
+
+    def _me(self, body):
+        return 200, self.server.spotify.me(self._user_id())
+
+    def _user_playlists(self, body):
+        return 200, self.server.spotify.user_playlists(self._user_id(), *self._paging(USER_PLAYLISTS_LIMIT))
+
+    def _create_playlist(self, body):
+        return 201, self.server.spotify.create_playlist(self._user_id(), json.loads(body)["name"])
+
+    def _unfollow_playlist(self, body, playlist_id):
+        self.server.spotify.unfollow_playlist(self._user_id(), playlist_id)
+        return 200, {}
+
+    def _playlist(self, body, playlist_id):
+        self._client_user_id()
+        return 200, self._project(self.server.spotify.playlist(playlist_id))
+
+    def _playlist_items(self, body, playlist_id):
+        self._client_user_id()
+        offset, limit = self._paging(PLAYLIST_ITEMS_LIMIT)
+        return 200, self._project(self.server.spotify.playlist_items(playlist_id, offset, limit))
+
+    def _add_items(self, body, playlist_id):
+        payload = json.loads(body) if body else {}
+        uris = payload["uris"] if isinstance(payload, dict) else payload
+        position = payload.get("position", self.query.get("position")) if isinstance(payload, dict) \
+            else self.query.get("position")
+
+        return 201, self.server.spotify.add_items(
+            self._user_id(), playlist_id, uris, None if position is None else int(position)
+        )
+
+    def _change_items(self, body, playlist_id):
+        payload = json.loads(body) if body else {}
+
+        if "range_start" in payload:
+            return 200, self.server.spotify.reorder_items(
+                self._user_id(),
+                playlist_id,
+                payload["range_start"],
+                payload["insert_before"],
+                payload.get("range_length", 1),
+                payload.get("snapshot_id")
+            )
+
+        uris = payload.get("uris")
+        if uris is None:
+            uris = [uri for uri in self.query.get("uris", "").split(",") if uri]
+        return 201, self.server.spotify.replace_items(self._user_id(), playlist_id, uris)
+
+    def _remove_items(self, body, playlist_id):
+        payload = json.loads(body)
+        items = payload.get("items", payload.get("tracks", []))
+        return 200, self.server.spotify.remove_items(
+            self._user_id(), playlist_id, [item["uri"] for item in items], payload.get("snapshot_id")
+        )
+
+    def _albums(self, body):
+        self._client_user_id()
+        return 200, self.server.spotify.get_albums(self.query.get("ids", "").split(","))
+
+    def _album_tracks(self, body, album_id):
+        self._client_user_id()
+        return 200, self.server.spotify.album_tracks(album_id, *self._paging(ALBUM_TRACKS_LIMIT))
+
+
+def _page(items: List, offset: int, limit: int, total: int) -> Dict:
+    return {
+        "items": items,
+        "limit": limit,
+        "offset": offset,
+        "total": total,
+        "next": None if offset + limit >= total else f"offset={offset + limit}",
+        "previous": None if offset == 0 else f"offset={max(offset - limit, 0)}",
+    }
+
+
+def _route_name(pattern: str) -> str:
+    """Make a route's path pattern readable, ex: "/v1/playlists/<playlist_id>/items" """
+    return re.sub(r"\(\?P<(\w+)>\[\^/\]\+\)", r"<\1>", pattern) \
+        .replace("(?:items|tracks)", "items") \
+        .replace("(?:me|users/[^/]+)", "users/<user_id>")
+
+
+def _simplified_track(spotify_track: Dict) -> Dict:
+    return {key: value for key, value in spotify_track.items() if key != "album"}
+
+
+def _snapshot_id(playlist: Dict) -> str:
+    return f"{playlist['id']}-{playlist['version']}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--playlists-per-user", type=int, default=3)
+    parser.add_argument("--playlist-size", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0)
+    parser.add_argument("--retry-after", type=int, default=1, help="seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = FakeSpotifyServer(
+        (args.host, args.port),
+        FakeSpotify(args.playlists_per_user, args.playlist_size, args.seed),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+
+    for name, value in server.app_config().items():
+        print(f"export {name}={value}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
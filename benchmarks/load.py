@@ -0,0 +1,308 @@
+"""Drive the app's routes with concurrent simulated users, against the local
+stand-in for spotify (see `fake_spotify`), and report the p50/p95/p99 response
+times of each route.
+
+Each user logs in through the fake accounts service, adds one of their seeded
+playlists as a collection, and then repeatedly views it, moves an album, removes
+an album and adds it back, and views their collections. Every few rounds they
+shuffle the collection, which is timed until its background job finishes.
+
+By default the app is served in this process, with a temporary database:
+
+    python -m benchmarks.load --users 8 --rounds 5 --latency 0.05 --jitter 0.02
+
+To load an app that's served separately (ex: by gunicorn), start it with the
+environment variables that `fake_spotify` prints, and give its url:
+
+    python -m benchmarks.load --app-url http://127.0.0.1:5000 --spotify-port 8099
+"""
+
+import argparse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from werkzeug.serving import make_server
+
+from albumcollections.config import Config
+from albumcollections.spotify import collection_albums
+from albumcollections.spotify.item.spotify_music import SpotifyTrack
+from albumcollections import create_app
+
+from benchmarks.fake_spotify import FakeSpotify, FakeSpotifyServer
+
+# Seconds between polls of a background job's status, and the longest to wait for one
+JOB_POLL_SECONDS = 0.2
+JOB_TIMEOUT_SECONDS = 120
+
+# Shuffle the collection every this many rounds
+SHUFFLE_EVERY = 3
+
+CSRF_TOKEN_PATTERN = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+
+
+class LoadConfig(Config):
+    CACHE_TYPE = 'SimpleCache'
+    CACHE_THRESHOLD = 10000
+    SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+
+
+class Recorder:
+    """Collects the response times and failures of each route, from every user's thread"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.times = defaultdict(list)
+        self.failures = defaultdict(int)
+
+    def request(self, session: requests.Session, route: str, method: str, url: str, **kwargs) -> requests.Response:
+        """Make a request, recording its time under `route`. A request fails if it has
+        an error status, is a json response with "success": false, or was redirected
+        to the index page (where the app sends errors)
+        """
+        start = time.perf_counter()
+        response = session.request(method, url, **kwargs)
+        seconds = time.perf_counter() - start
+
+        redirected_to_index = bool(response.history) and urlsplit(response.url).path == "/" != urlsplit(url).path
+        self.record(route, seconds, redirected_to_index or _failed(response))
+
+        return response
+
+    def record(self, route: str, seconds: float, failed: bool = False):
+        with self.lock:
+            self.times[route].append(seconds)
+            if failed:
+                self.failures[route] += 1
+
+
+class SimulatedUser:
+    def __init__(self, app_url: str, spotify: FakeSpotify, recorder: Recorder, rng: random.Random):
+        self.app_url = app_url
+        self.spotify = spotify
+        self.recorder = recorder
+        self.rng = rng
+        self.session = requests.Session()
+
+    def run(self, rounds: int):
+        user_id = self.log_in()
+
+        # The user's first seeded playlist
+        playlist_id = self.spotify.users[user_id]["playlist_ids"][-1]
+        self.add_collection(playlist_id)
+
+        for round_num in range(1, rounds + 1):
+            self.request("GET /collection/<id>", "GET", f"/collection/{playlist_id}")
+            self.reorder(playlist_id)
+            self.remove_and_add_album(playlist_id)
+            self.request("GET /", "GET", "/")
+
+            if round_num % SHUFFLE_EVERY == 0:
+                self.shuffle(playlist_id)
+
+    def log_in(self) -> str:
+        """Log in through the fake accounts service, returning the new user's id"""
+        response = self.request("GET /user/login (through /sp_auth_complete)", "GET", "/user/login")
+
+        # The accounts service redirected back to the app with the user's id as the code
+        for redirect_response in response.history:
+            code = parse_qs(urlsplit(redirect_response.headers["Location"]).query).get("code")
+            if code:
+                return code[0]
+
+        raise Exception(f"Failed to log in: {response.url}")
+
+    def add_collection(self, playlist_id: str):
+        index = self.request("GET /", "GET", "/")
+        self.request("POST / (add collection)", "POST", "/", allow_redirects=False, data={
+            "csrf_token": CSRF_TOKEN_PATTERN.search(index.text).group(1),
+            "playlist": playlist_id,
+            "submit_new_collection": "Add",
+        })
+
+    def reorder(self, playlist_id: str):
+        """Move a random album in front of another one, like dragging it on the collection page"""
+        albums, snapshot_id, total_tracks = self.albums(playlist_id)
+        if len(albums) < 2:
+            return
+
+        moved_album, next_album = self.rng.sample(albums, 2)
+        self.request("POST /collection/reorder_collection", "POST", "/collection/reorder_collection", data={
+            "data": json.dumps({
+                "playlist_id": playlist_id,
+                "moved_album_id": moved_album.id,
+                "next_album_id": next_album.id,
+                "range_start": moved_album.playlist_index,
+                "insert_before": next_album.playlist_index,
+                "range_length": moved_album.total_tracks,
+                "snapshot_id": snapshot_id,
+                "total_tracks": total_tracks,
+            })
+        })
+
+    def remove_and_add_album(self, playlist_id: str):
+        albums, _, _ = self.albums(playlist_id)
+        if not albums:
+            return
+
+        album_id = self.rng.choice(albums).id
+        self.request("POST /collection/remove_album", "POST", "/collection/remove_album",
+                     data={"playlist_id": playlist_id, "album_id": album_id})
+        self.request("POST /collection/add_album", "POST", "/collection/add_album",
+                     data={"dest_collection_id": playlist_id, "album_id": album_id})
+
+    def shuffle(self, playlist_id: str):
+        """Shuffle the collection, recording the time until its job is done as well"""
+        start = time.perf_counter()
+        response = self.request("GET /collection/shuffle_collection/<id>", "GET",
+                                f"/collection/shuffle_collection/{playlist_id}", allow_redirects=False)
+
+        job_id = parse_qs(urlsplit(response.headers.get("Location", "")).query).get("job_id", [None])[0]
+        if job_id is None:
+            self.recorder.record("shuffle job", time.perf_counter() - start, failed=True)
+            return
+
+        status = None
+        while status not in ("done", "failed") and time.perf_counter() - start < JOB_TIMEOUT_SECONDS:
+            time.sleep(JOB_POLL_SECONDS)
+            status = self.request("GET /job/<id>", "GET", f"/job/{job_id}").json().get("status")
+
+        self.recorder.record("shuffle job", time.perf_counter() - start, failed=status != "done")
+
+    def albums(self, playlist_id: str):
+        """Get the complete albums in the playlist as spotify has it now, its snapshot id
+        and its number of tracks
+        """
+        tracks, snapshot_id = self.spotify.snapshot(playlist_id)
+        albums = collection_albums.get(SpotifyTrack(spotify_track) for spotify_track in tracks)
+
+        return [album for album in albums if album.complete], snapshot_id, len(tracks)
+
+    def request(self, route: str, method: str, path: str, **kwargs) -> requests.Response:
+        return self.recorder.request(self.session, route, method, f"{self.app_url}{path}", **kwargs)
+
+
+def serve_app(spotify_server: FakeSpotifyServer, requests_per_second: int = None) -> str:
+    """Serve the app in this process, pointed at the fake spotify server, returning its url"""
+    database_dir = tempfile.mkdtemp(prefix="albumcollections-load-")
+
+    class Config(LoadConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(database_dir, 'load.db')}"
+    for name, value in spotify_server.app_config().items():
+        setattr(Config, name, value)
+
+    if requests_per_second is not None:
+        Config.SPOTIFY_REQUESTS_PER_WINDOW = int(requests_per_second * Config.SPOTIFY_REQUEST_WINDOW_SECONDS)
+
+    # Leave the app's own log for errors
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    server = make_server("127.0.0.1", 0, create_app(Config), threaded=True)
+    app_url = f"http://127.0.0.1:{server.server_port}"
+
+    os.environ["SPOTIPY_CLIENT_ID"] = "load-test-client"
+    os.environ["SPOTIPY_CLIENT_SECRET"] = "load-test-secret"
+    os.environ["SPOTIPY_REDIRECT_URI"] = f"{app_url}/sp_auth_complete"
+
+    threading.Thread(target=server.serve_forever, name="app", daemon=True).start()
+
+    return app_url
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Get the nearest-rank percentile of the sorted values"""
+    return sorted_values[max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)]
+
+
+def report(recorder: Recorder, spotify_request_counts: Dict[str, int]):
+    print(f"{'route':<50} {'count':>6} {'failed':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for route, times in sorted(recorder.times.items()):
+        times = sorted(times)
+        print(
+            f"{route:<50} {len(times):>6} {recorder.failures[route]:>6}"
+            + "".join(f" {percentile(times, percent) * 1000:>8.1f}" for percent in (50, 95, 99))
+            + f" {times[-1] * 1000:>8.1f}"
+        )
+
+    print(f"\n{'spotify endpoint':<64} {'requests':>8}")
+    for endpoint, count in sorted(spotify_request_counts.items()):
+        print(f"{endpoint:<64} {count:>8}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=8, help="number of concurrent users")
+    parser.add_argument("--rounds", type=int, default=5, help="number of rounds of actions by each user")
+    parser.add_argument("--playlist-size", type=int, default=500, help="tracks in each seeded playlist")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to each spotify response")
+    parser.add_argument("--jitter", type=float, default=0.02, help="seconds that the latency varies by")
+    parser.add_argument("--error-rate", type=float, default=0, help="share of spotify responses that fail")
+    parser.add_argument("--rate-limit-rate", type=float, default=0, help="share of spotify responses that are 429s")
+    parser.add_argument("--requests-per-second", type=int,
+                        help="override the app's limit on requests to spotify (only when served in this process)")
+    parser.add_argument("--app-url", help="load an app that's served separately, instead of serving it here")
+    parser.add_argument("--spotify-port", type=int, default=0, help="port of the fake spotify server")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    spotify_server = FakeSpotifyServer(
+        ("127.0.0.1", args.spotify_port),
+        FakeSpotify(playlists_per_user=2, playlist_size=args.playlist_size, seed=args.seed),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed
+    )
+    spotify_server.start()
+
+    if args.app_url:
+        app_url = args.app_url.rstrip("/")
+    else:
+        app_url = serve_app(spotify_server, args.requests_per_second)
+
+    recorder = Recorder()
+    users = [
+        SimulatedUser(app_url, spotify_server.spotify, recorder, random.Random(args.seed + user_num))
+        for user_num in range(args.users)
+    ]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        for future in [executor.submit(user.run, args.rounds) for user in users]:
+            future.result()
+    print(f"{args.users} users, {args.rounds} rounds each, in {time.perf_counter() - start:.1f}s\n")
+
+    report(recorder, spotify_server.spotify.request_counts)
+    spotify_server.shutdown()
+
+    return 1 if any(recorder.failures.values()) else 0
+
+
+def _failed(response: requests.Response) -> bool:
+    if response.status_code >= 400:
+        return True
+
+    if response.headers.get("Content-Type", "").startswith("application/json"):
+        try:
+            return response.json().get("success") is False
+        except ValueError:
+            return True
+
+    return False
+
+
+if __name__ == "__main__":
+    sys.exit(main())
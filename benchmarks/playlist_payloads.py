@@ -0,0 +1,71 @@
+"""Measure the size of a 10k track playlist's item pages, the time to decode
+them and the time to build `SpotifyTrack` objects from them, for full api
+responses and for responses filtered by `PLAYLIST_ITEMS_FIELDS`. Also measure
+the playlist object itself, filtered by `PLAYLIST_FIELDS`.
+"""
+
+import json
+import time
+
+from albumcollections.spotify.item.spotify_item_interner import SpotifyItemInterner
+from albumcollections.spotify.item.spotify_music import SpotifyTrack
+from albumcollections.spotify.spotify_interface import (
+    PLAYLIST_FIELDS, PLAYLIST_ITEMS_FIELDS, PLAYLIST_TRACKS_LIMIT
+)
+
+from benchmarks import synthetic
+
+NUM_TRACKS = 10000
+
+
+def measure(pages):
+    """Return the (total size in bytes, decode time in seconds, track build time in seconds)
+    of the given encoded pages
+    """
+    start = time.perf_counter()
+    decoded_pages = [json.loads(page) for page in pages]
+    decode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    interner = SpotifyItemInterner()
+    for page in decoded_pages:
+        for playlist_item in page["items"]:
+            SpotifyTrack(playlist_item["track"], interner)
+    build_time = time.perf_counter() - start
+
+    return sum(len(page) for page in pages), decode_time, build_time
+
+
+def main():
+    spotify_tracks = synthetic.playlist_tracks(NUM_TRACKS // 10)[:NUM_TRACKS]
+
+    full_pages = []
+    slim_pages = []
+    for offset in range(0, len(spotify_tracks), PLAYLIST_TRACKS_LIMIT):
+        page = {
+            "items": [
+                synthetic.playlist_item(spotify_track)
+                for spotify_track in spotify_tracks[offset:offset + PLAYLIST_TRACKS_LIMIT]
+            ],
+            "limit": PLAYLIST_TRACKS_LIMIT,
+            "offset": offset,
+            "total": len(spotify_tracks),
+        }
+        full_pages.append(json.dumps(page).encode())
+        slim_pages.append(json.dumps(synthetic.project(page, PLAYLIST_ITEMS_FIELDS)).encode())
+
+    print(f"{len(spotify_tracks)} tracks in {len(full_pages)} pages")
+    print(f"{'payload':>8} {'KiB':>8} {'decode ms':>10} {'build ms':>9}")
+    for name, pages in (("full", full_pages), ("fields", slim_pages)):
+        size, decode_time, build_time = measure(pages)
+        print(f"{name:>8} {size / 1024:>8.0f} {decode_time * 1000:>10.1f} {build_time * 1000:>9.1f}")
+
+    spotify_playlist = synthetic.playlist("p0", spotify_tracks)
+    print(
+        f"playlist object: {len(json.dumps(spotify_playlist)) / 1024:.1f} KiB full,"
+        f" {len(json.dumps(synthetic.project(spotify_playlist, PLAYLIST_FIELDS))) / 1024:.1f} KiB with fields"
+    )
+
+
+if __name__ == "__main__":
+    main()
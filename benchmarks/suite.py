@@ -0,0 +1,196 @@
+"""Time and measure the allocations of each stage of the collection pipeline, on
+seeded synthetic playlists (see `synthetic.playlist_items`) of several sizes:
+
+- track: building `SpotifyTrack` objects from a playlist's items
+- album: building a `SpotifyAlbum` object from each item's album
+- parse: `collection_albums.get` on the built tracks
+- cache_set: setting `SpotifyCollection.albums`, which encodes and caches them
+- cache_get: getting `SpotifyCollection.albums` from the app cache on a worker
+  that doesn't hold them in memory, and building every album
+- text_list: `SpotifyCollection.get_albums_text_list`
+
+Items are filtered by `PLAYLIST_ITEMS_FIELDS` first, like the api responses
+that the app asks for. Times are the fastest of several runs, and allocations
+are the peak traced by tracemalloc during one run.
+
+Results can be saved as a baseline, and later results compared against it:
+
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json
+
+A comparison exits with status 1 if any stage got slower or allocated more
+than the allowed ratios. Times only compare well against a baseline saved on
+the same machine, so regenerate the baseline before comparing on a new one.
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from albumcollections.config import Config
+from albumcollections.spotify import collection_albums, collection_cache
+from albumcollections.spotify.item.spotify_collection import SpotifyCollection
+from albumcollections.spotify.item.spotify_item_interner import SpotifyItemInterner
+from albumcollections.spotify.item.spotify_music import SpotifyAlbum, SpotifyTrack
+from albumcollections.spotify.spotify_interface import PLAYLIST_FIELDS, PLAYLIST_ITEMS_FIELDS
+from albumcollections import create_app
+
+from benchmarks import synthetic
+
+PLAYLIST_SIZES = (100, 1000, 5000, 20000)
+
+SEED = 0
+
+# Number of times each stage is timed
+REPEATS = 7
+
+# Default ratios of new to baseline results above which a stage counts as a regression.
+# Allocations are repeatable, times vary from run to run by up to ~30%
+MAX_TIME_RATIO = 1.5
+MAX_ALLOCATION_RATIO = 1.1
+
+
+class BenchmarkConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    CACHE_TYPE = 'SimpleCache'
+    CACHE_THRESHOLD = 1000
+
+
+def measure(func):
+    """Return the (fastest time in seconds, peak allocation in bytes) of calling `func`"""
+    times = []
+    for _ in range(REPEATS):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(times), peak
+
+
+def run_stages(num_tracks: int):
+    """Return a dictionary of stage name to (time, allocation) for a playlist of the given size"""
+    items = synthetic.project({"items": synthetic.playlist_items(num_tracks, SEED)}, PLAYLIST_ITEMS_FIELDS)["items"]
+    spotify_collection = synthetic.project(synthetic.playlist(f"p{num_tracks}", []), PLAYLIST_FIELDS)
+    spotify_collection["tracks"]["total"] = num_tracks
+
+    def build_tracks():
+        interner = SpotifyItemInterner()
+        return [SpotifyTrack(item["track"], interner) for item in items]
+
+    def build_albums():
+        return [SpotifyAlbum(item["track"]["album"]) for item in items]
+
+    def parse():
+        return collection_albums.get(iter(build_tracks()))
+
+    albums = parse()
+
+    def cache_set():
+        SpotifyCollection(spotify_collection).albums = albums
+
+    def cache_get():
+        collection_cache.clear_memory()
+        return list(SpotifyCollection(spotify_collection).albums)
+
+    results = {
+        "track": measure(build_tracks),
+        "album": measure(build_albums),
+    }
+
+    # Parsing is measured without building the tracks
+    tracks = build_tracks()
+    results["parse"] = measure(lambda: collection_albums.get(iter(tracks)))
+
+    results["cache_set"] = measure(cache_set)
+    results["cache_get"] = measure(cache_get)
+
+    collection = SpotifyCollection(spotify_collection)
+    collection.albums = albums
+    results["text_list"] = measure(collection.get_albums_text_list)
+
+    return results
+
+
+def run(sizes):
+    """Return the results of every stage for every playlist size, as a dictionary of
+    "<size>/<stage>" to {"seconds": ..., "bytes": ...}
+    """
+    app = create_app(BenchmarkConfig)
+
+    results = {}
+    with app.test_request_context():
+        for num_tracks in sizes:
+            for stage, (seconds, allocated) in run_stages(num_tracks).items():
+                results[f"{num_tracks}/{stage}"] = {"seconds": seconds, "bytes": allocated}
+            collection_cache.clear_memory()
+
+    return results
+
+
+def report(results, baseline=None, max_time_ratio=MAX_TIME_RATIO, max_allocation_ratio=MAX_ALLOCATION_RATIO) -> bool:
+    """Print the results, compared against the baseline if one is given. Returns
+    whether every stage is within the allowed ratios of the baseline.
+    """
+    ok = True
+
+    header = f"{'stage':<16} {'ms':>10} {'KiB':>10}"
+    if baseline is not None:
+        header += f" {'ms ratio':>9} {'KiB ratio':>10}"
+    print(header)
+
+    for name, result in results.items():
+        line = f"{name:<16} {result['seconds'] * 1000:>10.2f} {result['bytes'] / 1024:>10.1f}"
+
+        if baseline is not None and name in baseline:
+            time_ratio = result['seconds'] / max(baseline[name]['seconds'], 1e-9)
+            allocation_ratio = result['bytes'] / max(baseline[name]['bytes'], 1)
+            line += f" {time_ratio:>9.2f} {allocation_ratio:>10.2f}"
+
+            if time_ratio > max_time_ratio or allocation_ratio > max_allocation_ratio:
+                line += "  REGRESSION"
+                ok = False
+        elif baseline is not None:
+            line += f" {'new':>9}"
+
+        print(line)
+
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=PLAYLIST_SIZES, help="playlist sizes in tracks")
+    parser.add_argument("--baseline", help="compare against the baseline saved in this file")
+    parser.add_argument("--save-baseline", help="save the results as a baseline in this file")
+    parser.add_argument("--max-time-ratio", type=float, default=MAX_TIME_RATIO)
+    parser.add_argument("--max-allocation-ratio", type=float, default=MAX_ALLOCATION_RATIO)
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+    results = run(args.sizes)
+    ok = report(results, baseline, args.max_time_ratio, args.max_allocation_ratio)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump({"seed": SEED, "python": sys.version.split()[0], "results": results}, baseline_file, indent=2)
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
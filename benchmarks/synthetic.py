@@ -0,0 +1,290 @@
+"""Synthetic spotify api payloads for benchmarking"""
+
+import itertools
+import json
+import random
+import string
+from typing import Dict, List, Optional
+
+# Full api objects list the ~185 markets that they're available in
+MARKETS = ["".join(code) for code in itertools.islice(itertools.product(string.ascii_uppercase, repeat=2), 185)]
+
+
+def album(album_id: str, total_tracks: int, rng: random.Random, num_artists: int = 1000) -> Dict:
+    """Make a dictionary shaped like a full spotify album object, credited to
+    artists drawn from a pool of `num_artists`
+    """
+    artists = [artist(f"ar{rng.randrange(num_artists)}") for _ in range(rng.choice([1, 1, 1, 2, 3]))]
+    return {
+        "album_type": rng.choice(["album", "album", "single", "compilation"]),
+        "artists": artists,
+        "available_markets": MARKETS,
+        "external_urls": {"spotify": f"https://open.spotify.com/album/{album_id}"},
+        "href": f"https://api.spotify.com/v1/albums/{album_id}",
+        "id": album_id,
+        "images": [
+            {"height": dimen, "width": dimen, "url": f"https://i.scdn.co/image/{album_id}{dimen}"}
+            for dimen in (640, 300, 64)
+        ],
+        "name": f"Album {album_id}",
+        "release_date": f"{rng.randint(1960, 2022)}-01-01",
+        "release_date_precision": "day",
+        "total_tracks": total_tracks,
+        "type": "album",
+        "uri": f"spotify:album:{album_id}",
+    }
+
+
+def artist(artist_id: str) -> Dict:
+    """Make a dictionary shaped like a simplified spotify artist object"""
+    return {
+        "external_urls": {"spotify": f"https://open.spotify.com/artist/{artist_id}"},
+        "href": f"https://api.spotify.com/v1/artists/{artist_id}",
+        "id": artist_id,
+        "name": f"Artist {artist_id}",
+        "type": "artist",
+        "uri": f"spotify:artist:{artist_id}",
+    }
+
+
+def track(spotify_album: Dict, track_number: int, disc_number: int = 1) -> Dict:
+    """Make a dictionary shaped like a full spotify track object on the given album"""
+    track_id = f"{spotify_album['id']}d{disc_number}t{track_number}" if disc_number > 1 \
+        else f"{spotify_album['id']}t{track_number}"
+    return {
+        "album": spotify_album,
+        "artists": spotify_album["artists"],
+        "available_markets": spotify_album["available_markets"],
+        "disc_number": disc_number,
+        "duration_ms": 200000,
+        "explicit": False,
+        "external_ids": {"isrc": f"US{track_id}"},
+        "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"},
+        "href": f"https://api.spotify.com/v1/tracks/{track_id}",
+        "id": track_id,
+        "is_local": False,
+        "name": f"Track {track_id}",
+        "popularity": 50,
+        "preview_url": None,
+        "track_number": track_number,
+        "type": "track",
+        "uri": f"spotify:track:{track_id}",
+    }
+
+
+def episode(show_id: str, episode_num: int) -> Dict:
+    """Make a dictionary shaped like a podcast episode in a playlist, as it comes
+    back when only tracks are asked for
+    """
+    spotify_episode = track(dict(album(show_id, 1, random.Random(show_id)), name=f"Show {show_id}"), episode_num)
+    spotify_episode.update(type="episode", episode=True, track=False)
+
+    return spotify_episode
+
+
+def local_track(track_num: int) -> Dict:
+    """Make a dictionary shaped like a local file in a playlist, which has no ids"""
+    local_artist = {"external_urls": {}, "href": None, "id": None, "name": f"Local Artist {track_num}",
+                    "type": "artist", "uri": None}
+    return {
+        "album": {
+            "album_type": None, "artists": [], "available_markets": [], "external_urls": {}, "href": None,
+            "id": None, "images": [], "name": f"Local Album {track_num}", "release_date": None,
+            "release_date_precision": None, "type": "album", "uri": None,
+        },
+        "artists": [local_artist],
+        "available_markets": [],
+        "disc_number": 0,
+        "duration_ms": 200000,
+        "explicit": False,
+        "external_ids": {},
+        "external_urls": {},
+        "href": None,
+        "id": None,
+        "is_local": True,
+        "name": f"Local Track {track_num}",
+        "popularity": 0,
+        "preview_url": None,
+        "track_number": 0,
+        "type": "track",
+        "uri": f"spotify:local:Local+Artist:Local+Album:Local+Track+{track_num}:200",
+    }
+
+
+def playlist_item(spotify_track: Dict) -> Dict:
+    """Make a dictionary shaped like a full spotify playlist item holding the track"""
+    return {
+        "added_at": "2021-06-01T12:00:00Z",
+        "added_by": {
+            "external_urls": {"spotify": "https://open.spotify.com/user/user1"},
+            "href": "https://api.spotify.com/v1/users/user1",
+            "id": "user1",
+            "type": "user",
+            "uri": "spotify:user:user1",
+        },
+        "is_local": False,
+        "primary_color": None,
+        "track": dict(spotify_track, episode=False, track=True),
+        "video_thumbnail": {"url": None},
+    }
+
+
+def playlist(playlist_id: str, spotify_tracks: List[Dict]) -> Dict:
+    """Make a dictionary shaped like a full spotify playlist object, which comes
+    with its first page of items
+    """
+    return {
+        "collaborative": False,
+        "description": "A synthetic playlist",
+        "external_urls": {"spotify": f"https://open.spotify.com/playlist/{playlist_id}"},
+        "followers": {"href": None, "total": 0},
+        "href": f"https://api.spotify.com/v1/playlists/{playlist_id}",
+        "id": playlist_id,
+        "images": [
+            {"height": dimen, "width": dimen, "url": f"https://mosaic.scdn.co/{dimen}/{playlist_id}"}
+            for dimen in (640, 300, 60)
+        ],
+        "name": f"Playlist {playlist_id}",
+        "owner": {
+            "display_name": "User 1",
+            "external_urls": {"spotify": "https://open.spotify.com/user/user1"},
+            "href": "https://api.spotify.com/v1/users/user1",
+            "id": "user1",
+            "type": "user",
+            "uri": "spotify:user:user1",
+        },
+        "primary_color": None,
+        "public": True,
+        "snapshot_id": "snapshot1",
+        "tracks": {
+            "href": f"https://api.spotify.com/v1/playlists/{playlist_id}/tracks",
+            "items": [playlist_item(spotify_track) for spotify_track in spotify_tracks[:100]],
+            "limit": 100,
+            "next": None,
+            "offset": 0,
+            "previous": None,
+            "total": len(spotify_tracks),
+        },
+        "type": "playlist",
+        "uri": f"spotify:playlist:{playlist_id}",
+    }
+
+
+def project(value, fields: str):
+    """Apply a spotify api `fields` filter (ex: "items(track(name,id))") to a decoded response"""
+    return _project(value, _parse_fields(fields))
+
+
+def playlist_tracks(num_albums: int, seed: int = 0) -> List[Dict]:
+    """Make the track objects of a playlist made of `num_albums` complete albums.
+
+    Every track gets its own copy of its album, like a decoded api response.
+    """
+    rng = random.Random(seed)
+
+    tracks = []
+    for album_num in range(num_albums):
+        spotify_album = album(f"a{album_num}", rng.randint(5, 20), rng, num_artists=max(num_albums // 4, 1))
+        tracks.extend(
+            track(spotify_album, track_number) for track_number in range(1, spotify_album["total_tracks"] + 1)
+        )
+
+    return json.loads(json.dumps(tracks))
+
+
+def playlist_items(num_tracks: int, seed: int = 0, namespace: str = "") -> List[Dict]:
+    """Make the playlist items of a realistic playlist of `num_tracks` items.
+
+    Most of the playlist is complete albums in order, some of them over several
+    discs. Mixed in are albums that are only partly there, albums whose tracks
+    are out of order, pairs of albums with their tracks interleaved, duplicated
+    tracks, podcast episodes and local files. The same seed always makes the
+    same playlist.
+
+    Album and show ids start with `namespace`, so that playlists made with
+    different seeds can be given different namespaces to keep their albums apart.
+    """
+    rng = random.Random(seed)
+    num_artists = max(num_tracks // 40, 1)
+
+    def album_tracks(album_num):
+        num_discs = rng.choice([1] * 9 + [2])
+        spotify_album = album(f"{namespace}a{album_num}", 0, rng, num_artists=num_artists)
+        disc_lengths = [rng.randint(5, 20) for _ in range(num_discs)]
+        spotify_album["total_tracks"] = sum(disc_lengths)
+        return [
+            track(spotify_album, track_number, disc_number)
+            for disc_number, disc_length in enumerate(disc_lengths, 1)
+            for track_number in range(1, disc_length + 1)
+        ]
+
+    spotify_tracks = []
+    album_num = 0
+    while len(spotify_tracks) < num_tracks:
+        kind = rng.random()
+        album_num += 1
+
+        if kind < 0.75:
+            spotify_tracks.extend(album_tracks(album_num))
+        elif kind < 0.83:
+            # Only some of the album, from its start
+            tracks = album_tracks(album_num)
+            spotify_tracks.extend(tracks[:rng.randint(1, len(tracks) - 1)])
+        elif kind < 0.87:
+            tracks = album_tracks(album_num)
+            rng.shuffle(tracks)
+            spotify_tracks.extend(tracks)
+        elif kind < 0.91:
+            album_num += 1
+            tracks = [
+                spotify_track for pair in itertools.zip_longest(album_tracks(album_num - 1), album_tracks(album_num))
+                for spotify_track in pair if spotify_track is not None
+            ]
+            spotify_tracks.extend(tracks)
+        elif kind < 0.95 and spotify_tracks:
+            spotify_tracks.extend(rng.sample(spotify_tracks, min(rng.randint(1, 5), len(spotify_tracks))))
+        elif kind < 0.98:
+            spotify_tracks.append(episode(f"{namespace}s{rng.randrange(10)}", album_num))
+        else:
+            spotify_tracks.append(local_track(album_num))
+
+    return json.loads(json.dumps([playlist_item(spotify_track) for spotify_track in spotify_tracks[:num_tracks]]))
+
+
+def _parse_fields(fields: str) -> Dict[str, Optional[Dict]]:
+    """Parse a fields filter into a tree of field name to the fields selected within it
+    (or None for the whole field)
+    """
+    root = {}
+    stack = [root]
+    name = ""
+
+    for char in fields:
+        if char == "(":
+            stack[-1][name] = {}
+            stack.append(stack[-1][name])
+            name = ""
+        elif char in ",)":
+            if name:
+                stack[-1][name] = None
+            if char == ")":
+                stack.pop()
+            name = ""
+        else:
+            name += char
+
+    if name:
+        stack[-1][name] = None
+
+    return root
+
+
+def _project(value, tree: Optional[Dict]):
+    if tree is None:
+        return value
+    elif isinstance(value, list):
+        return [_project(element, tree) for element in value]
+    elif isinstance(value, dict):
+        return {name: _project(value[name], subtree) for name, subtree in tree.items() if name in value}
+    else:
+        return value
@@ -10,7 +10,7 @@ from albumcollections.spotify.item.spotify_collection import SpotifyCollection
 from albumcollections.spotify.item.spotify_playlist import SpotifyPlaylist
 import albumcollections.spotify.spotify_user_interface as spotify_user_iface
 
-from albumcollections import create_app
+from albumcollections import create_app, jobs
 
 
 class TestingConfig(Config):
@@ -96,6 +96,14 @@ class SpotifyUserInterfaceMock(SpotifyInterfaceMock):
         return ([playlist1_mock, playlist2_mock, playlist3_mock], [])
 
 
+def wait_for_jobs():
+    """Wait for every background job submitted so far to finish. Later jobs are run
+    on a new pool of threads
+    """
+    jobs._get_executor().shutdown(wait=True)
+    jobs._forget_executor()
+
+
 class AlbumCollectionsTestCase(flask_testing.TestCase, unittest.TestCase):
     """Base test case class for all tests in albumcollections. Creates app
     using TestingConfig.
@@ -0,0 +1,5 @@
+from tests import AlbumCollectionsTestCase
+
+
+class JobsTestCase(AlbumCollectionsTestCase):
+    pass
@@ -0,0 +1,80 @@
+from unittest.mock import patch
+from flask import has_app_context, has_request_context, url_for
+
+from albumcollections import cache, jobs
+
+from tests import SpotifyUserInterfaceMock, wait_for_jobs
+
+from tests.test_jobs import JobsTestCase
+
+
+class JobStatusTestCase(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+
+        # Use a real cache, to keep job states in
+        cache.init_app(self.app, config={"CACHE_TYPE": "SimpleCache"})
+
+        patcher = patch(
+            'albumcollections.spotify.spotify_user_interface.SpotifyUserInterface',
+            new_callable=SpotifyUserInterfaceMock
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        cache.clear()
+        cache.init_app(self.app)
+        super().tearDown()
+
+    def run_job(self, func, owner_id=SpotifyUserInterfaceMock.user_id):
+        """Submit a job within a request and wait for it to finish"""
+        with self.app.test_request_context():
+            job_id = jobs.submit(owner_id, "testing", func)
+        wait_for_jobs()
+
+        return job_id
+
+    def test_done(self):
+        def func(progress):
+            progress(1, 2)
+            progress(2, 2)
+
+        self.auth_dummy_user()
+        response = self.client.get(url_for("jobs.status", job_id=self.run_job(func)))
+
+        self.assert_200(response)
+        self.assertEqual(response.json, {"status": "done", "done": 2, "total": 2})
+
+    def test_failed(self):
+        """A failed job's error is sent to the page that's waiting on it"""
+        def func(progress):
+            raise Exception("oops")
+
+        self.auth_dummy_user()
+        response = self.client.get(url_for("jobs.status", job_id=self.run_job(func)))
+
+        self.assert_200(response)
+        self.assertEqual(response.json["status"], "failed")
+        self.assertEqual(response.json["exception"], "Failed to finish testing: oops")
+
+    def test_app_context(self):
+        """Jobs run in an app context, not in the request that started them"""
+        contexts = []
+
+        def func(progress):
+            contexts.append((has_app_context(), has_request_context()))
+
+        self.run_job(func)
+
+        self.assertEqual(contexts, [(True, False)])
+
+    def test_other_users_job(self):
+        self.auth_dummy_user()
+        response = self.client.get(url_for("jobs.status", job_id=self.run_job(lambda progress: None, "someoneelse")))
+
+        self.assert_404(response)
+
+    def test_unknown_job(self):
+        self.auth_dummy_user()
+        self.assert_404(self.client.get(url_for("jobs.status", job_id="nosuchjob")))
@@ -6,7 +6,7 @@ from albumcollections.models import AcUser, Collection
 
 from tests.test_main import MainTestCase
 
-from tests import SpotifyUserInterfaceMock
+from tests import SpotifyUserInterfaceMock, wait_for_jobs
 
 from albumcollections import db
 
@@ -87,6 +87,28 @@ class MainIndexTestCase(MainTestCase):
         self.assertEqual(len(collections), 1)
         self.assertEqual(collections[0].playlist_id, "dummyplaylistid3")
 
+    @patch(
+        'albumcollections.spotify.spotify_user_interface.SpotifyUserInterface',
+        new_callable=SpotifyUserInterfaceMock
+    )
+    def test_prune_stale_collections(self, _mock):
+        """Collections whose playlists are gone are removed after the page is loaded"""
+        self.auth_dummy_user()
+        db.session.add(AcUser(spotify_user_id=SpotifyUserInterfaceMock.user_id))
+        db.session.add(Collection(playlist_id="dummyplaylistid1", user_id=1))
+        db.session.add(Collection(playlist_id="deletedplaylistid1", user_id=1))
+        db.session.add(Collection(playlist_id="deletedplaylistid2", user_id=1))
+        db.session.commit()
+
+        response = self.client.get(url_for("main.index"))
+        self.assert_200(response)
+
+        # Wait for the background removal to finish
+        wait_for_jobs()
+
+        db.session.expire_all()
+        self.assertEqual([collection.playlist_id for collection in Collection.query.all()], ["dummyplaylistid1"])
+
 
 class MainAboutTestCase(MainTestCase):
     """Test GET on main about route."""
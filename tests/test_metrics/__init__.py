@@ -0,0 +1,11 @@
+from albumcollections import metrics
+
+from tests import AlbumCollectionsTestCase
+
+
+class MetricsTestCase(AlbumCollectionsTestCase):
+    def setUp(self):
+        super().setUp()
+
+        metrics.reset()
+        self.addCleanup(metrics.reset)
@@ -0,0 +1,86 @@
+from unittest.mock import Mock, patch
+
+from flask import url_for
+import requests
+from spotipy.exceptions import SpotifyException
+
+from albumcollections import metrics
+from albumcollections.spotify import call_metrics, rate_limiter
+
+from tests.test_metrics import MetricsTestCase
+
+
+class MetricsTextTestCase(MetricsTestCase):
+    def test_render(self):
+        counter = metrics.Counter('test_events_total', "Test events", ('kind',))
+        histogram = metrics.Histogram('test_duration_seconds', "Test durations", buckets=(0.1, 1))
+        self.addCleanup(metrics._registry.remove, counter)
+        self.addCleanup(metrics._registry.remove, histogram)
+
+        counter.inc('a "quoted" kind')
+        counter.inc('a "quoted" kind', amount=2)
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value)
+
+        text = metrics.render()
+
+        self.assertIn('# TYPE test_events_total counter\ntest_events_total{kind="a \\"quoted\\" kind"} 3\n', text)
+        self.assertIn(
+            'test_duration_seconds_bucket{le="0.1"} 1\n'
+            'test_duration_seconds_bucket{le="1"} 2\n'
+            'test_duration_seconds_bucket{le="+Inf"} 3\n'
+            'test_duration_seconds_count 3\n'
+            'test_duration_seconds_sum 5.55\n',
+            text
+        )
+
+    def test_route_durations(self):
+        self.client.get(url_for('main.about'))
+
+        self.assertEqual(metrics.REQUEST_DURATION.get_count('main.about', 'GET', '200'), 1)
+
+        response = self.client.get(url_for('metrics.metrics_text'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'albumcollections_request_duration_seconds_count{endpoint="main.about",method="GET",status="200"} 1',
+            response.get_data(as_text=True)
+        )
+
+    def test_token(self):
+        with patch.dict(self.app.config, {"METRICS_TOKEN": "secret"}):
+            self.assertEqual(self.client.get(url_for('metrics.metrics_text')).status_code, 404)
+            self.assertEqual(self.client.get(
+                url_for('metrics.metrics_text'), headers={"Authorization": "Bearer secret"}
+            ).status_code, 200)
+
+
+class SpotifyCallMetricsTestCase(MetricsTestCase):
+    def test_calls(self):
+        @call_metrics.measured
+        def _playlist(fail=False):
+            if fail:
+                raise SpotifyException(404, -1, "Not found")
+
+        _playlist()
+        with self.assertRaises(SpotifyException):
+            _playlist(fail=True)
+
+        self.assertEqual(call_metrics.CALLS.get('playlist', 'ok'), 1)
+        self.assertEqual(call_metrics.CALLS.get('playlist', '404'), 1)
+        self.assertEqual(call_metrics.CALL_DURATION.get_count('playlist'), 2)
+
+    def test_requests_and_retries_are_counted_under_the_call(self):
+        rate_limited_response = Mock(status_code=429, headers={"Retry-After": "0"})
+        ok_response = Mock(status_code=200)
+
+        @call_metrics.measured
+        def add_items_to_playlist():
+            return rate_limiter.RateLimitedSession().request("POST", "https://api.spotify.com/v1/playlists/a/items")
+
+        with patch.object(requests.Session, "request", side_effect=[rate_limited_response, ok_response]), \
+                patch.object(rate_limiter, "wait_for_turn"), patch.object(rate_limiter, "pause"):
+            add_items_to_playlist()
+
+        self.assertEqual(call_metrics.REQUESTS.get('add_items_to_playlist', '429'), 1)
+        self.assertEqual(call_metrics.REQUESTS.get('add_items_to_playlist', '200'), 1)
+        self.assertEqual(call_metrics.RETRIES.get('add_items_to_playlist', 'rate_limited'), 1)
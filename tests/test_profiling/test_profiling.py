@@ -0,0 +1,78 @@
+import os
+import pstats
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+from flask import url_for
+
+from albumcollections import profiling
+
+from tests.test_profiling import ProfilingTestCase
+
+
+class ProfilingMiddlewareTestCase(ProfilingTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+        wsgi_app = self.app.wsgi_app
+        self.addCleanup(setattr, self.app, "wsgi_app", wsgi_app)
+
+    def init_profiling(self, **config):
+        config = dict({"PROFILE_TOKEN": "secret", "PROFILE_DIR": self.directory}, **config)
+        with patch.dict(self.app.config, config):
+            profiling.init_app(self.app)
+
+    def test_disabled(self):
+        wsgi_app = self.app.wsgi_app
+        profiling.init_app(self.app)
+
+        self.assertEqual(self.app.wsgi_app, wsgi_app)
+
+    def test_token(self):
+        """Only requests with the token are profiled when no share of requests is"""
+        self.init_profiling()
+
+        self.client.get(url_for('main.about'))
+        self.assertEqual(profiling.get_captures(self.directory), [])
+
+        response = self.client.get(url_for('main.about'), headers={profiling.PROFILE_HEADER: "secret"})
+        self.assertEqual(response.status_code, 200)
+
+        captures = profiling.get_captures(self.directory)
+        self.assertEqual([(capture.method, capture.path) for capture in captures], [("GET", "/about")])
+
+        stats = pstats.Stats(os.path.join(self.directory, captures[0].file_name))
+        self.assertTrue(any(function_name == "render_template" for _, _, function_name in stats.stats))
+
+        with open(os.path.join(self.directory, profiling.INDEX_FILE_NAME)) as index_file:
+            self.assertIn(captures[0].file_name, index_file.read())
+
+    def test_rotation(self):
+        """Only the newest captures are kept"""
+        self.init_profiling(PROFILE_RATE=1, PROFILE_MAX_CAPTURES=2)
+
+        for path in ("/about", "/manifest.json", "/sw.js"):
+            self.client.get(path)
+            # Captures are ordered by the millisecond they started at
+            time.sleep(0.002)
+
+        self.assertEqual(
+            sorted(capture.path for capture in profiling.get_captures(self.directory)),
+            ["/manifest.json", "/sw.js"]
+        )
+
+    def test_capture_from_file_name(self):
+        capture = profiling.Capture.from_file_name("1700000000123_42_250ms_POST_%2Fcollection%2Fadd_album.prof")
+
+        self.assertEqual(
+            capture,
+            profiling.Capture("1700000000123_42_250ms_POST_%2Fcollection%2Fadd_album.prof", 1700000000.123, 250,
+                              "POST", "/collection/add_album")
+        )
+        self.assertIsNone(profiling.Capture.from_file_name("1700000000123_42_250_POST_%2F.prof"))
+        self.assertIsNone(profiling.Capture.from_file_name(profiling.INDEX_FILE_NAME))
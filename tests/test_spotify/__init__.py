@@ -0,0 +1,128 @@
+from unittest.mock import patch
+
+from albumcollections.spotify import album_catalog, collection_cache
+import albumcollections.spotify.spotify_interface as spotify_iface
+
+from tests import AlbumCollectionsTestCase
+
+
+"""FAKE SPOTIFY API OBJECTS"""
+
+
+def fake_album(album_id, total_tracks, name=None):
+    """Return a dictionary shaped like a spotify album object"""
+    return {
+        "name": name or f"name_{album_id}",
+        "external_urls": {"spotify": f"https://open.spotify.com/album/{album_id}"},
+        "id": album_id,
+        "uri": f"spotify:album:{album_id}",
+        "artists": [{
+            "name": f"artist_{album_id}",
+            "external_urls": {"spotify": f"https://open.spotify.com/artist/artist_{album_id}"},
+            "id": f"artist_{album_id}",
+            "uri": f"spotify:artist:artist_{album_id}",
+        }],
+        "images": [{"height": 640, "width": 640, "url": f"https://i.scdn.co/image/{album_id}"}],
+        "release_date": "1999-01-01",
+        "album_type": "album",
+        "total_tracks": total_tracks,
+    }
+
+
+def fake_track(album, track_number, disc_number=1):
+    """Return a dictionary shaped like a spotify track object on the given album"""
+    track_id = f"{album['id']}_{disc_number}_{track_number}"
+    return {
+        "name": f"name_{track_id}",
+        "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"},
+        "id": track_id,
+        "uri": f"spotify:track:{track_id}",
+        "artists": album["artists"],
+        "album": album,
+        "disc_number": disc_number,
+        "track_number": track_number,
+        "type": "track",
+    }
+
+
+def fake_album_tracks(album_id, total_tracks):
+    """Return the full, in-order list of track dictionaries for an album"""
+    album = fake_album(album_id, total_tracks)
+    return [fake_track(album, track_number) for track_number in range(1, total_tracks + 1)]
+
+
+def fake_playlist(playlist_id, snapshot_id, total_tracks):
+    """Return a dictionary shaped like a spotify playlist object"""
+    return {
+        "name": f"name_{playlist_id}",
+        "external_urls": {"spotify": f"https://open.spotify.com/playlist/{playlist_id}"},
+        "id": playlist_id,
+        "uri": f"spotify:playlist:{playlist_id}",
+        "images": [],
+        "owner": {"id": "12345ABC", "display_name": "snoozin"},
+        "snapshot_id": snapshot_id,
+        "tracks": {"total": total_tracks},
+    }
+
+
+"""TEST CASE"""
+
+
+class SpotifyTestCase(AlbumCollectionsTestCase):
+    """Test case with a `SpotifyInterface` whose spotipy wrapper functions
+    are served from a fake in-memory playlist instead of the spotify api.
+    """
+    def setUp(self):
+        super().setUp()
+
+        # Each test starts with an empty album catalog and no collections held in memory
+        album_catalog.clear_memory()
+        self.addCleanup(album_catalog.clear_memory)
+        collection_cache.clear_memory()
+        self.addCleanup(collection_cache.clear_memory)
+
+        with patch.object(spotify_iface, "SpotifyClientCredentials"):
+            self.sp_interface = spotify_iface.SpotifyInterface()
+
+        self.playlist_items = []
+        self.playlist_tracks_offsets = []
+        self.snapshot_id = "snapshot1"
+
+        # Album id to list of album track dictionaries
+        self.albums = {}
+        self.albums_requests = []
+        self.album_tracks_requests = []
+
+        self.sp_interface._playlist = self._fake_playlist
+        self.sp_interface._playlist_tracks = self._fake_playlist_tracks
+        self.sp_interface._albums = self._fake_albums
+        self.sp_interface._album_tracks = self._fake_album_tracks
+
+    def _fake_playlist(self, playlist_id):
+        return fake_playlist(playlist_id, self.snapshot_id, len(self.playlist_items))
+
+    def _fake_playlist_tracks(self, playlist_id, track_offset, track_limit):
+        self.playlist_tracks_offsets.append(track_offset)
+        return {
+            "items": [
+                {"track": track} for track in self.playlist_items[track_offset:track_offset + track_limit]
+            ]
+        }
+
+    def _fake_albums(self, album_ids):
+        self.albums_requests.append(album_ids)
+        return [
+            dict(
+                fake_album(album_id, len(self.albums[album_id])),
+                tracks=self._fake_album_tracks(album_id, 0, record=False)
+            ) if album_id in self.albums else None
+            for album_id in album_ids
+        ]
+
+    def _fake_album_tracks(self, album_id, track_offset, track_limit=50, record=True):
+        if record:
+            self.album_tracks_requests.append((album_id, track_offset))
+        return {
+            "items": self.albums[album_id][track_offset:track_offset + track_limit],
+            "total": len(self.albums[album_id]),
+        }
@@ -0,0 +1,51 @@
+from unittest.mock import patch
+
+from albumcollections.models import CatalogAlbum
+from albumcollections.spotify import album_catalog
+
+from tests.test_spotify import SpotifyTestCase, fake_album_tracks
+
+
+class AlbumCatalogTestCase(SpotifyTestCase):
+    def setUp(self):
+        super().setUp()
+
+        for album_num in range(3):
+            self.albums[f"album{album_num}"] = fake_album_tracks(f"album{album_num}", 10)
+
+    def test_read_through(self):
+        """Albums are only requested from spotify the first time they're needed"""
+        first_track_ids = self.sp_interface.get_albums_track_ids(["album0", "album1"])
+        self.assertEqual(len(self.albums_requests), 1)
+        self.assertEqual(CatalogAlbum.query.count(), 2)
+
+        track_ids = self.sp_interface.get_albums_track_ids(["album0", "album1", "album2"])
+        self.assertEqual(self.albums_requests[1], ["album2"])
+        self.assertEqual(track_ids["album0"], first_track_ids["album0"])
+
+        # Albums are read back from the table once forgotten by the worker
+        album_catalog.clear_memory()
+        self.assertEqual(self.sp_interface.get_album_track_ids("album2"), track_ids["album2"])
+        self.assertEqual(len(self.albums_requests), 2)
+
+        entry = album_catalog.get(["album2"])["album2"]
+        self.assertEqual(entry.name, "name_album2")
+        self.assertEqual(entry.artists, (("artist_album2", "artist_album2"),))
+        self.assertEqual(entry.total_tracks, 10)
+
+    def test_memory_eviction(self):
+        with patch.object(album_catalog, "MAX_MEMORY_TRACKS", 25):
+            self.sp_interface.get_albums_track_ids(["album0", "album1", "album2"])
+
+        self.assertEqual(list(album_catalog._memory), ["album1", "album2"])
+        self.assertEqual(album_catalog._memory_tracks, 20)
+
+    def test_add_existing(self):
+        """Albums already in the catalog don't stop the rest of a batch from being added"""
+        self.sp_interface.get_albums_track_ids(["album0"])
+        entry = album_catalog.get(["album0"])["album0"]
+        album_catalog.clear_memory()
+
+        album_catalog.add([entry, entry._replace(album_id="album3")])
+
+        self.assertEqual(sorted(album.album_id for album in CatalogAlbum.query), ["album0", "album3"])
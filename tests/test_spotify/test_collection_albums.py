@@ -0,0 +1,98 @@
+from albumcollections.spotify import collection_albums
+from albumcollections.spotify.item.spotify_music import SpotifyTrack
+
+from benchmarks import synthetic
+from tests.test_spotify import SpotifyTestCase, fake_album, fake_album_tracks, fake_track
+
+
+def parse(track_dicts):
+    return collection_albums.get(SpotifyTrack(track) for track in track_dicts)
+
+
+class CollectionAlbumsGetTestCase(SpotifyTestCase):
+    def test_complete_albums(self):
+        albums = parse(fake_album_tracks("album0", 3) + fake_album_tracks("album1", 2))
+
+        self.assertEqual([album.id for album in albums], ["album0", "album1"])
+        self.assertEqual([album.playlist_index for album in albums], [0, 3])
+        self.assertTrue(all(album.complete for album in albums))
+        self.assertEqual(albums[1].track_ids, ["album1_1_1", "album1_1_2"])
+
+    def test_multi_disc_album(self):
+        album = fake_album("album0", 3)
+        albums = parse([fake_track(album, 1), fake_track(album, 2), fake_track(album, 1, disc_number=2)])
+
+        self.assertTrue(albums[0].complete)
+
+    def test_incomplete_albums(self):
+        album0_tracks = fake_album_tracks("album0", 3)
+        album1_tracks = fake_album_tracks("album1", 3)
+        album2_tracks = fake_album_tracks("album2", 2)
+
+        albums = parse(
+            # Missing its last track
+            album0_tracks[:2]
+            # Out of order
+            + [album1_tracks[1], album1_tracks[0], album1_tracks[2]]
+            # Complete, but followed by a duplicate later on
+            + album2_tracks + album0_tracks[:1] + album2_tracks[:1]
+        )
+
+        self.assertEqual([album.id for album in albums], ["album0", "album1", "album2"])
+        self.assertFalse(any(album.complete for album in albums))
+        self.assertEqual(albums[0].track_ids, ["album0_1_1", "album0_1_2"])
+        self.assertEqual(albums[1].track_ids, [])
+
+    def test_skip_non_tracks(self):
+        episode = dict(fake_track(fake_album("show0", 1), 1), type="episode")
+        albums = parse([episode] + fake_album_tracks("album0", 2))
+
+        self.assertEqual([album.id for album in albums], ["album0"])
+        self.assertEqual(albums[0].playlist_index, 1)
+        self.assertTrue(albums[0].complete)
+
+    def test_synthetic_playlist(self):
+        """A realistic playlist with every kind of irregularity parses into sensible albums"""
+        albums = parse(item["track"] for item in synthetic.playlist_items(2000))
+
+        self.assertTrue(any(album.complete for album in albums))
+        self.assertTrue(any(not album.complete for album in albums))
+        for album in albums:
+            # No podcast shows
+            self.assertFalse(album.id is not None and album.id.startswith("s"))
+            if album.complete:
+                self.assertEqual(len(album.track_ids), album.total_tracks)
+
+
+class CollectionAlbumsEditTestCase(SpotifyTestCase):
+    def summarize(self, albums):
+        return [(album.id, album.playlist_index, album.track_ids, album.complete) for album in albums]
+
+    def test_move_tracks(self):
+        tracks = fake_album_tracks("album0", 2) + fake_album_tracks("album1", 3) + fake_album_tracks("album2", 1)
+        albums = parse(tracks)
+
+        self.assertEqual(collection_albums.move_tracks(albums, 2, 0, 3, 6), 0)
+        self.assertEqual(self.summarize(albums), self.summarize(parse(tracks[2:5] + tracks[:2] + tracks[5:])))
+
+        self.assertEqual(collection_albums.move_tracks(albums, 0, 6, 3, 6), 0)
+        self.assertEqual(self.summarize(albums), self.summarize(parse(tracks[:2] + tracks[5:] + tracks[2:5])))
+
+    def test_remove_album(self):
+        tracks = fake_album_tracks("album0", 2) + fake_album_tracks("album1", 3) + fake_album_tracks("album2", 1)
+        albums = parse(tracks)
+
+        self.assertEqual(collection_albums.remove_album(albums, "album1", 6), 2)
+        self.assertEqual(self.summarize(albums), self.summarize(parse(tracks[:2] + tracks[5:])))
+
+    def test_refuse_edit_that_changes_other_albums(self):
+        """Taking out an album that splits another album's tracks would make that album
+        complete, so the edit isn't applied
+        """
+        album0_tracks = fake_album_tracks("album0", 4)
+        albums = parse(album0_tracks[:2] + fake_album_tracks("album1", 2) + album0_tracks[2:])
+        summary = self.summarize(albums)
+
+        self.assertIsNone(collection_albums.remove_album(albums, "album1", 6))
+        self.assertIsNone(collection_albums.move_tracks(albums, 2, 0, 2, 6))
+        self.assertEqual(self.summarize(albums), summary)
@@ -0,0 +1,142 @@
+from unittest.mock import patch
+
+from albumcollections.models import AcUser, CollectionLayout
+from albumcollections import cache, db, metrics
+from albumcollections.spotify import collection_albums, collection_cache
+from albumcollections.spotify.item.spotify_music import SpotifyTrack
+
+from tests.test_spotify import SpotifyTestCase, fake_album_tracks
+
+
+class CollectionMemoryTestCase(SpotifyTestCase):
+    def setUp(self):
+        super().setUp()
+
+        tracks = [SpotifyTrack(track) for album_num in range(3) for track in fake_album_tracks(f"album{album_num}", 10)]
+        self.collection_albums = collection_albums.get(iter(tracks))
+
+    def test_counters(self):
+        self.assertIsNone(collection_cache.get_albums("dummyplaylistid1", "snapshot1"))
+        collection_cache.set_albums("dummyplaylistid1", "snapshot1", self.collection_albums)
+        collection_cache.get_albums("dummyplaylistid1", "snapshot1")
+
+        self.assertEqual(collection_cache.get_memory_stats(), {
+            "hits": 1,
+            "misses": 1,
+            "evictions": 0,
+            "collections": 1,
+            "bytes": 3 * collection_cache.ALBUM_MEMORY_BYTES + 30 * collection_cache.TRACK_ID_MEMORY_BYTES,
+        })
+
+    def test_lookup_metrics(self):
+        """Lookups are counted by where the albums were found"""
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+        collection_cache.get_albums("dummyplaylistid1", "snapshot1")
+        collection_cache.set_albums("dummyplaylistid1", "snapshot1", self.collection_albums)
+        collection_cache.clear_memory()
+        collection_cache.get_albums("dummyplaylistid1", "snapshot1")
+
+        self.assertEqual(
+            {
+                (layer, result): collection_cache.LOOKUPS.get(layer, result)
+                for layer in ("memory", "cache", "database") for result in ("hit", "miss")
+            },
+            {
+                ("memory", "hit"): 0, ("memory", "miss"): 2,
+                ("cache", "hit"): 0, ("cache", "miss"): 2,
+                ("database", "hit"): 1, ("database", "miss"): 1,
+            }
+        )
+
+    def test_eviction(self):
+        """Least recently used collections are evicted once the byte budget is reached"""
+        collection_bytes = 3 * collection_cache.ALBUM_MEMORY_BYTES + 30 * collection_cache.TRACK_ID_MEMORY_BYTES
+        with patch.object(collection_cache, "MAX_MEMORY_BYTES", 2 * collection_bytes), \
+                patch.object(collection_cache, "_store_albums"):
+            for playlist_num in range(3):
+                collection_cache.set_albums(f"dummyplaylistid{playlist_num}", "snapshot1", self.collection_albums)
+
+            self.assertIsNone(collection_cache._recall("dummyplaylistid0", "snapshot1"))
+            self.assertIsNotNone(collection_cache._recall("dummyplaylistid2", "snapshot1"))
+            self.assertEqual(collection_cache.get_memory_stats()["evictions"], 1)
+
+    def test_update_leaves_old_snapshot(self):
+        """Editing a collection doesn't change the albums held for its old snapshot"""
+        collection_cache.set_albums("dummyplaylistid1", "snapshot1", self.collection_albums)
+
+        def edit(albums):
+            return collection_albums.move_tracks(albums, 20, 0, 10, 30)
+
+        self.assertTrue(collection_cache.update("dummyplaylistid1", "snapshot1", "snapshot2", edit))
+
+        self.assertEqual(
+            [
+                (album.id, album.playlist_index)
+                for album in collection_cache.get_albums("dummyplaylistid1", "snapshot1")
+            ],
+            [("album0", 0), ("album1", 10), ("album2", 20)]
+        )
+        self.assertEqual(
+            [
+                (album.id, album.playlist_index)
+                for album in collection_cache.get_albums("dummyplaylistid1", "snapshot2")
+            ],
+            [("album2", 0), ("album0", 10), ("album1", 20)]
+        )
+
+    def test_store_leaves_request_session(self):
+        """Storing albums in the table doesn't commit or roll back what the request has pending"""
+        pending_user = AcUser(spotify_user_id="pending")
+        db.session.add(pending_user)
+
+        collection_cache.set_albums("dummyplaylistid1", "snapshot1", self.collection_albums)
+        collection_cache.set_albums("dummyplaylistid1", "snapshot2", self.collection_albums)
+
+        self.assertIn(pending_user, db.session.new)
+        self.assertEqual([layout.snapshot_id for layout in CollectionLayout.query.all()], ["snapshot2"])
+
+
+class CollectionChunksTestCase(SpotifyTestCase):
+    def setUp(self):
+        super().setUp()
+
+        # Use a real cache, and keep albums out of the table so that they only come from the cache
+        cache.init_app(self.app, config={"CACHE_TYPE": "SimpleCache"})
+        patchers = [
+            patch.object(collection_cache, "CACHE_CHUNK_BYTES", 100),
+            patch.object(collection_cache, "_store_albums"),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        tracks = [SpotifyTrack(track) for album_num in range(3) for track in fake_album_tracks(f"album{album_num}", 10)]
+        self.collection_albums = collection_albums.get(iter(tracks))
+
+    def tearDown(self):
+        cache.clear()
+        cache.init_app(self.app)
+        super().tearDown()
+
+    def test_chunks(self):
+        with self.assertLogs(self.app.logger, "INFO") as logs:
+            collection_cache.set_albums("dummyplaylistid1", "snapshot1", self.collection_albums)
+        self.assertIn("chunks", logs.output[0])
+        collection_cache.clear_memory()
+
+        self.assertEqual(
+            [album.id for album in collection_cache.get_albums("dummyplaylistid1", "snapshot1")],
+            ["album0", "album1", "album2"]
+        )
+
+    def test_lost_chunk(self):
+        """Albums with a chunk missing from the cache are a miss"""
+        collection_cache.set_albums("dummyplaylistid1", "snapshot1", self.collection_albums)
+        collection_cache.clear_memory()
+
+        manifest = cache.get(collection_cache._albums_key("dummyplaylistid1"))
+        cache.delete(collection_cache._chunk_key("dummyplaylistid1", manifest["checksum"], 1))
+
+        self.assertIsNone(collection_cache.get_albums("dummyplaylistid1", "snapshot1"))
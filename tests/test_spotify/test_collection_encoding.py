@@ -0,0 +1,73 @@
+import pickle
+import random
+
+from albumcollections.spotify import collection_albums, collection_encoding
+from albumcollections.spotify.item.spotify_item_interner import SpotifyItemInterner
+from albumcollections.spotify.item.spotify_music import SpotifyTrack
+
+from benchmarks import synthetic
+from tests.test_spotify import SpotifyTestCase
+
+
+def album_attributes(album):
+    return (
+        album.name, album.link, album.id, album.uri, album.img_url, album.release_date, album.album_type,
+        album.total_tracks, album.track_ids, album.complete, album.playlist_index,
+        [(artist.name, artist.link, artist.id, artist.uri, artist.img_url) for artist in album.artists]
+    )
+
+
+class CollectionEncodingTestCase(SpotifyTestCase):
+    def setUp(self):
+        super().setUp()
+
+        interner = SpotifyItemInterner()
+        tracks = [SpotifyTrack(spotify_track, interner) for spotify_track in synthetic.playlist_tracks(200)]
+        self.collection_albums = collection_albums.get(iter(tracks))
+
+        # Cover missing values
+        self.collection_albums[0].img_url = None
+        self.collection_albums[1].playlist_index = None
+
+    def test_round_trip(self):
+        albums = collection_encoding.decode(collection_encoding.encode(self.collection_albums))
+
+        self.assertEqual(
+            [album_attributes(album) for album in albums],
+            [album_attributes(album) for album in self.collection_albums]
+        )
+        self.assertEqual(
+            collection_encoding.count_track_ids(albums), collection_encoding.count_track_ids(self.collection_albums)
+        )
+
+    def test_smaller_than_pickle(self):
+        self.assertLess(
+            len(collection_encoding.encode(self.collection_albums)),
+            len(pickle.dumps(self.collection_albums, pickle.HIGHEST_PROTOCOL)) / 4
+        )
+
+    def test_lazy(self):
+        """Albums are only built when accessed, and copies share them"""
+        albums = collection_encoding.decode(collection_encoding.encode(self.collection_albums))
+        self.assertEqual(albums._columns._albums, {})
+
+        album = albums[-1]
+        self.assertEqual(list(albums._columns._albums), [len(albums) - 1])
+        self.assertIs(albums.copy()[-1], album)
+
+    def test_shuffle(self):
+        """Changing a decoded list doesn't change its copies"""
+        albums = collection_encoding.decode(collection_encoding.encode(self.collection_albums))
+        albums_copy = albums.copy()
+
+        random.Random(0).shuffle(albums)
+
+        self.assertNotEqual([album.id for album in albums], [album.id for album in albums_copy])
+        self.assertEqual(sorted(album.id for album in albums), sorted(album.id for album in albums_copy))
+
+    def test_other_version(self):
+        data = bytearray(collection_encoding.zlib.decompress(collection_encoding.encode(self.collection_albums)))
+        data[0] = collection_encoding.ENCODING_VERSION + 1
+
+        with self.assertRaises(Exception):
+            collection_encoding.decode(collection_encoding.zlib.compress(bytes(data)))
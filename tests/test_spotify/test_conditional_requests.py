@@ -0,0 +1,89 @@
+from unittest.mock import patch
+
+import requests
+
+from albumcollections import cache, metrics
+from albumcollections.spotify import conditional_requests, rate_limiter
+
+from tests.test_spotify import SpotifyTestCase
+
+PLAYLIST_URL = "https://api.spotify.com/v1/playlists/playlist_id"
+
+
+def fake_response(status_code, content=b"", etag=None):
+    """Return a requests response as spotify would send it"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    if content:
+        response.headers["Content-Type"] = "application/json; charset=utf-8"
+    if etag is not None:
+        response.headers["ETag"] = etag
+    return response
+
+
+class ConditionalRequestsTestCase(SpotifyTestCase):
+    def setUp(self):
+        super().setUp()
+
+        # Use a real cache, to store responses in
+        cache.init_app(self.app, config={"CACHE_TYPE": "SimpleCache"})
+
+        patcher = patch.object(rate_limiter, "wait_for_turn")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+        self.session = rate_limiter.RateLimitedSession()
+
+    def tearDown(self):
+        cache.clear()
+        cache.init_app(self.app)
+        super().tearDown()
+
+    def request(self, *responses, url=PLAYLIST_URL, params=None):
+        """Make a request through the session, returning the response and the headers that were sent"""
+        with patch.object(requests.Session, "request", side_effect=responses) as mock_request:
+            response = self.session.request("GET", url, params=params, headers={"Authorization": "Bearer token"})
+
+        return response, mock_request.call_args.kwargs["headers"]
+
+    def test_not_modified(self):
+        """A 304 is passed on as the body that was stored with the ETag"""
+        self.request(fake_response(200, b'{"snapshot_id": "1"}', etag='"1"'))
+
+        response, headers = self.request(fake_response(304, etag='"1"'))
+
+        self.assertEqual(headers["If-None-Match"], '"1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"snapshot_id": "1"})
+        self.assertEqual(conditional_requests.CONDITIONAL_REQUESTS.get("not_modified"), 1)
+
+    def test_modified(self):
+        """A changed playlist's new body replaces the stored one"""
+        self.request(fake_response(200, b'{"snapshot_id": "1"}', etag='"1"'))
+        self.request(fake_response(200, b'{"snapshot_id": "2"}', etag='"2"'))
+
+        _, headers = self.request(fake_response(304, etag='"2"'))
+
+        self.assertEqual(headers["If-None-Match"], '"2"')
+        self.assertEqual(conditional_requests.CONDITIONAL_REQUESTS.get("modified"), 1)
+
+    def test_stored_by_query(self):
+        """Requests for different fields of a playlist don't share a stored body"""
+        self.request(fake_response(200, b'{"snapshot_id": "1"}', etag='"1"'), params={"fields": "snapshot_id"})
+
+        _, headers = self.request(fake_response(200, b'{"name": "name"}', etag='"2"'), params={"fields": "name"})
+
+        self.assertNotIn("If-None-Match", headers)
+
+    def test_only_playlist_objects(self):
+        """Pages of a playlist's items aren't stored"""
+        items_url = f"{PLAYLIST_URL}/items"
+        self.request(fake_response(200, b'{"items": []}', etag='"1"'), url=items_url)
+
+        _, headers = self.request(fake_response(200, b'{"items": []}', etag='"1"'), url=items_url)
+
+        self.assertNotIn("If-None-Match", headers)
@@ -0,0 +1,80 @@
+import os
+from unittest.mock import patch
+
+from albumcollections import cache, metrics
+from albumcollections.spotify import album_catalog, collection_albums, collection_cache, conditional_requests
+from albumcollections.spotify.item.spotify_music import SpotifyTrack
+import albumcollections.spotify.spotify_interface as spotify_iface
+
+from benchmarks.fake_spotify import FakeSpotify, FakeSpotifyServer
+from tests import AlbumCollectionsTestCase
+
+
+class ConfiguredApiTestCase(AlbumCollectionsTestCase):
+    """The spotify interface talks to the api server in the app config, here the
+    local stand-in for spotify that's used for load testing
+    """
+    def setUp(self):
+        super().setUp()
+
+        album_catalog.clear_memory()
+        self.addCleanup(album_catalog.clear_memory)
+        collection_cache.clear_memory()
+        self.addCleanup(collection_cache.clear_memory)
+
+        self.server = FakeSpotifyServer(spotify=FakeSpotify(playlists_per_user=1, playlist_size=250))
+        self.server.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        patchers = [
+            patch.dict(self.app.config, self.server.app_config()),
+            patch.dict(os.environ, {"SPOTIPY_CLIENT_ID": "client", "SPOTIPY_CLIENT_SECRET": "secret"}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.user_id = self.server.spotify.new_user()
+        self.playlist_id = self.server.spotify.users[self.user_id]["playlist_ids"][0]
+
+    def test_get_collection(self):
+        """Every page of the playlist is read from the configured api"""
+        collection = spotify_iface.SpotifyInterface().get_collection(self.playlist_id)
+
+        tracks, snapshot_id = self.server.spotify.snapshot(self.playlist_id)
+        expected_albums = collection_albums.get(SpotifyTrack(track) for track in tracks)
+
+        self.assertEqual(collection.snapshot_id, snapshot_id)
+        self.assertEqual(collection.total_tracks, 250)
+        self.assertEqual(
+            [(album.id, album.playlist_index) for album in collection.albums],
+            [(album.id, album.playlist_index) for album in expected_albums]
+        )
+
+    def test_get_album_track_ids(self):
+        tracks, _ = self.server.spotify.snapshot(self.playlist_id)
+        album = next(SpotifyTrack(track).album for track in tracks if track["type"] == "track" and track["album"]["id"])
+
+        track_ids = spotify_iface.SpotifyInterface().get_album_track_ids(album.id)
+
+        self.assertEqual(len(track_ids), album.total_tracks)
+
+    def test_playlist_revalidated(self):
+        """An unchanged playlist is read again as a 304 from the api, and a changed one in full"""
+        cache.init_app(self.app, config={"CACHE_TYPE": "SimpleCache"})
+        self.addCleanup(cache.init_app, self.app)
+        self.addCleanup(cache.clear)
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+        sp_interface = spotify_iface.SpotifyInterface()
+        snapshot_id = sp_interface._playlist(self.playlist_id)["snapshot_id"]
+        self.assertEqual(sp_interface._playlist(self.playlist_id)["snapshot_id"], snapshot_id)
+        self.assertEqual(conditional_requests.CONDITIONAL_REQUESTS.get("not_modified"), 1)
+
+        tracks, _ = self.server.spotify.snapshot(self.playlist_id)
+        self.server.spotify.remove_items(self.user_id, self.playlist_id, [tracks[0]["uri"]], None)
+
+        self.assertNotEqual(sp_interface._playlist(self.playlist_id)["snapshot_id"], snapshot_id)
+        self.assertEqual(conditional_requests.CONDITIONAL_REQUESTS.get("modified"), 1)
@@ -0,0 +1,46 @@
+import pickle
+
+from albumcollections.spotify.item.spotify_item_interner import SpotifyItemInterner
+from albumcollections.spotify.item.spotify_music import AlbumType, SpotifyAlbum, SpotifyTrack
+
+from tests.test_spotify import SpotifyTestCase, fake_album, fake_album_tracks
+
+
+class SpotifyItemInternerTestCase(SpotifyTestCase):
+    def test_tracks_share_album(self):
+        interner = SpotifyItemInterner()
+        tracks = [SpotifyTrack(track, interner) for track in fake_album_tracks("album0", 3)]
+
+        self.assertIs(tracks[0].album, tracks[2].album)
+        self.assertIs(tracks[0].artists[0], tracks[0].album.artists[0])
+
+    def test_local_albums_not_shared(self):
+        interner = SpotifyItemInterner()
+        local_album = dict(fake_album(None, 0), album_type=None)
+
+        self.assertIsNot(interner.album(local_album), interner.album(local_album))
+
+
+class SpotifyItemPickleTestCase(SpotifyTestCase):
+    def test_round_trip(self):
+        album = SpotifyAlbum(fake_album("album0", 2))
+        album.track_ids = ["track0", "track1"]
+        album.complete = True
+        album.playlist_index = 7
+
+        unpickled = pickle.loads(pickle.dumps(album))
+
+        self.assertEqual(unpickled.name, "name_album0")
+        self.assertEqual(unpickled.artists[0].name, "artist_album0")
+        self.assertEqual(unpickled.album_type, AlbumType.album)
+        self.assertEqual(unpickled.track_ids, ["track0", "track1"])
+        self.assertTrue(unpickled.complete)
+        self.assertEqual(unpickled.playlist_index, 7)
+
+    def test_dict_state(self):
+        """Items pickled before items had slots are still readable"""
+        album = SpotifyAlbum.__new__(SpotifyAlbum)
+        album.__setstate__({"name": "name_album0", "id": "album0", "track_ids": []})
+
+        self.assertEqual(album.name, "name_album0")
+        self.assertEqual(album.id, "album0")
@@ -0,0 +1,95 @@
+from unittest.mock import Mock, patch
+
+import requests
+from spotipy.exceptions import SpotifyException
+
+from albumcollections import cache
+from albumcollections.spotify import rate_limiter
+
+from tests.test_spotify import SpotifyTestCase
+
+
+class FakeClock():
+    """Stands in for the time module, with sleeps that pass instantly"""
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RateLimiterTestCase(SpotifyTestCase):
+    def setUp(self):
+        super().setUp()
+
+        # Use a real cache, to count requests in
+        cache.init_app(self.app, config={"CACHE_TYPE": "SimpleCache"})
+
+        self.clock = FakeClock()
+        patchers = [
+            patch.object(rate_limiter, "time", self.clock),
+            patch.dict(self.app.config, {"SPOTIFY_REQUESTS_PER_WINDOW": 4, "SPOTIFY_MAX_RATE_LIMIT_WAIT": 10}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        cache.clear()
+        cache.init_app(self.app)
+        super().tearDown()
+
+    def test_wait_for_next_window(self):
+        for _ in range(5):
+            rate_limiter.wait_for_turn()
+
+        self.assertEqual(self.clock.sleeps, [1])
+
+    def test_bulk_share(self):
+        """Bulk requests only use part of a window, leaving the rest for interactive requests"""
+        with rate_limiter.bulk():
+            rate_limiter.wait_for_turn()
+            rate_limiter.wait_for_turn()
+        for _ in range(2):
+            rate_limiter.wait_for_turn()
+        self.assertEqual(self.clock.sleeps, [])
+
+        with rate_limiter.bulk():
+            rate_limiter.wait_for_turn()
+        self.assertEqual(self.clock.sleeps, [1])
+
+    def test_bulk_priority_carries_over_to_concurrent_requests(self):
+        with rate_limiter.bulk():
+            priorities = list(self.sp_interface._iter_concurrent(lambda _: rate_limiter._priority.get(), range(3)))
+
+        self.assertEqual(priorities, [rate_limiter.Priority.bulk] * 3)
+
+    def test_shared_session(self):
+        self.assertIs(rate_limiter.get_session(), rate_limiter.get_session())
+
+    def test_retry_after(self):
+        """A rate limited request pauses all requests for as long as spotify says, then is retried"""
+        rate_limited_response = Mock(status_code=429, headers={"Retry-After": "5"})
+        ok_response = Mock(status_code=200)
+
+        with patch.object(requests.Session, "request", side_effect=[rate_limited_response, ok_response]):
+            response = rate_limiter.RateLimitedSession().request("GET", "https://api.spotify.com/v1/me")
+
+        self.assertIs(response, ok_response)
+        self.assertEqual(self.clock.sleeps, [5])
+
+    def test_long_retry_after(self):
+        """A request fails instead of waiting for a pause that's longer than the configured max"""
+        rate_limited_response = Mock(status_code=429, headers={"Retry-After": "3600"})
+
+        with patch.object(requests.Session, "request", side_effect=[rate_limited_response]):
+            with self.assertRaises(SpotifyException) as cm:
+                rate_limiter.RateLimitedSession().request("GET", "https://api.spotify.com/v1/me")
+
+        self.assertEqual(cm.exception.http_status, 429)
+        self.assertEqual(self.clock.sleeps, [])
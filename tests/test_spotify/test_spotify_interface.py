@@ -0,0 +1,170 @@
+import pickle
+from unittest.mock import patch
+
+from albumcollections.models import CollectionLayout
+from albumcollections import cache
+from albumcollections.spotify import collection_albums, collection_cache
+from albumcollections.spotify.item.spotify_collection import SpotifyCollection
+from albumcollections.spotify.item.spotify_music import SpotifyTrack
+from albumcollections.spotify.item.spotify_playlist import SpotifyPlaylist
+import albumcollections.spotify.spotify_interface as spotify_iface
+
+from benchmarks import synthetic
+from tests.test_spotify import SpotifyTestCase, fake_album_tracks
+
+
+class GetPlaylistTracksTestCase(SpotifyTestCase):
+    def setUp(self):
+        super().setUp()
+
+        # 250 tracks, spread over 3 pages
+        for album_num in range(25):
+            self.playlist_items.extend(fake_album_tracks(f"album{album_num}", 10))
+
+    def test_sequential(self):
+        """Without a known total, pages are read until an empty one is returned"""
+        tracks = self.sp_interface.get_playlist_tracks("dummyplaylistid1")
+
+        self.assertEqual([track.id for track in tracks], [item["id"] for item in self.playlist_items])
+        self.assertEqual(self.playlist_tracks_offsets, [0, 100, 200, 250])
+
+    def test_concurrent(self):
+        """With a known total, every page is requested once and no empty page is requested"""
+        tracks = self.sp_interface.get_playlist_tracks("dummyplaylistid1", len(self.playlist_items))
+
+        self.assertEqual([track.id for track in tracks], [item["id"] for item in self.playlist_items])
+        self.assertEqual(sorted(self.playlist_tracks_offsets), [0, 100, 200])
+
+    def test_concurrent_empty(self):
+        self.assertEqual(self.sp_interface.get_playlist_tracks("dummyplaylistid1", 0), [])
+        self.assertEqual(self.playlist_tracks_offsets, [])
+
+    def test_streaming_window(self):
+        """Only a bounded number of pages are requested ahead of the consumer"""
+        for album_num in range(25, 200):
+            self.playlist_items.extend(fake_album_tracks(f"album{album_num}", 10))
+
+        tracks_iter = self.sp_interface.iter_playlist_tracks("dummyplaylistid1", len(self.playlist_items))
+        self.assertEqual(next(tracks_iter).id, self.playlist_items[0]["id"])
+        self.assertLessEqual(len(self.playlist_tracks_offsets), spotify_iface.MAX_CONCURRENT_REQUESTS + 1)
+
+        tracks = [self.playlist_items[0]["id"]] + [track.id for track in tracks_iter]
+        self.assertEqual(tracks, [item["id"] for item in self.playlist_items])
+        self.assertEqual(len(self.playlist_tracks_offsets), 20)
+
+
+class GetCollectionTestCase(SpotifyTestCase):
+    def setUp(self):
+        super().setUp()
+
+        # Use a real cache, to store parsed albums across loads
+        cache.init_app(self.app, config={"CACHE_TYPE": "SimpleCache"})
+
+        for album_num in range(30):
+            self.playlist_items.extend(fake_album_tracks(f"album{album_num}", 10))
+
+    def tearDown(self):
+        cache.clear()
+        cache.init_app(self.app)
+        super().tearDown()
+
+    def test_resume_parse(self):
+        """After a change near the end of the playlist, only pages from the changed one on are parsed"""
+        first_albums = self.sp_interface.get_collection("dummyplaylistid1").albums
+
+        # Make the last album incomplete and append a new one
+        self.playlist_items.pop(295)
+        self.playlist_items.extend(fake_album_tracks("album30", 10))
+        self.snapshot_id = "snapshot2"
+
+        with patch.object(spotify_iface, "SpotifyTrack", wraps=SpotifyTrack) as track_mock:
+            albums = self.sp_interface.get_collection("dummyplaylistid1").albums
+
+        # Only the last page (starting at track 200) is parsed again
+        self.assertEqual(track_mock.call_count, len(self.playlist_items) - 200)
+        self.assertEqual([album.id for album in albums], [f"album{album_num}" for album_num in range(31)])
+        self.assertEqual(
+            [album.complete for album in albums],
+            [True] * 29 + [False, True]
+        )
+        self.assertEqual(albums[30].playlist_index, 299)
+
+        # Albums from the previous load are left as they were
+        self.assertTrue(first_albums[29].complete)
+
+    def test_unchanged_snapshot(self):
+        self.sp_interface.get_collection("dummyplaylistid1")
+        self.playlist_tracks_offsets.clear()
+
+        self.assertEqual(len(self.sp_interface.get_collection("dummyplaylistid1").albums), 30)
+        self.assertEqual(self.playlist_tracks_offsets, [])
+
+    def test_stored_layout(self):
+        """After the cache is lost, albums are read from the table and put back in the cache"""
+        self.sp_interface.get_collection("dummyplaylistid1")
+        cache.clear()
+        self.playlist_tracks_offsets.clear()
+
+        self.assertEqual(len(self.sp_interface.get_collection("dummyplaylistid1").albums), 30)
+        self.assertEqual(self.playlist_tracks_offsets, [])
+        self.assertEqual(len(collection_cache.get_albums("dummyplaylistid1", "snapshot1")), 30)
+        self.assertEqual(CollectionLayout.query.count(), 1)
+
+        # Only the latest snapshot of the playlist is kept
+        self.snapshot_id = "snapshot2"
+        self.sp_interface.get_collection("dummyplaylistid1")
+        self.assertEqual([layout.snapshot_id for layout in CollectionLayout.query.all()], ["snapshot2"])
+
+
+class GetAlbumsTrackIdsTestCase(SpotifyTestCase):
+    def setUp(self):
+        super().setUp()
+
+        for album_num in range(45):
+            self.albums[f"album{album_num}"] = fake_album_tracks(f"album{album_num}", 10)
+        self.albums["album_long"] = fake_album_tracks("album_long", 120)
+
+    def test_batches(self):
+        album_ids = list(self.albums) + ["not_an_album"]
+        album_track_ids = self.sp_interface.get_albums_track_ids(album_ids)
+
+        self.assertEqual(
+            album_track_ids,
+            {album_id: [track["id"] for track in tracks] for album_id, tracks in self.albums.items()}
+        )
+
+        # Albums are requested 20 at a time, and extra track pages only for the long album
+        self.assertEqual([len(album_ids) for album_ids in self.albums_requests], [20, 20, 7])
+        self.assertEqual(self.album_tracks_requests, [("album_long", 50), ("album_long", 100)])
+
+    def test_single_album(self):
+        self.assertEqual(len(self.sp_interface.get_album_track_ids("album_long")), 120)
+
+        with self.assertRaises(Exception):
+            self.sp_interface.get_album_track_ids("not_an_album")
+
+
+class FieldsTestCase(SpotifyTestCase):
+    """The fields filters keep everything that items are built from"""
+    def test_playlist_items_fields(self):
+        playlist_items = [synthetic.playlist_item(track) for track in synthetic.playlist_tracks(5)]
+        slim_playlist_items = synthetic.project(
+            {"items": playlist_items}, spotify_iface.PLAYLIST_ITEMS_FIELDS
+        )["items"]
+
+        self.assertEqual(
+            pickle.dumps([SpotifyTrack(playlist_item["track"]) for playlist_item in slim_playlist_items]),
+            pickle.dumps([SpotifyTrack(playlist_item["track"]) for playlist_item in playlist_items])
+        )
+        self.assertEqual(collection_albums.hash_page(slim_playlist_items), collection_albums.hash_page(playlist_items))
+
+    def test_playlist_fields(self):
+        spotify_playlist = synthetic.playlist("playlist1", synthetic.playlist_tracks(20))
+        slim_spotify_playlist = synthetic.project(spotify_playlist, spotify_iface.PLAYLIST_FIELDS)
+
+        self.assertNotIn("items", slim_spotify_playlist["tracks"])
+        for item_class in (SpotifyPlaylist, SpotifyCollection):
+            self.assertEqual(
+                pickle.dumps(item_class(slim_spotify_playlist)),
+                pickle.dumps(item_class(spotify_playlist))
+            )
@@ -0,0 +1,368 @@
+import threading
+from unittest.mock import Mock, call, patch
+
+from spotipy.exceptions import SpotifyException
+
+from albumcollections.models import CollectionLayout
+from albumcollections import cache
+from albumcollections.spotify import collection_cache
+import albumcollections.spotify.spotify_interface as spotify_iface
+import albumcollections.spotify.spotify_user_interface as spotify_user_iface
+
+from tests.test_spotify import SpotifyTestCase, fake_album_tracks, fake_playlist
+
+# How spotipy reports spotify rejecting a change to an outdated snapshot of a playlist
+SNAPSHOT_CONFLICT = SpotifyException(
+    400, -1, "https://api.spotify.com/v1/playlists/dummyplaylistid1/tracks:\n Invalid snapshot id"
+)
+
+
+class SpotifyUserTestCase(SpotifyTestCase):
+    """Test case with a `SpotifyUserInterface` whose user spotipy client is a mock,
+    within a request context.
+    """
+    def setUp(self):
+        super().setUp()
+
+        self.sp_user_mock = Mock()
+        self.sp_user_mock.me.return_value = {"id": "12345ABC", "display_name": "snoozin"}
+
+        patchers = [
+            patch.object(spotify_iface, "SpotifyClientCredentials"),
+            patch.object(spotify_user_iface, "_auth_manager"),
+            patch.object(spotify_user_iface.spotipy, "Spotify", return_value=self.sp_user_mock),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        request_context = self.app.test_request_context()
+        request_context.push()
+        self.addCleanup(request_context.pop)
+
+    def make_sp_user_interface(self):
+        """Make a user interface whose playlist wrapper functions are served from the fake playlist"""
+        sp_user_interface = spotify_user_iface.SpotifyUserInterface()
+        sp_user_interface._playlist = self._fake_playlist
+        sp_user_interface._playlist_tracks = self._fake_playlist_tracks
+        sp_user_interface._albums = self._fake_albums
+        sp_user_interface._album_tracks = self._fake_album_tracks
+
+        return sp_user_interface
+
+
+class SpotifyUserProfileTestCase(SpotifyUserTestCase):
+    def test_one_interface_per_request(self):
+        self.assertIs(spotify_user_iface.get_user_interface(), spotify_user_iface.get_user_interface())
+        self.assertEqual(self.sp_user_mock.me.call_count, 1)
+
+    def test_warm_profile(self):
+        """Once the user's profile is cached in their session, spotify isn't asked for it again"""
+        spotify_user_iface.SpotifyUserInterface()
+        sp_user_interface = spotify_user_iface.SpotifyUserInterface()
+
+        self.assertEqual(sp_user_interface.user_id, "12345ABC")
+        self.assertEqual(sp_user_interface.display_name, "snoozin")
+        self.assertEqual(self.sp_user_mock.me.call_count, 1)
+
+    def test_expired_profile(self):
+        spotify_user_iface.SpotifyUserInterface()
+
+        expired_time = spotify_user_iface.time.time() + spotify_user_iface.PROFILE_CACHE_TIMEOUT + 1
+        with patch.object(spotify_user_iface.time, "time", return_value=expired_time):
+            spotify_user_iface.SpotifyUserInterface()
+
+        self.assertEqual(self.sp_user_mock.me.call_count, 2)
+
+    def test_detached(self):
+        """A detached interface works outside of the request, with its own copy of the user's token"""
+        token_info = {"access_token": "dummytoken"}
+        self.sp_user_mock.auth_manager.cache_handler.get_cached_token.return_value = token_info
+        sp_user_interface = spotify_user_iface.SpotifyUserInterface()
+
+        detached_interfaces = []
+
+        def detach():
+            with self.app.app_context():
+                detached_interfaces.append(sp_user_interface.detached())
+
+        thread = threading.Thread(target=detach)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(len(detached_interfaces), 1)
+        self.assertEqual(detached_interfaces[0].user_id, "12345ABC")
+        self.assertEqual(detached_interfaces[0].display_name, "snoozin")
+        self.assertEqual(self.sp_user_mock.me.call_count, 1)
+
+        cache_handler = spotify_user_iface._auth_manager.call_args.kwargs["cache_handler"]
+        self.assertEqual(cache_handler.get_cached_token(), token_info)
+        self.assertIsNot(cache_handler.get_cached_token(), token_info)
+
+
+class GetPlaylistsTestCase(SpotifyUserTestCase):
+    def test_concurrent_pages(self):
+        """Pages after the first are requested together, and playlists come back in order"""
+        user_playlists = [fake_playlist(f"playlist{num}", "snapshot1", 0) for num in range(120)]
+        self.sp_user_mock.current_user_playlists.side_effect = lambda limit, offset: {
+            "items": user_playlists[offset:offset + limit], "total": len(user_playlists)
+        }
+
+        playlists, errors = spotify_user_iface.SpotifyUserInterface().get_playlists()
+
+        self.assertEqual(errors, [])
+        self.assertEqual([playlist.id for playlist in playlists], [playlist["id"] for playlist in user_playlists])
+        self.assertEqual(
+            sorted(call.kwargs["offset"] for call in self.sp_user_mock.current_user_playlists.call_args_list),
+            [0, 50, 100]
+        )
+
+
+class ReorderCollectionTestCase(SpotifyUserTestCase):
+    def setUp(self):
+        super().setUp()
+
+        for album_num in range(3):
+            self.playlist_items.extend(fake_album_tracks(f"album{album_num}", 10))
+
+        self.sp_user_mock.playlist_reorder_items.return_value = {"snapshot_id": "snapshot2"}
+        self.sp_user_interface = self.make_sp_user_interface()
+
+    def test_direct_move(self):
+        """A move with known indices doesn't load the collection"""
+        self.assertEqual(
+            self.sp_user_interface.reorder_collection("dummyplaylistid1", "album2", "album0", 20, 0, 10, "snapshot1"),
+            ("snapshot2", False)
+        )
+
+        self.sp_user_mock.playlist_reorder_items.assert_called_once_with(
+            "dummyplaylistid1", 20, 0, range_length=10, snapshot_id="snapshot1"
+        )
+        self.assertEqual(self.playlist_tracks_offsets, [])
+
+    def test_outdated_snapshot(self):
+        """A move with indices from an outdated snapshot is made from the current collection instead"""
+        self.sp_user_mock.playlist_reorder_items.return_value = {"snapshot_id": "snapshot3"}
+
+        self.assertEqual(
+            self.sp_user_interface.reorder_collection("dummyplaylistid1", "album2", None, 10, 0, 10, "snapshot0"),
+            ("snapshot3", True)
+        )
+
+        self.sp_user_mock.playlist_reorder_items.assert_called_once_with(
+            "dummyplaylistid1", 20, 30, range_length=10, snapshot_id="snapshot1"
+        )
+
+    def test_rejected_move(self):
+        """A move rejected for an outdated snapshot is made again from the current collection"""
+        self.sp_user_mock.playlist_reorder_items.side_effect = [
+            SNAPSHOT_CONFLICT, {"snapshot_id": "snapshot3"}
+        ]
+
+        self.assertEqual(
+            self.sp_user_interface.reorder_collection("dummyplaylistid1", "album2", None, 20, 30, 10, "snapshot1"),
+            ("snapshot3", True)
+        )
+
+        self.sp_user_mock.playlist_reorder_items.assert_called_with(
+            "dummyplaylistid1", 20, 30, range_length=10, snapshot_id="snapshot1"
+        )
+
+    def test_bad_request(self):
+        """A move rejected for anything other than its snapshot isn't made again"""
+        self.sp_user_mock.playlist_reorder_items.side_effect = SpotifyException(400, -1, "Index out of bounds")
+
+        with self.assertRaises(SpotifyException):
+            self.sp_user_interface.reorder_collection("dummyplaylistid1", "album2", None, 10, 0, 10, "snapshot1")
+
+        self.assertEqual(self.sp_user_mock.playlist_reorder_items.call_count, 1)
+
+
+class AddAlbumToCollectionTestCase(SpotifyUserTestCase):
+    def test_repair_long_album(self):
+        """An incomplete album of more than 100 tracks is put back together where it was first found"""
+        self.albums["album1"] = fake_album_tracks("album1", 250)
+        self.playlist_items.extend(
+            fake_album_tracks("album0", 10) + self.albums["album1"][:200] + fake_album_tracks("album2", 10)
+        )
+        self.sp_user_mock.playlist_remove_all_occurrences_of_items.return_value = {"snapshot_id": "snapshot2"}
+        self.sp_user_mock.playlist_add_items.return_value = {"snapshot_id": "snapshot3"}
+
+        self.make_sp_user_interface().add_album_to_collection("dummyplaylistid1", "album1")
+
+        album_track_ids = [track["id"] for track in self.albums["album1"]]
+        self.assertEqual(self.sp_user_mock.playlist_remove_all_occurrences_of_items.call_args_list, [
+            call("dummyplaylistid1", album_track_ids[:100], snapshot_id=None),
+            call("dummyplaylistid1", album_track_ids[100:200], snapshot_id=None),
+            call("dummyplaylistid1", album_track_ids[200:], snapshot_id=None),
+        ])
+        self.assertEqual(self.sp_user_mock.playlist_add_items.call_args_list, [
+            call("dummyplaylistid1", album_track_ids[:100], 10),
+            call("dummyplaylistid1", album_track_ids[100:200], 110),
+            call("dummyplaylistid1", album_track_ids[200:], 210),
+        ])
+
+
+class CollectionWriteThroughTestCase(SpotifyUserTestCase):
+    def setUp(self):
+        super().setUp()
+
+        # Use a real cache, to store parsed albums across loads
+        cache.init_app(self.app, config={"CACHE_TYPE": "SimpleCache"})
+
+        for album_num in range(3):
+            self.playlist_items.extend(fake_album_tracks(f"album{album_num}", 10))
+
+        self.sp_user_interface = self.make_sp_user_interface()
+        self.sp_user_interface.get_collection("dummyplaylistid1")
+        self.playlist_tracks_offsets.clear()
+
+    def tearDown(self):
+        cache.clear()
+        cache.init_app(self.app)
+        super().tearDown()
+
+    def assert_cached_collection_current(self):
+        """The cached collection is used for the new snapshot, and matches a fresh parse of the playlist"""
+        self.snapshot_id = "snapshot2"
+        albums = self.sp_user_interface.get_collection("dummyplaylistid1").albums
+        self.assertEqual(self.playlist_tracks_offsets, [])
+
+        cache.clear()
+        collection_cache.clear_memory()
+        CollectionLayout.query.delete()
+        expected_albums = self.sp_user_interface.get_collection("dummyplaylistid1").albums
+        self.assertNotEqual(self.playlist_tracks_offsets, [])
+        self.assertEqual(
+            [(album.id, album.playlist_index, album.track_ids, album.complete) for album in albums],
+            [(album.id, album.playlist_index, album.track_ids, album.complete) for album in expected_albums]
+        )
+
+    def fake_edit(self, edit, other_edit=None, other_edit_first=True):
+        """Make a fake spotipy playlist edit function that makes `edit` to the fake
+        playlist, along with another user's edit made just before or after it
+        """
+        def playlist_edit(*args, **kwargs):
+            if other_edit is not None and other_edit_first:
+                other_edit()
+                self.snapshot_id = "snapshot_other"
+
+            edit()
+            self.snapshot_id = "snapshot2"
+
+            if other_edit is not None and not other_edit_first:
+                other_edit()
+                self.snapshot_id = "snapshot_other"
+
+            return {"snapshot_id": "snapshot2"}
+
+        return playlist_edit
+
+    def move_album2_to_start(self):
+        self.playlist_items[:] = self.playlist_items[20:30] + self.playlist_items[:20] + self.playlist_items[30:]
+
+    def remove_album1(self):
+        del self.playlist_items[10:20]
+
+    def add_album3(self):
+        self.playlist_items.extend(fake_album_tracks("album3", 10))
+
+    def test_reorder(self):
+        self.sp_user_mock.playlist_reorder_items.side_effect = self.fake_edit(self.move_album2_to_start)
+
+        self.sp_user_interface.reorder_collection("dummyplaylistid1", "album2", "album0", 20, 0, 10, "snapshot1")
+
+        self.assert_cached_collection_current()
+
+    def test_remove_album(self):
+        self.albums["album1"] = fake_album_tracks("album1", 10)
+        self.sp_user_mock.playlist_remove_all_occurrences_of_items.side_effect = self.fake_edit(self.remove_album1)
+
+        self.assertEqual(
+            self.sp_user_interface.remove_album_from_playlist("dummyplaylistid1", "album1", "snapshot1"),
+            ("snapshot2", False)
+        )
+
+        self.sp_user_mock.playlist_remove_all_occurrences_of_items.assert_called_once_with(
+            "dummyplaylistid1", [track["id"] for track in self.albums["album1"]], snapshot_id="snapshot1"
+        )
+        self.assert_cached_collection_current()
+
+    def assert_playlist_parsed_again(self, expected_album_ids):
+        """The cached collection wasn't edited, and the playlist is parsed again on the next load"""
+        self.assertIsNone(collection_cache.get_albums("dummyplaylistid1", "snapshot2"))
+
+        albums = self.sp_user_interface.get_collection("dummyplaylistid1").albums
+        self.assertNotEqual(self.playlist_tracks_offsets, [])
+        self.assertEqual([album.id for album in albums], expected_album_ids)
+
+    def test_reorder_after_other_edit(self):
+        """Spotify makes a move to an outdated snapshot, so it can't be applied to the cached collection"""
+        self.sp_user_mock.playlist_reorder_items.side_effect = self.fake_edit(
+            self.move_album2_to_start, self.add_album3
+        )
+
+        self.sp_user_interface.reorder_collection("dummyplaylistid1", "album2", "album0", 20, 0, 10, "snapshot1")
+
+        self.assert_playlist_parsed_again(["album2", "album0", "album1", "album3"])
+
+    def test_reorder_before_other_edit(self):
+        self.sp_user_mock.playlist_reorder_items.side_effect = self.fake_edit(
+            self.move_album2_to_start, self.add_album3, other_edit_first=False
+        )
+
+        self.sp_user_interface.reorder_collection("dummyplaylistid1", "album2", "album0", 20, 0, 10, "snapshot1")
+
+        self.assert_playlist_parsed_again(["album2", "album0", "album1", "album3"])
+
+    def test_remove_album_after_other_edit(self):
+        self.albums["album1"] = fake_album_tracks("album1", 10)
+        self.sp_user_mock.playlist_remove_all_occurrences_of_items.side_effect = self.fake_edit(
+            self.remove_album1, self.add_album3
+        )
+
+        self.sp_user_interface.remove_album_from_playlist("dummyplaylistid1", "album1", "snapshot1")
+
+        self.assert_playlist_parsed_again(["album0", "album2", "album3"])
+
+    def test_remove_album_before_other_edit(self):
+        self.albums["album1"] = fake_album_tracks("album1", 10)
+        self.sp_user_mock.playlist_remove_all_occurrences_of_items.side_effect = self.fake_edit(
+            self.remove_album1, self.add_album3, other_edit_first=False
+        )
+
+        self.sp_user_interface.remove_album_from_playlist("dummyplaylistid1", "album1", "snapshot1")
+
+        self.assert_playlist_parsed_again(["album0", "album2", "album3"])
+
+    def test_remove_album_from_changed_playlist(self):
+        """A removal rejected for an outdated snapshot is made again, without editing the cached collection"""
+        self.albums["album1"] = fake_album_tracks("album1", 10)
+        self.sp_user_mock.playlist_remove_all_occurrences_of_items.side_effect = [
+            SNAPSHOT_CONFLICT, {"snapshot_id": "snapshot2"}
+        ]
+
+        self.assertEqual(
+            self.sp_user_interface.remove_album_from_playlist("dummyplaylistid1", "album1", "snapshot1"),
+            ("snapshot2", True)
+        )
+
+        self.assertEqual(self.sp_user_mock.playlist_remove_all_occurrences_of_items.call_args_list[-1], call(
+            "dummyplaylistid1", [track["id"] for track in self.albums["album1"]], snapshot_id=None
+        ))
+        self.assertIsNone(collection_cache.get_albums("dummyplaylistid1", "snapshot2"))
+
+    def test_add_album(self):
+        """An addition can't be made against a snapshot, so the cached collection isn't edited"""
+        self.albums["album3"] = fake_album_tracks("album3", 10)
+        self.sp_user_mock.playlist_add_items.return_value = {"snapshot_id": "snapshot2"}
+
+        self.sp_user_interface.add_album_to_collection("dummyplaylistid1", "album3")
+        self.playlist_items.extend(self.albums["album3"])
+
+        self.assertIsNone(collection_cache.get_albums("dummyplaylistid1", "snapshot2"))
+
+        self.snapshot_id = "snapshot2"
+        albums = self.sp_user_interface.get_collection("dummyplaylistid1").albums
+        self.assertEqual([album.id for album in albums], ["album0", "album1", "album2", "album3"])
+        self.assertTrue(albums[-1].complete)
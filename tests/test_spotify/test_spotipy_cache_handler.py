@@ -0,0 +1,51 @@
+from unittest.mock import patch
+
+from spotipy.oauth2 import SpotifyClientCredentials
+
+from albumcollections import cache
+from albumcollections.spotify.spotipy_cache_handler import AppCacheHandler
+
+from tests.test_spotify import SpotifyTestCase
+
+
+class AppCacheHandlerTestCase(SpotifyTestCase):
+    def setUp(self):
+        super().setUp()
+
+        # Use a real cache, to share the token in
+        cache.init_app(self.app, config={"CACHE_TYPE": "SimpleCache"})
+
+    def tearDown(self):
+        cache.clear()
+        cache.init_app(self.app)
+        super().tearDown()
+
+    def make_credentials_manager(self):
+        return SpotifyClientCredentials(
+            client_id="client_id",
+            client_secret="client_secret",
+            cache_handler=AppCacheHandler(cache, "client_credentials_token")
+        )
+
+    def test_token_shared_between_workers(self):
+        """A token fetched by one worker is used by the others until it's about to expire"""
+        token_info = {"access_token": "token1", "token_type": "Bearer", "expires_in": 3600}
+
+        with patch.object(SpotifyClientCredentials, "_request_access_token", return_value=token_info) as request_mock:
+            access_tokens = [
+                self.make_credentials_manager().get_access_token(as_dict=False) for _ in range(3)
+            ]
+
+        self.assertEqual(access_tokens, ["token1"] * 3)
+        self.assertEqual(request_mock.call_count, 1)
+
+    def test_refresh_before_expiry(self):
+        token_infos = [
+            {"access_token": "token1", "token_type": "Bearer", "expires_in": 30},
+            {"access_token": "token2", "token_type": "Bearer", "expires_in": 3600},
+        ]
+        credentials_manager = self.make_credentials_manager()
+
+        with patch.object(SpotifyClientCredentials, "_request_access_token", side_effect=token_infos):
+            credentials_manager.get_access_token(as_dict=False)
+            self.assertEqual(credentials_manager.get_access_token(as_dict=False), "token2")